@@ -0,0 +1,265 @@
+"""
+Offline benchmark of the resume extraction pipelines (gpt_fitz, mistral, local and hybrid).
+
+Drives `extract_resume_data_async` over a corpus of PDFs against local
+stand-in OpenAI/Mistral servers with configurable latency, and reports:
+    - per-stage timings (pdf_parse, ocr_upload, ocr, prompt_compaction, llm, json_parse)
+    - per-document latency percentiles and throughput per concurrency level
+    - peak Python heap (tracemalloc) and process RSS
+Results are written as JSON so runs can be diffed for regressions.
+
+Usage (from the backend directory):
+    python -m benchmarks.extraction_benchmark --concurrency 1,4,16 --output benchmarks/results/run.json
+    python -m benchmarks.extraction_benchmark --corpus ./sample_pdfs --models mistral --llm-latency 0.8
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import fitz  # PyMuPDF, used to generate the synthetic corpus
+
+from benchmarks.fake_backends import FakeBackends, LatencyProfile
+
+SKILLS = ["Python", "FastAPI", "PostgreSQL", "React", "Docker", "Kubernetes", "AWS", "Terraform", "Go", "Rust"]
+
+
+def build_resume_pdf(index: int, pages: int) -> bytes:
+    """Renders synthetic text-layer resume number `index` as PDF bytes."""
+    with fitz.open() as doc:
+        for page_number in range(pages):
+            page = doc.new_page()
+            lines = [
+                f"Candidate {index} - page {page_number + 1}",
+                f"candidate{index}@example.com | +1 555 {index:04d}",
+                "Skills: " + ", ".join(SKILLS[(index + offset) % len(SKILLS)] for offset in range(5)),
+            ]
+            lines += [
+                f"Engineer at Company {role} ({2015 + role}-{2016 + role}): built services and data pipelines."
+                for role in range(12)
+            ]
+            page.insert_text((50, 60), "\n".join(lines), fontsize=10)
+        return doc.tobytes()
+
+
+def generate_corpus(directory: str, samples: int, pages: int) -> List[str]:
+    """
+    Writes `samples` synthetic text-layer resumes of `pages` pages each.
+
+    Returns:
+        List[str]: Paths of the generated PDFs.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(samples):
+        path = os.path.join(directory, f"resume-{index:04d}.pdf")
+        with open(path, "wb") as f:
+            f.write(build_resume_pdf(index, pages))
+        paths.append(path)
+    return paths
+
+
+def load_corpus(directory: str) -> List[str]:
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.lower().endswith(".pdf")
+    )
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _max_rss_mb() -> Dict[str, float]:
+    """High-water RSS of this process and of reaped children (e.g. the PDF pool), in MB."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KB on Linux
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+async def run_level(extract, paths: List[str], model_type: str, concurrency: int, run_key: str) -> Dict[str, Any]:
+    """
+    Extracts every document once with at most `concurrency` in flight.
+
+    `run_key` is appended to the content hash so each level starts with a cold
+    extraction cache; reusing a key measures the warm (cached) path instead.
+    """
+    from utils.extraction_cache import hash_file
+    from utils.stage_timing import collect_stages
+
+    semaphore = asyncio.Semaphore(concurrency)
+    documents = []
+
+    async def extract_one(path: str):
+        async with semaphore:
+            with collect_stages() as timings:
+                start = time.perf_counter()
+                result = await extract(path, model_type, f"{hash_file(path)}-{run_key}")
+                elapsed = time.perf_counter() - start
+            documents.append({
+                "seconds": elapsed,
+                "stages": timings.as_dict(),
+                "error": result.get("error") if isinstance(result, dict) else "Unexpected result",
+            })
+
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    await asyncio.gather(*(extract_one(path) for path in paths))
+    wall = time.perf_counter() - start
+    _, peak_heap = tracemalloc.get_traced_memory()
+
+    latencies = [document["seconds"] for document in documents]
+    stage_names = sorted({name for document in documents for name in document["stages"]})
+    stages = {}
+    for name in stage_names:
+        values = [document["stages"].get(name, 0.0) for document in documents]
+        stages[name] = {
+            "mean": round(sum(values) / len(values), 4),
+            "p95": round(_percentile(values, 0.95), 4),
+            "total": round(sum(values), 4),
+        }
+
+    errors = [document["error"] for document in documents if document["error"]]
+    return {
+        "model_type": model_type,
+        "concurrency": concurrency,
+        "documents": len(documents),
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "wall_seconds": round(wall, 4),
+        "throughput_docs_per_second": round(len(documents) / wall, 4) if wall > 0 else None,
+        "latency_seconds": {
+            "mean": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+            "p50": round(_percentile(latencies, 0.50), 4),
+            "p95": round(_percentile(latencies, 0.95), 4),
+            "max": round(max(latencies, default=0.0), 4),
+        },
+        "stages": stages,
+        "peak_python_heap_mb": round(peak_heap / (1024 * 1024), 2),
+        "max_rss_mb": _max_rss_mb(),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    # The route module only builds (does not connect) database engines at import
+    for name, value in (("POSTGRES_USER", "bench"), ("POSTGRES_PASSWORD", "bench"), ("POSTGRES_HOST", "127.0.0.1"),
+                        ("POSTGRES_PORT", "5432"), ("POSTGRES_DB", "bench")):
+        os.environ.setdefault(name, value)
+    from routes.resume import extract_resume_data_async
+    from utils.pdf_text import shutdown_pdf_pool
+
+    with tempfile.TemporaryDirectory(prefix="extraction-bench-") as workdir:
+        paths = load_corpus(args.corpus) if args.corpus else generate_corpus(
+            os.path.join(workdir, "corpus"), args.samples, args.pages
+        )
+        if not paths:
+            raise SystemExit("No PDFs found in the corpus directory.")
+        print(f"[INFO] Benchmarking {len(paths)} PDFs")
+
+        results = []
+        tracemalloc.start()
+        try:
+            for model_type in args.models:
+                for concurrency in args.concurrency:
+                    run_key = f"{model_type}-c{concurrency}-{int(time.time() * 1000)}"
+                    for phase in ("cold", "warm") if args.warm else ("cold",):
+                        summary = await run_level(extract_resume_data_async, paths, model_type, concurrency, run_key)
+                        summary["cache"] = phase
+                        results.append(summary)
+                        print(
+                            f"[✅] {model_type:<8} c={concurrency:<3} {phase}: "
+                            f"{summary['throughput_docs_per_second']} docs/s, "
+                            f"p50 {summary['latency_seconds']['p50']}s, {summary['errors']} errors"
+                        )
+        finally:
+            tracemalloc.stop()
+            shutdown_pdf_pool()
+
+        return {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "git_commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "corpus": {
+                    "source": args.corpus or "synthetic",
+                    "documents": len(paths),
+                    "pages_per_document": None if args.corpus else args.pages,
+                    "total_bytes": sum(os.path.getsize(path) for path in paths),
+                },
+                "latency_profile": vars(args.latency),
+            },
+            "results": results,
+        }
+
+
+def parse_args(argv=None):
+    defaults = LatencyProfile()
+    parser = argparse.ArgumentParser(description="Benchmark resume extraction against fake LLM/OCR backends.")
+    parser.add_argument("--corpus", help="Directory of PDFs. A synthetic corpus is generated when omitted.")
+    parser.add_argument("--samples", type=int, default=20, help="Synthetic resumes to generate.")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per synthetic resume.")
+    parser.add_argument("--models", default="gpt_fitz,mistral", help="Comma-separated model types, e.g. gpt_fitz,mistral,local,gpt_fitz_hybrid.")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels.")
+    parser.add_argument("--warm", action="store_true", help="Also measure a second, cache-hit pass per level.")
+    parser.add_argument("--llm-latency", type=float, default=defaults.llm)
+    parser.add_argument("--ocr-latency", type=float, default=defaults.ocr_per_page, help="Seconds per OCR page.")
+    parser.add_argument("--upload-latency", type=float, default=defaults.upload)
+    parser.add_argument("--jitter", type=float, default=defaults.jitter)
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate,
+                        help="Fraction of chat calls the fake APIs reject with a 429.")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "extraction.json"))
+    args = parser.parse_args(argv)
+
+    args.models = [model.strip() for model in args.models.split(",") if model.strip()]
+    args.concurrency = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    args.latency = LatencyProfile(
+        llm=args.llm_latency, ocr_per_page=args.ocr_latency, upload=args.upload_latency, jitter=args.jitter,
+        rate_limit_rate=args.rate_limit_rate,
+    )
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with FakeBackends(args.latency) as backends:
+        # Clients are created at import time, so the environment must be set first
+        os.environ.update(backends.client_env())
+        os.environ.setdefault("EXTRACTION_CACHE_DIR", tempfile.mkdtemp(prefix="extraction-cache-"))
+        report = asyncio.run(run_benchmark(args))
+        with urllib.request.urlopen(f"{backends.base_url}/stats", timeout=5) as response:
+            report["meta"]["backend_requests"] = json.load(response)["requests"]
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[✅] Wrote benchmark results to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Local stand-ins for the OpenAI and Mistral HTTP APIs used by benchmarks and load tests.
+
+Responses have the shapes the official SDKs expect, and every endpoint sleeps
+for a configurable latency (plus jitter) before answering, so the pipelines can
+be measured offline without API keys or cost.
+
+Routes:
+    /openai/v1/chat/completions, /openai/v1/embeddings
+    /mistral/v1/files, /mistral/v1/files/{id}/url, /mistral/v1/files/{id} (DELETE)
+    /mistral/v1/ocr, /mistral/v1/chat/completions
+
+Point the clients at a running server with `FakeBackends.client_env()`.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+import fitz  # PyMuPDF, used to turn uploaded PDFs into OCR markdown
+import uvicorn
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse
+
+EMBEDDING_DIMENSION = 3072  # text-embedding-3-large
+
+
+@dataclass
+class LatencyProfile:
+    """Simulated latency in seconds for each remote operation."""
+    llm: float = 1.2
+    llm_per_1k_chars: float = 0.05  # Extra time per 1,000 prompt characters
+    embedding: float = 0.15
+    upload: float = 0.15
+    signed_url: float = 0.05
+    ocr_per_page: float = 0.35
+    delete: float = 0.05
+    jitter: float = 0.1  # Uniform +/- fraction applied to every delay
+    rate_limit_rate: float = 0.0  # Fraction of chat calls answered with a 429 and Retry-After
+    retry_after: float = 0.1
+
+
+def _sample_resume(seed: str) -> Dict[str, Any]:
+    """Builds a deterministic structured resume so parsing and storage work downstream."""
+    digest = hashlib.sha256(seed.encode("utf-8")).hexdigest()[:10]
+    return {
+        "Name": f"Candidate {digest}",
+        "Email": f"candidate-{digest}@example.com",
+        "Phone Number": "+1 555 0100",
+        "Skills": {"Languages": ["Python", "SQL"], "Tools": ["Docker", "Kubernetes"]},
+        "Work Experience": [{"Company": "Example Corp", "Role": "Engineer", "Duration": "2020-2024"}],
+        "Education": [{"Degree": "BSc Computer Science", "Institution": "Example University", "Year": "2020"}],
+        "Certifications": [{"Name": "CKA"}],
+        "Projects": [{"Name": "Resume Parser", "Description": "Parses resumes"}],
+        "Gpa": "3.6",
+    }
+
+
+def _embedding(text: str, dimension: int) -> List[float]:
+    """Deterministic pseudo-random unit-ish vector for a text."""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    return [rng.uniform(-1, 1) for _ in range(dimension)]
+
+
+def _ocr_pages(pdf_bytes: bytes) -> List[Dict[str, Any]]:
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return [
+            {
+                "index": index,
+                "markdown": page.get_text(),
+                "images": [],
+                "dimensions": {"dpi": 200, "height": int(page.rect.height), "width": int(page.rect.width)},
+            }
+            for index, page in enumerate(doc)
+        ]
+
+
+def create_app(latency: LatencyProfile) -> FastAPI:
+    """Builds the stand-in API application for a latency profile."""
+    app = FastAPI(title="Fake OpenAI/Mistral backends")
+    files: Dict[str, bytes] = {}
+    counters: Dict[str, int] = {}
+
+    async def delay(seconds: float) -> None:
+        if seconds > 0:
+            await asyncio.sleep(seconds * random.uniform(1 - latency.jitter, 1 + latency.jitter))
+
+    def count(name: str) -> None:
+        counters[name] = counters.get(name, 0) + 1
+
+    def completion(model: str, prompt: str) -> Dict[str, Any]:
+        content = "```json\n" + json.dumps(_sample_resume(prompt)) + "\n```"
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        }
+
+    async def chat(request: Request, name: str):
+        if random.random() < latency.rate_limit_rate:
+            count(f"{name}_rate_limited")
+            return JSONResponse(
+                status_code=429, headers={"retry-after": str(latency.retry_after)},
+                content={"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+            )
+        count(name)
+        body = await request.json()
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        await delay(latency.llm + latency.llm_per_1k_chars * len(prompt) / 1000)
+        return completion(body.get("model", "fake"), prompt)
+
+    @app.post("/openai/v1/chat/completions")
+    async def openai_chat(request: Request):
+        return await chat(request, "openai_chat")
+
+    @app.post("/openai/v1/embeddings")
+    async def openai_embeddings(request: Request):
+        count("openai_embeddings")
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        await delay(latency.embedding)
+        dimension = body.get("dimensions") or EMBEDDING_DIMENSION
+        return {
+            "object": "list",
+            "model": body.get("model", "fake"),
+            "data": [
+                {"object": "embedding", "index": index, "embedding": _embedding(str(text), dimension)}
+                for index, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.post("/mistral/v1/files")
+    async def mistral_upload(file: UploadFile = File(...), purpose: str = Form("ocr")):
+        count("mistral_upload")
+        content = await file.read()
+        await delay(latency.upload)
+        file_id = uuid.uuid4().hex
+        files[file_id] = content
+        return {
+            "id": file_id, "object": "file", "size_bytes": len(content), "created_at": int(time.time()),
+            "filename": file.filename or "resume.pdf", "purpose": purpose, "sample_type": "ocr_input",
+            "source": "upload",
+        }
+
+    @app.get("/mistral/v1/files/{file_id}/url")
+    async def mistral_signed_url(file_id: str, request: Request):
+        count("mistral_signed_url")
+        await delay(latency.signed_url)
+        return {"url": f"{str(request.base_url).rstrip('/')}/mistral/v1/files/{file_id}/content"}
+
+    @app.delete("/mistral/v1/files/{file_id}")
+    async def mistral_delete(file_id: str):
+        count("mistral_delete")
+        await delay(latency.delete)
+        files.pop(file_id, None)
+        return {"id": file_id, "object": "file", "deleted": True}
+
+    @app.post("/mistral/v1/ocr")
+    async def mistral_ocr(request: Request):
+        count("mistral_ocr")
+        body = await request.json()
+        document = body.get("document", {})
+        if document.get("type") == "file":
+            if document.get("file_id") not in files:
+                raise HTTPException(status_code=404, detail="File not found")
+            pdf_bytes = files[document["file_id"]]
+        elif document.get("type") == "document_url" and "/files/" in document.get("document_url", ""):
+            pdf_bytes = files.get(document["document_url"].split("/files/")[1].split("/")[0], b"")
+        elif document.get("document_url", "").startswith("data:"):
+            pdf_bytes = base64.b64decode(document["document_url"].split(",", 1)[1])
+        else:
+            pdf_bytes = b""
+
+        pages = await asyncio.to_thread(_ocr_pages, pdf_bytes) if pdf_bytes else []
+        await delay(latency.ocr_per_page * max(1, len(pages)))
+        return {
+            "pages": pages,
+            "model": body.get("model", "fake-ocr"),
+            "usage_info": {"pages_processed": len(pages), "doc_size_bytes": len(pdf_bytes)},
+        }
+
+    @app.post("/mistral/v1/chat/completions")
+    async def mistral_chat(request: Request):
+        return await chat(request, "mistral_chat")
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": counters, "stored_files": len(files), "latency": asdict(latency)}
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeBackends:
+    """
+    Runs the stand-in API server on a background thread.
+
+    Usage:
+        with FakeBackends(LatencyProfile(llm=0.5)) as backends:
+            os.environ.update(backends.client_env())
+    """
+
+    def __init__(self, latency: Optional[LatencyProfile] = None, port: Optional[int] = None):
+        self.latency = latency or LatencyProfile()
+        self.port = port or _free_port()
+        self._server = uvicorn.Server(uvicorn.Config(
+            create_app(self.latency), host="127.0.0.1", port=self.port, log_level="warning",
+        ))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def client_env(self) -> Dict[str, str]:
+        """Environment variables that route the OpenAI and Mistral clients here."""
+        return {
+            "OPENAI_API_KEY": "fake-openai-key",
+            "OPENAI_BASE_URL": f"{self.base_url}/openai/v1",
+            "MISTRAL_API_KEY": "fake-mistral-key",
+            "MISTRAL_SERVER_URL": f"{self.base_url}/mistral",
+        }
+
+    def start(self) -> "FakeBackends":
+        self._thread = threading.Thread(target=self._server.run, name="fake-backends", daemon=True)
+        self._thread.start()
+        deadline = time.time() + 10
+        while not self._server.started:
+            if time.time() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Fake backends failed to start")
+            time.sleep(0.02)
+        print(f"[INFO] Fake OpenAI/Mistral backends listening on {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def __enter__(self) -> "FakeBackends":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve fake OpenAI/Mistral APIs for offline testing.")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--llm-latency", type=float, default=LatencyProfile.llm)
+    parser.add_argument("--ocr-latency", type=float, default=LatencyProfile.ocr_per_page)
+    parser.add_argument("--embedding-latency", type=float, default=LatencyProfile.embedding)
+    args = parser.parse_args()
+
+    profile = LatencyProfile(llm=args.llm_latency, ocr_per_page=args.ocr_latency, embedding=args.embedding_latency)
+    uvicorn.run(create_app(profile), host="127.0.0.1", port=args.port)
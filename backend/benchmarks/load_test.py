@@ -0,0 +1,399 @@
+"""
+End-to-end load test for the upload and search endpoints.
+
+Boots the FastAPI `app` in a child process against a local Postgres, with the
+OpenAI/Mistral APIs served by `benchmarks.fake_backends` and the local NumPy
+vector store in a scratch directory. Virtual users then replay a weighted
+upload/search mix at each concurrency level and the run reports, per level:
+    - p50/p95/p99/max latency, throughput and error rate per operation
+    - event-loop lag of the app process (p50/p95/p99/max)
+    - DB pool stats and ingestion progress
+Results are written as JSON for capacity planning and regression diffs.
+
+Requirements:
+    A Postgres server reachable with the usual POSTGRES_* variables. The app
+    creates and uses the --database given (default `resume_loadtest`), so the
+    regular database is never touched. Raise `ulimit -n` for 500+ users.
+
+Usage (from the backend directory):
+    python -m benchmarks.load_test --users 50,500 --duration 60 --mix upload=1,search=4
+    python -m benchmarks.load_test --users 10 --duration 20 --seed 50 --llm-latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+import httpx
+
+from benchmarks.extraction_benchmark import _git_commit, _percentile, build_resume_pdf
+from benchmarks.fake_backends import FakeBackends, LatencyProfile, _free_port
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Event-loop lag probe: how often the app loop is asked to wake up
+LOOP_LAG_INTERVAL = 0.05
+LOOP_LAG_WINDOW = 20000
+
+SEARCH_PROMPTS = [
+    "Python developer with 5+ years of FastAPI and PostgreSQL experience",
+    "Frontend engineer skilled in React and TypeScript",
+    "DevOps engineer with Kubernetes, Docker and Terraform",
+    "Data engineer who has built data pipelines on AWS",
+    "Backend engineer with Go or Rust and a computer science degree",
+    "Senior engineer with CKA certification and a GPA above 3.5",
+    "Machine learning engineer with Python and SQL",
+    "Full stack developer, React and Node.js, 3 years of experience",
+]
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a fixed-interval sleep.
+
+    Lag is the time the loop was busy with other callbacks (or blocked by
+    synchronous code) when it should have resumed the probe.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, window: int = LOOP_LAG_WINDOW):
+        self.interval = interval
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(0.0, loop.time() - expected))
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def reset(self) -> None:
+        self._samples.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        ordered = sorted(self._samples)
+        return {
+            "samples": len(ordered),
+            "interval_ms": self.interval * 1000,
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+            "max_ms": round(max(ordered, default=0.0) * 1000, 3),
+        }
+
+
+def serve(port: int) -> None:
+    """Runs the app with the loop-lag probe and its /loadtest routes (child process entry point)."""
+    import uvicorn
+    from main import app
+
+    monitor = LoopLagMonitor()
+    app.router.add_event_handler("startup", monitor.start)
+    app.router.add_event_handler("shutdown", monitor.stop)
+    app.add_api_route("/loadtest/loop-lag", monitor.stats, methods=["GET"], include_in_schema=False)
+    app.add_api_route("/loadtest/loop-lag/reset", monitor.reset, methods=["POST"], include_in_schema=False)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+class OperationStats:
+    """Latencies and outcomes of one operation type within a level."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Dict[str, int] = {}
+        self.errors = 0
+
+    def record(self, seconds: float, status: str, ok: bool) -> None:
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self, wall: float) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "throughput_rps": round(count / wall, 3) if wall > 0 else None,
+            "statuses": self.statuses,
+            "latency_ms": {
+                "p50": round(_percentile(ordered, 0.50) * 1000, 2),
+                "p95": round(_percentile(ordered, 0.95) * 1000, 2),
+                "p99": round(_percentile(ordered, 0.99) * 1000, 2),
+                "max": round(max(ordered, default=0.0) * 1000, 2),
+            },
+        }
+
+
+class LoadGenerator:
+    """Issues upload and search requests against a running app."""
+
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.args = args
+        self.rng = random.Random(args.random_seed)
+        self._next_resume = 0
+
+    def _next_pdf(self):
+        # Each upload is a distinct document so it is not short-circuited as a duplicate
+        index = self._next_resume
+        self._next_resume += 1
+        return f"loadtest-{index:06d}.pdf", build_resume_pdf(index, self.args.pages)
+
+    async def upload(self) -> httpx.Response:
+        name, pdf = self._next_pdf()
+        return await self.client.post(
+            "/api/v1/resume/",
+            data={"model_type": self.rng.choice(self.args.models)},
+            files={"file": (name, pdf, "application/pdf")},
+        )
+
+    async def search(self) -> httpx.Response:
+        return await self.client.post(
+            "/api/v1/search-resume/",
+            json={"user_prompt": self.rng.choice(SEARCH_PROMPTS), "top_k": 10},
+        )
+
+    async def timed(self, operation: str, stats: Dict[str, OperationStats]) -> None:
+        start = time.perf_counter()
+        try:
+            response = await getattr(self, operation)()
+            status, ok = str(response.status_code), response.is_success
+            if ok and operation == "upload":
+                # The endpoint reports extraction scheduling failures in the body
+                ok = response.json().get("status") in ("processing", "duplicate")
+        except httpx.HTTPError as e:
+            status, ok = type(e).__name__, False
+        stats.setdefault(operation, OperationStats()).record(time.perf_counter() - start, status, ok)
+
+    async def run_level(self, users: int) -> Dict[str, Any]:
+        """
+        Runs `users` closed-loop virtual users for the configured duration.
+
+        Users start spread over the ramp-up period, pick an operation by the mix
+        weights and pause for an exponentially distributed think time.
+        """
+        operations, weights = zip(*self.args.mix.items())
+        stats: Dict[str, OperationStats] = {}
+        start = time.perf_counter()
+        deadline = start + self.args.ramp_up + self.args.duration
+
+        async def virtual_user(number: int):
+            await asyncio.sleep(self.args.ramp_up * number / users)
+            while time.perf_counter() < deadline:
+                await self.timed(self.rng.choices(operations, weights)[0], stats)
+                if self.args.think_time > 0:
+                    await asyncio.sleep(self.rng.expovariate(1 / self.args.think_time))
+
+        await asyncio.gather(*(virtual_user(number) for number in range(users)))
+        wall = time.perf_counter() - start
+
+        all_requests = OperationStats()
+        for operation_stats in stats.values():
+            all_requests.latencies += operation_stats.latencies
+            all_requests.errors += operation_stats.errors
+            for status, count in operation_stats.statuses.items():
+                all_requests.statuses[status] = all_requests.statuses.get(status, 0) + count
+        return {
+            "wall_seconds": round(wall, 3),
+            "operations": {operation: operation_stats.summary(wall) for operation, operation_stats in stats.items()},
+            "total": all_requests.summary(wall),
+        }
+
+
+async def _get_json(client: httpx.AsyncClient, path: str) -> Dict[str, Any]:
+    response = await client.get(path)
+    response.raise_for_status()
+    return response.json()
+
+
+async def wait_until_ready(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("App process exited during startup")
+        try:
+            health = await _get_json(client, "/health")
+            if health.get("database") == "connected":
+                return
+            raise RuntimeError(f"App cannot reach Postgres at {health.get('db_host')}/{health.get('db_name')}")
+        except httpx.HTTPError:
+            await asyncio.sleep(0.25)
+    raise RuntimeError("App did not become ready in time")
+
+
+async def seed_resumes(client: httpx.AsyncClient, generator: LoadGenerator, count: int, timeout: float) -> int:
+    """Uploads `count` resumes and waits until they are searchable, so searches hit real candidates."""
+    if count <= 0:
+        return 0
+    before = (await _get_json(client, "/api/v1/search-index/stats"))["documents"]
+    semaphore = asyncio.Semaphore(16)
+
+    async def upload_one():
+        async with semaphore:
+            (await generator.upload()).raise_for_status()
+
+    await asyncio.gather(*(upload_one() for _ in range(count)))
+    deadline = time.time() + timeout
+    indexed = 0
+    while time.time() < deadline:
+        indexed = (await _get_json(client, "/api/v1/search-index/stats"))["documents"] - before
+        if indexed >= count:
+            break
+        await asyncio.sleep(0.5)
+    print(f"[INFO] Seeded {indexed}/{count} resumes")
+    return indexed
+
+
+async def drive(args, base_url: str, server: subprocess.Popen) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=max(args.users), max_keepalive_connections=max(args.users))
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+        await wait_until_ready(client, server)
+        generator = LoadGenerator(client, args)
+        seeded = await seed_resumes(client, generator, args.seed, args.seed_timeout)
+
+        levels = []
+        for users in args.users:
+            indexed_before = (await _get_json(client, "/api/v1/search-index/stats"))["documents"]
+            (await client.post("/loadtest/loop-lag/reset")).raise_for_status()
+            level = await generator.run_level(users)
+            level["users"] = users
+            level["event_loop_lag"] = await _get_json(client, "/loadtest/loop-lag")
+            level["db_pool"] = await _get_json(client, "/health/db-pool")
+            level["resumes_indexed"] = (await _get_json(client, "/api/v1/search-index/stats"))["documents"] - indexed_before
+            levels.append(level)
+
+            total, lag = level["total"], level["event_loop_lag"]
+            print(
+                f"[✅] {users:>4} users: {total['throughput_rps']} req/s, p50 {total['latency_ms']['p50']}ms, "
+                f"p99 {total['latency_ms']['p99']}ms, errors {total['error_rate']:.2%}, loop lag p99 {lag['p99_ms']}ms"
+            )
+            if args.cooldown > 0:
+                await asyncio.sleep(args.cooldown)
+        return {"seeded_resumes": seeded, "levels": levels}
+
+
+def run(args) -> Dict[str, Any]:
+    with FakeBackends(args.latency) as backends, tempfile.TemporaryDirectory(prefix="resume-loadtest-") as workdir:
+        port = _free_port()
+        env = dict(os.environ)
+        env.update(backends.client_env())
+        env.update({
+            "POSTGRES_DB": args.database,
+            "VECTOR_STORE_BACKEND": "local",
+            "LOCAL_VECTOR_STORE_PATH": os.path.join(workdir, "vector_store"),
+            "DEBUG": "True",
+            "PYTHONPATH": os.pathsep.join(filter(None, [BACKEND_DIR, env.get("PYTHONPATH")])),
+        })
+        # The app runs from the scratch directory so uploads and caches start empty
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.load_test", "serve", "--port", str(port)],
+            cwd=workdir, env=env, stdout=None if args.app_logs else subprocess.DEVNULL,
+        )
+        try:
+            outcome = asyncio.run(drive(args, f"http://127.0.0.1:{port}", server))
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "database": args.database,
+            "duration_seconds": args.duration,
+            "ramp_up_seconds": args.ramp_up,
+            "think_time_seconds": args.think_time,
+            "mix": args.mix,
+            "models": args.models,
+            "pages_per_resume": args.pages,
+            "latency_profile": vars(args.latency),
+        },
+        **outcome,
+    }
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        operation, _, weight = part.partition("=")
+        if operation.strip() not in ("upload", "search"):
+            raise argparse.ArgumentTypeError(f"Unknown operation in mix: {operation}")
+        mix[operation.strip()] = float(weight or 1)
+    return mix
+
+
+def parse_args(argv=None):
+    defaults = LatencyProfile()
+    parser = argparse.ArgumentParser(description="Load test the upload and search endpoints.")
+    parser.add_argument("--users", default="50,500", help="Comma-separated concurrent user levels.")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds of steady load per level.")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Seconds over which users start.")
+    parser.add_argument("--cooldown", type=float, default=5, help="Pause between levels.")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean pause between a user's requests.")
+    parser.add_argument("--mix", type=_parse_mix, default="upload=1,search=4", help="Operation weights.")
+    parser.add_argument("--models", default="gpt_fitz,mistral", help="Model types used for uploads.")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per uploaded resume.")
+    parser.add_argument("--seed", type=int, default=100, help="Resumes ingested before the first level.")
+    parser.add_argument("--seed-timeout", type=float, default=300)
+    parser.add_argument("--database", default="resume_loadtest", help="Postgres database used by the app.")
+    parser.add_argument("--request-timeout", type=float, default=60)
+    parser.add_argument("--random-seed", type=int, default=1612)
+    parser.add_argument("--llm-latency", type=float, default=defaults.llm)
+    parser.add_argument("--ocr-latency", type=float, default=defaults.ocr_per_page, help="Seconds per OCR page.")
+    parser.add_argument("--embedding-latency", type=float, default=defaults.embedding)
+    parser.add_argument("--app-logs", action="store_true", help="Show the app's stdout.")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", "load_test.json"))
+    args = parser.parse_args(argv)
+
+    args.users = [int(level) for level in args.users.split(",") if level.strip()]
+    args.models = [model.strip() for model in args.models.split(",") if model.strip()]
+    args.latency = LatencyProfile(
+        llm=args.llm_latency, ocr_per_page=args.ocr_latency, embedding=args.embedding_latency,
+    )
+    return args
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["serve"]:
+        serve_parser = argparse.ArgumentParser()
+        serve_parser.add_argument("--port", type=int, required=True)
+        serve(serve_parser.parse_args(argv[1:]).port)
+        return None
+
+    args = parse_args(argv)
+    report = run(args)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[✅] Wrote load test results to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 import os
 from dotenv import load_dotenv
+from utils.pool_metrics import PoolMetrics, instrumented_pool_class
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,16 +20,57 @@ DB_HOST = os.getenv("POSTGRES_HOST")
 DB_PORT = os.getenv("POSTGRES_PORT")
 DB_NAME = os.getenv("POSTGRES_DB")
 
+# Connection pool settings from environment variables
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() in ("true", "1", "t")
+# Pool for background/maintenance work that still runs on the blocking thread pool
+DB_SYNC_POOL_SIZE = int(os.getenv("DB_SYNC_POOL_SIZE", "5"))
+DB_SYNC_MAX_OVERFLOW = int(os.getenv("DB_SYNC_MAX_OVERFLOW", "10"))
+
 # Database URLs
 ADMIN_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/postgres"
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# Checkout latency and saturation of each pool
+async_pool_metrics = PoolMetrics()
+sync_pool_metrics = PoolMetrics()
 
 # Create engines
 admin_engine = create_engine(ADMIN_URL, isolation_level="AUTOCOMMIT")
-engine = create_engine(DATABASE_URL)
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=instrumented_pool_class(QueuePool, sync_pool_metrics),
+    pool_size=DB_SYNC_POOL_SIZE,
+    max_overflow=DB_SYNC_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, async_pool_metrics),
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+
+def _register_pool_events(sync_engine, metrics: PoolMetrics):
+    event.listen(sync_engine, "connect", lambda dbapi_connection, record: metrics.record_connect())
+    event.listen(sync_engine, "invalidate", lambda dbapi_connection, record, exception: metrics.record_invalidation())
+
+_register_pool_events(engine, sync_pool_metrics)
+_register_pool_events(async_engine.sync_engine, async_pool_metrics)
 
 # Session makers
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False so ORM objects stay readable after commit without an implicit (sync) refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 def ensure_database_exists(db_name):
     """Check if database exists and create it if needed"""
@@ -61,6 +105,23 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Dependency to get an async database session for async routes"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_pool_stats():
+    """Checkout latency, counters and saturation of the async and sync connection pools"""
+    return {
+        "async": async_pool_metrics.stats(async_engine.pool),
+        "sync": sync_pool_metrics.stats(engine.pool),
+    }
+
+async def dispose_engines():
+    """Close pooled connections on shutdown"""
+    await async_engine.dispose()
+    engine.dispose()
+
 # Get database configuration for external use
 def get_db_config():
     return {
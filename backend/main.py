@@ -1,20 +1,28 @@
+import asyncio
 import time
 from fastapi import FastAPI, Request, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import text
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
+import threading
 
 # Import from database
 from database import (
-    get_db, ensure_database_exists, create_tables, get_db_config
+    get_async_db, ensure_database_exists, create_tables, get_db_config, get_pool_stats, dispose_engines
 )
 from routes import resume
+from utils.embeddings import configure_vector_store
+from utils.concurrency import run_blocking, shutdown_blocking_pool
+from utils.pdf_text import shutdown_pdf_pool
+from utils.mistral import delete_uploaded_files_async
+from utils.stage_timing import collect_stages
+from utils.metrics import registry, observe_http_request, Gauge, Counter, CONTENT_TYPE
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -37,10 +45,18 @@ class Settings(BaseSettings):
     # Include API keys and email credentials from .env
     mistral_api_key: str = ""
     openai_api_key: str = ""
-    pinecone_api_key:str
-    index_name:str
-    pinecone_environment:str
+    pinecone_api_key:str = ""
+    index_name:str = ""
+    pinecone_environment:str = ""
 
+    # Vector store backend: 'pinecone' or 'local' (in-process NumPy store)
+    vector_store_backend: str = "pinecone"
+    local_vector_store_path: str = "vector_store"
+
+    # The keyword search index is kept in memory per worker process. Each worker
+    # rebuilds it from the database this often to pick up resumes ingested or
+    # deleted by the other workers; 0 disables the refresh (single worker only).
+    search_index_refresh_seconds: float = 300
 
     
     cors_origins: List[str] = ["http://localhost:3000"]
@@ -56,6 +72,9 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
+# Select the vector store used by the embedding helpers
+configure_vector_store(settings.vector_store_backend, settings.local_vector_store_path)
+
 app = FastAPI(
     title=settings.app_name,
     description="API for Resume Extraction and Comparision",
@@ -82,11 +101,25 @@ if not settings.debug:
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     start_time = time.time()
-    response = await call_next(request)
+    # Stages timed while handling the request (including on the blocking pool) land in `timings`.
+    # Streamed bodies send their headers first, so only stages finished before that are listed.
+    with collect_stages() as timings:
+        response = await call_next(request)
     process_time = time.time() - start_time
     response.headers["X-Process-Time"] = str(process_time)
+    response.headers["Server-Timing"] = timings.server_timing(process_time)
+
+    observe_http_request(request.method, _route_label(request), response.status_code, process_time)
     return response
 
+def _route_label(request: Request) -> str:
+    # Label by route template so path parameters don't create a series per ID; 404s share one label
+    route = request.scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    return _route_prefixes.get(id(route), "") + template
+
 # Exception handlers
 @app.exception_handler(SQLAlchemyError)
 async def database_exception_handler(request: Request, exc: SQLAlchemyError):
@@ -102,9 +135,27 @@ async def global_exception_handler(request: Request, exc: Exception):
         content={"detail": "An unexpected error occurred", "error": str(exc)}
     )
 
+async def _refresh_search_index(interval: float):
+    """Rebuilds the keyword search index from the database every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_blocking(resume.rebuild_search_index)
+        except Exception as e:
+            print(f"[⚠️] Keyword search index refresh failed, keeping the current index: {e}")
+
 # Startup and shutdown events
 @app.on_event("startup")
 async def startup_event():
+    # Ingestion traces are written in batches by a background task
+    resume.trace_writer.start()
+
+    # Keep the keyword index in step with the other workers (and retry a failed initial build)
+    if settings.search_index_refresh_seconds > 0:
+        app.state.search_index_refresher = asyncio.create_task(
+            _refresh_search_index(settings.search_index_refresh_seconds)
+        )
+
     try:
         
         # Ensure database exists
@@ -112,6 +163,9 @@ async def startup_event():
         
         # Create tables
         create_tables()
+
+        # Load stored resumes into the keyword search index
+        await run_blocking(resume.rebuild_search_index)
         
         print(f"Application {settings.app_name} v{settings.app_version} started")
         print(f"Connected to database: {settings.postgres_host}/{settings.postgres_db}")
@@ -120,9 +174,22 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    refresher = getattr(app.state, "search_index_refresher", None)
+    if refresher is not None:
+        refresher.cancel()
+    shutdown_blocking_pool()
+    shutdown_pdf_pool()
+    await resume.trace_writer.stop()
+    await delete_uploaded_files_async()
+    await dispose_engines()
     print(f"Application {settings.app_name} shutting down")
 
-app.include_router(resume.router, prefix="/api/v1", tags=["Resume"])
+API_PREFIX = "/api/v1"
+app.include_router(resume.router, prefix=API_PREFIX, tags=["Resume"])
+
+# FastAPI versions that include routers lazily match the router's own route objects,
+# whose path lacks the include prefix; older versions match prefixed copies instead
+_route_prefixes = {id(route): API_PREFIX for route in resume.router.routes}
 
 # Root endpoint
 @app.get("/", tags=["Root"])
@@ -133,10 +200,10 @@ def root():
     }
 
 @app.get("/health", tags=["Health"])
-def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     # Test database connection
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         db_status = "connected"
     except Exception:
         db_status = "disconnected"
@@ -149,6 +216,42 @@ def health_check(db: Session = Depends(get_db)):
         "db_name": settings.postgres_db
     }
 
+@app.get("/health/db-pool", tags=["Health"])
+def db_pool_stats():
+    # Connection checkout latency and saturation for both engines
+    return get_pool_stats()
+
+# Connection pool state, copied from the pool metrics on every scrape
+db_pool_connections = registry.register(Gauge(
+    "db_pool_connections", "Pooled database connections by state.", ["engine", "state"]
+))
+db_pool_checkout_timeouts = registry.register(Counter(
+    "db_pool_checkout_timeouts_total", "Connection checkouts that timed out waiting for the pool.", ["engine"]
+))
+
+# Pool timeout counts already exported, so each scrape only adds what is new
+_pool_timeouts_seen: Dict[str, int] = {}
+_pool_timeouts_lock = threading.Lock()
+
+def _collect_pool_metrics():
+    for engine_name, stats in get_pool_stats().items():
+        for state in ("checked_out", "idle", "overflow"):
+            # QueuePool reports unused overflow capacity as negative overflow
+            db_pool_connections.set(max(stats[state], 0), engine=engine_name, state=state)
+        with _pool_timeouts_lock:
+            timeouts = stats["timeouts"]
+            seen = _pool_timeouts_seen.get(engine_name, 0)
+            # The pool's own count restarts when its engine is recreated
+            db_pool_checkout_timeouts.inc(timeouts - seen if timeouts >= seen else timeouts, engine=engine_name)
+            _pool_timeouts_seen[engine_name] = timeouts
+
+registry.add_collector(_collect_pool_metrics)
+
+@app.get("/metrics", tags=["Health"])
+def metrics():
+    # Stage latency histograms, request metrics and pool state in Prometheus text format
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
 # For direct execution
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,157 @@
+"""
+One-off migration that moves the resume JSON columns to JSONB, adds the
+typed `gpa_value` and `skill_tags` columns, makes `email` optional (the
+local parser cannot always find one), creates the GIN indexes used by
+structured search filters and fills the normalized resume_skill table.
+
+`create_tables()` only creates missing tables, so databases created before
+these columns existed need this script once. It is safe to re-run.
+
+Usage:
+    python migrate_resume_columns.py [--dry-run]
+"""
+import argparse
+from dotenv import load_dotenv
+
+# Load environment variables before the database engine is created
+load_dotenv()
+
+from sqlalchemy import text, exists, inspect
+from sqlalchemy.schema import CreateIndex
+
+from database import engine, SessionLocal, create_tables
+from models import Resume, ResumeSkill
+from utils.resume_fields import parse_gpa, skill_tags, skill_rows
+
+JSON_COLUMNS = ("skills", "work_experience", "education", "certifications", "projects")
+BACKFILL_PAGE_SIZE = 500
+
+
+def _schema_statements(conn) -> list:
+    """Returns the DDL still needed to bring the resume table up to date."""
+    columns = conn.execute(text(
+        "SELECT column_name, data_type, is_nullable FROM information_schema.columns WHERE table_name = 'resume'"
+    )).fetchall()
+    column_types = {name: data_type for name, data_type, _ in columns}
+    nullable = {name: is_nullable == "YES" for name, _, is_nullable in columns}
+
+    statements = []
+    for column in JSON_COLUMNS:
+        if column_types.get(column) == "json":
+            statements.append(f"ALTER TABLE resume ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb")
+    if "gpa_value" not in column_types:
+        statements.append("ALTER TABLE resume ADD COLUMN gpa_value DOUBLE PRECISION")
+    if "skill_tags" not in column_types:
+        statements.append("ALTER TABLE resume ADD COLUMN skill_tags JSONB")
+    if nullable.get("email") is False:
+        statements.append("ALTER TABLE resume ALTER COLUMN email DROP NOT NULL")
+
+    existing_indexes = {row[0] for row in conn.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = 'resume'"
+    ))}
+    for index in Resume.__table__.indexes:
+        if index.name not in existing_indexes:
+            statements.append(str(CreateIndex(index).compile(dialect=engine.dialect)))
+    return statements
+
+
+def _backfill(dry_run: bool) -> int:
+    """Fills gpa_value and skill_tags for rows that predate them."""
+    db = SessionLocal()
+    updated = 0
+    try:
+        last_id = 0
+        while True:
+            resumes = (
+                db.query(Resume)
+                .filter(Resume.id > last_id, Resume.skill_tags.is_(None))
+                .order_by(Resume.id)
+                .limit(BACKFILL_PAGE_SIZE)
+                .all()
+            )
+            if not resumes:
+                break
+            last_id = resumes[-1].id
+
+            for resume in resumes:
+                resume.gpa_value = parse_gpa(resume.gpa)
+                resume.skill_tags = skill_tags(resume.skills)
+            updated += len(resumes)
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+        return updated
+    finally:
+        db.close()
+
+
+def _backfill_skills(dry_run: bool) -> int:
+    """Writes resume_skill rows for resumes that have none yet."""
+    db = SessionLocal()
+    updated = 0
+    try:
+        last_id = 0
+        while True:
+            resumes = (
+                db.query(Resume.id, Resume.skills)
+                .filter(Resume.id > last_id, ~exists().where(ResumeSkill.resume_id == Resume.id))
+                .order_by(Resume.id)
+                .limit(BACKFILL_PAGE_SIZE)
+                .all()
+            )
+            if not resumes:
+                break
+            last_id = resumes[-1].id
+
+            db.add_all([
+                ResumeSkill(resume_id=resume.id, skill_norm=skill, category=category)
+                for resume in resumes
+                for skill, category in skill_rows(resume.skills)
+            ])
+            updated += len(resumes)
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+        return updated
+    finally:
+        db.close()
+
+
+def migrate_resume_columns(dry_run: bool = False) -> dict:
+    """
+    Applies the JSONB/GIN schema changes and backfills the typed columns.
+
+    Args:
+        dry_run (bool): Only report what would change.
+
+    Returns:
+        dict: Migration summary.
+    """
+    if not dry_run:
+        create_tables()  # Adds the resume_skill table
+
+    with engine.begin() as conn:
+        statements = _schema_statements(conn)
+        for statement in statements:
+            print(f"[INFO] {statement}")
+            if not dry_run:
+                conn.execute(text(statement))
+
+    if dry_run and any("ADD COLUMN" in statement for statement in statements):
+        print("[INFO] Dry run, no changes made.")
+        return {"statements": len(statements), "backfilled": 0, "skills_backfilled": 0}
+
+    backfilled = _backfill(dry_run)
+    skills_backfilled = _backfill_skills(dry_run) if not dry_run or inspect(engine).has_table("resume_skill") else 0
+    print(f"[✅] Applied {len(statements)} schema changes and backfilled {backfilled} resumes "
+          f"and the skills of {skills_backfilled} resumes.")
+    return {"statements": len(statements), "backfilled": backfilled, "skills_backfilled": skills_backfilled}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate resume JSON columns to JSONB with GIN indexes.")
+    parser.add_argument("--dry-run", action="store_true", help="Report the changes without applying them.")
+    args = parser.parse_args()
+    print(migrate_resume_columns(dry_run=args.dry_run))
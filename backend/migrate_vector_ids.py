@@ -0,0 +1,140 @@
+"""
+One-off migration that collapses legacy random-UUID Pinecone vectors into
+the deterministic `resume-<Resume.id>` ID scheme.
+
+Usage:
+    python migrate_vector_ids.py [--dry-run]
+"""
+import argparse
+from collections import defaultdict
+from typing import List, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables before the Pinecone index is initialized
+load_dotenv()
+
+from database import SessionLocal
+from models import Resume
+from routes.resume import resume_embedding_text
+from utils.embeddings import (
+    VECTOR_ID_PREFIX, LOCAL_VECTOR_STORE_PATH, _vector_id, configure_vector_store, store_embeddings_batch
+)
+
+FETCH_BATCH_SIZE = 100
+DELETE_BATCH_SIZE = 1000
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _load_embedding_texts(resume_ids: List[str]) -> Tuple[List[Tuple[str, int]], List[str]]:
+    """
+    Builds the embedding text of each resume from its current database row.
+
+    Returns:
+        Tuple: (text, resume id) items to embed, and the ids no longer in the database.
+    """
+    items, missing = [], []
+    db = SessionLocal()
+    try:
+        for batch in _batches(resume_ids, FETCH_BATCH_SIZE):
+            resumes = {
+                str(resume.id): resume
+                for resume in db.query(Resume).filter(Resume.id.in_([int(resume_id) for resume_id in batch])).all()
+            }
+            for resume_id in batch:
+                resume = resumes.get(resume_id)
+                if resume is None:
+                    missing.append(resume_id)
+                else:
+                    items.append((resume_embedding_text(resume), resume.id))
+    finally:
+        db.close()
+    return items, missing
+
+
+def migrate_vector_ids(dry_run: bool = False) -> dict:
+    """
+    Rewrites legacy vectors under deterministic IDs and deletes the originals.
+
+    Legacy duplicates of a resume may hold embeddings of older versions, so
+    none of them is copied: each resume without a `resume-<id>` vector is
+    re-embedded from its current database row. Resumes that no longer exist
+    only have their legacy vectors deleted, and the legacy vectors of a resume
+    that fails to re-embed are kept for a later run.
+
+    Args:
+        dry_run (bool): Only report what would change.
+
+    Returns:
+        dict: Migration summary counts.
+    """
+    vector_store = configure_vector_store("pinecone", LOCAL_VECTOR_STORE_PATH)
+    if vector_store is None:
+        raise RuntimeError("Pinecone index not initialized.")
+    index = vector_store.index
+
+    # Step 1: List every vector ID in the index
+    all_ids = [vector_id for page in index.list() for vector_id in page]
+    existing_ids = {vector_id for vector_id in all_ids if vector_id.startswith(VECTOR_ID_PREFIX)}
+    legacy_ids = [vector_id for vector_id in all_ids if not vector_id.startswith(VECTOR_ID_PREFIX)]
+    print(f"[INFO] Found {len(all_ids)} vectors, {len(legacy_ids)} with legacy IDs.")
+
+    # Step 2: Fetch legacy vectors and group their IDs by resume id
+    grouped = defaultdict(list)
+    orphans = []
+    for batch in _batches(legacy_ids, FETCH_BATCH_SIZE):
+        fetched = index.fetch(ids=batch).vectors
+        for vector_id, vector in fetched.items():
+            resume_id = (vector.metadata or {}).get("id")
+            if resume_id is None:
+                orphans.append(vector_id)
+            else:
+                grouped[str(resume_id)].append(vector_id)
+
+    # Step 3: Re-embed the resumes that don't have a deterministic vector yet from the database
+    to_embed = [resume_id for resume_id in grouped if _vector_id(resume_id) not in existing_ids]
+    items, missing = _load_embedding_texts(to_embed)
+
+    summary = {
+        "legacy_vectors": len(legacy_ids),
+        "resumes": len(grouped),
+        "reembedded": len(items),
+        "deleted_resumes": len(missing),
+        "failed": 0,
+        "deleted": sum(len(vector_ids) for vector_ids in grouped.values()),
+        "orphans": len(orphans),
+    }
+
+    if dry_run:
+        print(f"[INFO] Dry run, no changes made: {summary}")
+        return summary
+
+    # Step 4: Upsert under the new IDs before deleting anything
+    result = store_embeddings_batch(items)
+    for resume_id, error in result["failed"].items():
+        print(f"[❌] Resume ID {resume_id} not re-embedded, keeping its legacy vectors: {error}")
+        grouped.pop(str(resume_id), None)
+    summary["reembedded"] = len(result["stored"])
+    summary["failed"] = len(result["failed"])
+    print(f"[✅] Re-embedded {len(result['stored'])} resumes under deterministic IDs.")
+
+    to_delete = [vector_id for vector_ids in grouped.values() for vector_id in vector_ids]
+    for batch in _batches(to_delete, DELETE_BATCH_SIZE):
+        index.delete(ids=batch)
+    summary["deleted"] = len(to_delete)
+    print(f"[✅] Deleted {len(to_delete)} legacy vectors.")
+
+    if orphans:
+        print(f"[⚠️] {len(orphans)} legacy vectors have no resume id in their metadata and were left in place.")
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collapse legacy Pinecone vectors into deterministic resume IDs.")
+    parser.add_argument("--dry-run", action="store_true", help="Report the changes without applying them.")
+    args = parser.parse_args()
+    print(migrate_vector_ids(dry_run=args.dry_run))
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, JSON, Text, Float
+from sqlalchemy import Column, Integer, String, JSON, Text, Float, Index, ForeignKey, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
 from database import Base
 
 class Resume(Base):
@@ -6,12 +7,71 @@ class Resume(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    email = Column(String, unique=True, nullable=False)
+    email = Column(String, unique=True, nullable=True)  # Unique when present; NULLs never collide
     phone_number = Column(String, nullable=True)
-    skills = Column(JSON, nullable=False)  # Dict[str, Any]
-    work_experience = Column(JSON, nullable=True)  # List[Dict[str, Any]]
-    education = Column(JSON, nullable=False)  # List[Dict[str, Any]]
-    certifications = Column(JSON, nullable=True)  # List[Dict[str, Any]]
-    projects = Column(JSON, nullable=False)  # List[Dict[str, Any]]
+    skills = Column(JSONB, nullable=False)  # Dict[str, Any]
+    work_experience = Column(JSONB, nullable=True)  # List[Dict[str, Any]]
+    education = Column(JSONB, nullable=False)  # List[Dict[str, Any]]
+    certifications = Column(JSONB, nullable=True)  # List[Dict[str, Any]]
+    projects = Column(JSONB, nullable=False)  # List[Dict[str, Any]]
     gpa = Column(String, nullable=True, default="0")
-    model_type = Column(String, nullable=False)
\ No newline at end of file
+    gpa_value = Column(Float, nullable=True)  # GPA on a 4.0 scale, parsed from gpa
+    skill_tags = Column(JSONB, nullable=True)  # List[str], lowercased skill names
+    model_type = Column(String, nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_resume_skills_gin", "skills", postgresql_using="gin", postgresql_ops={"skills": "jsonb_path_ops"}),
+        Index("ix_resume_work_experience_gin", "work_experience", postgresql_using="gin",
+              postgresql_ops={"work_experience": "jsonb_path_ops"}),
+        Index("ix_resume_education_gin", "education", postgresql_using="gin",
+              postgresql_ops={"education": "jsonb_path_ops"}),
+        Index("ix_resume_certifications_gin", "certifications", postgresql_using="gin",
+              postgresql_ops={"certifications": "jsonb_path_ops"}),
+        Index("ix_resume_projects_gin", "projects", postgresql_using="gin",
+              postgresql_ops={"projects": "jsonb_path_ops"}),
+        # Default jsonb_ops so both @> (all of) and ?| (any of) can use the index
+        Index("ix_resume_skill_tags_gin", "skill_tags", postgresql_using="gin"),
+        Index("ix_resume_gpa_value", "gpa_value"),
+    )
+
+
+class ResumeSkill(Base):
+    """One row per (resume, normalized skill, category), written on ingestion for aggregation."""
+    __tablename__ = "resume_skill"
+
+    resume_id = Column(Integer, ForeignKey("resume.id", ondelete="CASCADE"), primary_key=True)
+    skill_norm = Column(String, primary_key=True)  # Lowercased, whitespace-collapsed skill name
+    category = Column(String, primary_key=True)  # Lowercased key of Resume.skills, "general" for flat lists
+
+    __table_args__ = (
+        # Counting resumes per skill and per (category, skill) are index-only scans
+        Index("ix_resume_skill_skill_resume", "skill_norm", "resume_id"),
+        Index("ix_resume_skill_category_skill", "category", "skill_norm", "resume_id"),
+    )
+
+
+class IngestionTrace(Base):
+    """One row per ingestion attempt: stage timings, token usage, retries and outcome."""
+    __tablename__ = "ingestion_trace"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the PDF bytes
+    file_name = Column(String, nullable=True)
+    model_type = Column(String, nullable=False)
+    resume_id = Column(Integer, nullable=True)  # Not a foreign key, traces outlive deleted resumes
+    outcome = Column(String(16), nullable=False)  # 'success' or 'failed'
+    error = Column(Text, nullable=True)
+    total_seconds = Column(Float, nullable=False)
+    stages = Column(JSONB, nullable=False)  # Dict[str, float], seconds per pipeline stage
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    retries = Column(Integer, nullable=False, default=0)
+    routing = Column(JSONB, nullable=True)  # Extractor decision for 'auto' uploads, with the probe cost
+
+    __table_args__ = (
+        # Slowest-N queries scan the duration index backwards, optionally per model type
+        Index("ix_ingestion_trace_total_seconds", "total_seconds"),
+        Index("ix_ingestion_trace_model_total_seconds", "model_type", "total_seconds"),
+        Index("ix_ingestion_trace_created_at", "created_at"),
+    )
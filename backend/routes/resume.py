@@ -1,29 +1,59 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status,BackgroundTasks, File, UploadFile, Form
-from sqlalchemy.orm import Session
-from typing import Dict,Any
-from database import get_db
-import shutil
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, distinct, column, literal_column, select, delete, insert, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from sqlalchemy.dialects.postgresql import array, JSONB
+from typing import Dict,Any,Optional,List,Tuple,Callable,Awaitable
+from database import get_async_db, SessionLocal, AsyncSessionLocal
 from schemas import ResumeResponse
 from enum import Enum
 import os
 from utils.gpt_fitz import extract_resume_data_and_structure as gpt_fitz_extractor
+from utils.gpt_fitz import extract_resume_data_and_structure_async as gpt_fitz_extractor_async
 from utils.mistral import extract_and_structure_resume as mistral_extractor
-from models import Resume 
-from schemas import SearchRequest, ResumeCreate
-from utils.embeddings import generate_embeddings,store_embedding,match_embeddings
-from utils.gpt_finder import extract_prompt_info
+from utils.mistral import extract_and_structure_resume_async as mistral_extractor_async
+from utils.gpt_fitz import extract_resume_data_hybrid, extract_resume_data_hybrid_async
+from utils.mistral import extract_and_structure_resume_hybrid, extract_and_structure_resume_hybrid_async
+from utils.mistral import prefetch_ocr, discard_prefetched_ocr
+from utils.local_parser import extract_resume_locally, extract_resume_locally_async
+from utils.extractor_routing import (
+    AUTO_MODEL_TYPE, AUTO_TEXT_MODEL_TYPE, AUTO_OCR_MODEL_TYPE, resolve_model_type, resolve_model_type_async
+)
+from models import Resume, ResumeSkill, IngestionTrace
+from schemas import SearchRequest, ResumeCreate, ResumeFilters, FilteredSearchRequest, FacetRequest
+from utils.embeddings import (
+    store_embeddings_batch, generate_embeddings_async, store_embedding_async, match_embeddings_with_scores_async,
+    queue_stale_vectors, purge_stale_vectors_async, embedding_batcher
+)
+from utils.search_index import search_index, field_text, FIELD_WEIGHTS
+from utils.resume_fields import parse_gpa, skill_tags, skill_rows, normalize_skill, text_fields
+from utils.gpt_finder import extract_prompt_info_async, prompt_info_cache
+from utils.concurrency import run_blocking
+from utils.extraction_cache import extraction_cache, hash_file
+from utils.embedding_cache import embedding_cache
+from utils.bulk_ingest import (
+    batch_registry, is_zip_upload, count_zip_pdfs, extract_pdfs_from_zip,
+    BULK_INGEST_CONCURRENCY, BULK_MAX_FILES
+)
+from utils.uploads import save_upload, remove_uploads, StoredUpload, UploadTooLargeError
+from utils.stage_timing import stage, collect_stages, DB_UPSERT, UPLOAD_SAVE, RESCORE, DB_FETCH
+from utils.ingestion_trace import TraceWriter, build_trace
 import time
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
 
 router = APIRouter()
 
 @router.get("/resume/{resume_id}", response_model=ResumeResponse)
-def get_travel_resume(resume_id: int, db: Session = Depends(get_db)):
+async def get_travel_resume(resume_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieve a travel resume by its ID.
     """
     try:
         print(f"Fetching travel resume with ID: {resume_id}")
-        resume = db.query(Resume).filter(Resume.id == resume_id).first()
+        resume = await db.get(Resume, resume_id)
         
         if not resume:
             print(f"resume with ID {resume_id} not found")
@@ -41,20 +71,35 @@ def get_travel_resume(resume_id: int, db: Session = Depends(get_db)):
             detail=f"Failed to retrieve travel resume: {str(e)}"
         )
 
-def store_resume_data(extracted_data: dict, db: Session):
+async def _replace_resume_skills(db: AsyncSession, resume_id: int, skills: Any) -> None:
+    """Rewrites the normalized resume_skill rows of a resume within the caller's transaction."""
+    await db.execute(delete(ResumeSkill).where(ResumeSkill.resume_id == resume_id))
+    db.add_all([
+        ResumeSkill(resume_id=resume_id, skill_norm=skill, category=category)
+        for skill, category in skill_rows(skills)
+    ])
+
+
+async def store_resume_data(extracted_data: dict, db: AsyncSession):
     """
     Stores or updates the extracted resume data in the database.
 
     Args:
         extracted_data (dict): Parsed resume details.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
 
     Returns:
         int: The stored or updated resume entry ID.
     """
+    extracted_data = text_fields(extracted_data)
     try:
-        # Check if a record with the given email already exists
-        existing_entry = db.query(Resume).filter_by(email=extracted_data.get("Email")).first()
+        # Check if a record with the given email already exists. Resumes without
+        # an email never match, otherwise they would all overwrite the same row.
+        existing_entry = None
+        if extracted_data.get("Email"):
+            existing_entry = (
+                await db.execute(select(Resume).filter_by(email=extracted_data.get("Email")))
+            ).scalars().first()
 
         if existing_entry:
             # Update existing entry
@@ -66,10 +111,13 @@ def store_resume_data(extracted_data: dict, db: Session):
             existing_entry.certifications = extracted_data.get("Certifications", existing_entry.certifications)
             existing_entry.projects = extracted_data.get("Projects", existing_entry.projects)
             existing_entry.gpa = extracted_data.get("Gpa", existing_entry.gpa)
+            existing_entry.gpa_value = parse_gpa(existing_entry.gpa)
+            existing_entry.skill_tags = skill_tags(existing_entry.skills)
+            await _replace_resume_skills(db, existing_entry.id, existing_entry.skills)
             existing_entry.model_type = extracted_data.get("model_type", existing_entry.model_type)
 
-            db.commit()
-            db.refresh(existing_entry)
+            await db.commit()
+            _index_resume(existing_entry)
             print("Existing resume entry updated successfully with ID:", existing_entry.id)
             return existing_entry.id
         else:
@@ -84,69 +132,177 @@ def store_resume_data(extracted_data: dict, db: Session):
                 certifications=extracted_data.get("Certifications"),
                 projects=extracted_data.get("Projects"),
                 gpa=extracted_data.get("Gpa"),
+                gpa_value=parse_gpa(extracted_data.get("Gpa")),
+                skill_tags=skill_tags(extracted_data.get("Skills")),
                 model_type=extracted_data.get("model_type")
             )
 
             db.add(resume_entry)
-            db.commit()
-            db.refresh(resume_entry)
+            await db.flush()  # Assigns the ID the skill rows reference
+            await _replace_resume_skills(db, resume_entry.id, resume_entry.skills)
+            await db.commit()
+            _index_resume(resume_entry)
             print("New resume entry added successfully with ID:", resume_entry.id)
             return resume_entry.id
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error storing resume data: {str(e)}")
         return None
 
 
-def extract_resume_data(pdf_path: str, model_type: str):
+def _index_resume(resume: Resume) -> None:
+    """Adds or refreshes a stored resume in the keyword search index."""
+    search_index.add(resume.id, {field: getattr(resume, field) for field in FIELD_WEIGHTS})
+
+
+def rebuild_search_index() -> int:
+    """
+    Loads every stored resume into the keyword search index, paging by ID.
+
+    Returns:
+        int: Number of indexed resumes.
+    """
+    db = SessionLocal()
+    start_time = time.time()
+    try:
+        def documents():
+            last_id = 0
+            while True:
+                rows = (
+                    db.query(Resume)
+                    .options(load_only(Resume.id, *(getattr(Resume, field) for field in FIELD_WEIGHTS)))
+                    .filter(Resume.id > last_id)
+                    .order_by(Resume.id)
+                    .limit(REINDEX_PAGE_SIZE)
+                    .all()
+                )
+                if not rows:
+                    return
+                last_id = rows[-1].id
+                for row in rows:
+                    yield row.id, {field: getattr(row, field) for field in FIELD_WEIGHTS}
+
+        indexed = search_index.rebuild(documents())
+        print(f"[✅] Built keyword search index over {indexed} resumes in {time.time() - start_time:.2f} seconds")
+        return indexed
+    finally:
+        db.close()
+
+
+# (sync, async) extractor pair per model type. "local" needs no network; the
+# hybrid types parse locally first and send only unresolved sections to the LLM.
+MODEL_EXTRACTORS = {
+    "gpt_fitz": (gpt_fitz_extractor, gpt_fitz_extractor_async),  # Functions from gpt_fitz.py
+    "mistral": (mistral_extractor, mistral_extractor_async),  # Functions from mistral.py
+    "local": (extract_resume_locally, extract_resume_locally_async),  # Functions from local_parser.py
+    "gpt_fitz_hybrid": (extract_resume_data_hybrid, extract_resume_data_hybrid_async),
+    "mistral_hybrid": (extract_and_structure_resume_hybrid, extract_and_structure_resume_hybrid_async),
+}
+# "auto" probes the PDF text layer and picks gpt_fitz (born-digital) or mistral (scanned)
+MODEL_TYPES = (*MODEL_EXTRACTORS, AUTO_MODEL_TYPE)
+MODEL_TYPE_CHOICES = ", ".join(f"'{model_type}'" for model_type in MODEL_TYPES)
+# Model types whose OCR can run ahead of chat structuring in bulk batches
+OCR_PREFETCH_MODEL_TYPES = {"mistral", "mistral_hybrid"}
+
+
+def _get_extractors(model_type: str):
+    """Returns the (sync, async) extractor pair for a model type."""
+    if model_type not in MODEL_EXTRACTORS:
+        raise ValueError(f"Invalid model type: {model_type}. Choose one of {MODEL_TYPE_CHOICES}.")
+    return MODEL_EXTRACTORS[model_type]
+
+
+def extract_resume_data(pdf_path: str, model_type: str, content_hash: Optional[str] = None):
     """
     Extracts resume data based on the selected model type.
 
+    Results are cached by the SHA-256 of the PDF bytes and the model type, so
+    re-uploading the same file does not trigger another LLM/OCR round trip.
+    For 'auto' the model type is resolved from the PDF text layer first, and
+    the result is cached under the resolved type.
+
     Args:
         pdf_path (str): Path to the PDF resume.
-        model_type (str): Model to use ('gpt_fitz' or 'mistral').
+        model_type (str): Model to use (one of MODEL_TYPES, e.g. 'gpt_fitz' or 'auto').
+        content_hash (str, optional): Precomputed SHA-256 of the PDF bytes.
 
     Returns:
         dict: Extracted resume data.
     """
     print("model type :" ,model_type)
-    if model_type == "gpt_fitz":
-        return gpt_fitz_extractor(pdf_path)  # Calls function from gpt_fitz.py
-    elif model_type == "mistral":
-        return mistral_extractor(pdf_path)  # Calls function from mistral.py
-    else:
-        raise ValueError(f"Invalid model type: {model_type}. Choose 'gpt_fitz' or 'mistral'.")
+    if model_type == AUTO_MODEL_TYPE:
+        model_type = resolve_model_type(pdf_path)
+    extractor, _ = _get_extractors(model_type)
+
+    content_hash = content_hash or hash_file(pdf_path)
+    cached_data = extraction_cache.get(content_hash, model_type)
+    if cached_data is not None:
+        print(f"[✅] Extraction cache hit for {content_hash[:12]} ({model_type})")
+        return cached_data
+
+    extracted_data = extractor(pdf_path)
+    if "error" not in extracted_data:
+        extraction_cache.put(content_hash, model_type, extracted_data)
+    return extracted_data
+
+
+async def extract_resume_data_async(pdf_path: str, model_type: str, content_hash: Optional[str] = None):
+    """
+    Async variant of extract_resume_data. Hashing and cache I/O run on the
+    blocking pool and the extractors use the providers' async clients.
+    """
+    print("model type :" ,model_type)
+    if model_type == AUTO_MODEL_TYPE:
+        model_type = await resolve_model_type_async(pdf_path)
+    _, extractor = _get_extractors(model_type)
+
+    content_hash = content_hash or await run_blocking(hash_file, pdf_path)
+    cached_data = await run_blocking(extraction_cache.get, content_hash, model_type)
+    if cached_data is not None:
+        print(f"[✅] Extraction cache hit for {content_hash[:12]} ({model_type})")
+        return cached_data
+
+    extracted_data = await extractor(pdf_path)
+    if "error" not in extracted_data:
+        await run_blocking(extraction_cache.put, content_hash, model_type, extracted_data)
+    return extracted_data
     
 
-def _delete_resume_from_db(resume_id: str, db: Session):
+async def _delete_resume_from_db(resume_id: int, db: AsyncSession):
     """
     Deletes the resume from the database if embedding storage fails.
     
     Args:
-        resume_id (str): Unique ID of the travel resume.
-        db (Session): Database session.
+        resume_id (int): Unique ID of the travel resume.
+        db (AsyncSession): Database session.
     """
     try:
-        resume = db.query(Resume).filter(Resume.id == resume_id).first()
+        resume = await db.get(Resume, resume_id)
         if resume:
-            db.delete(resume)
-            db.commit()
+            await db.delete(resume)
+            await db.commit()
+            search_index.remove(resume.id)
             print(f"[🗑️] resume ID {resume_id} removed from database due to embedding failure.")
         else:
             print(f"[⚠️] resume ID {resume_id} not found in database.")
     except Exception as e:
         print(f"[❌] Error removing resume from database: {e}")
-        db.rollback()  # Ensure rollback in case of error
+        await db.rollback()  # Ensure rollback in case of error
         
     
-def _store_resume_embedding(resume_description: str, resume_id: int, db: Session) -> bool:
+# Stores one resume embedding: store_embedding_async, or embedding_batcher.store to share batches
+EmbedFunction = Callable[[str, int], Awaitable[int]]
+
+async def _store_resume_embedding(resume_description: str, resume_id: int, db: AsyncSession,
+                                  embed: EmbedFunction = store_embedding_async) -> bool:
     """
     Generate and store an embedding for a resume description.
     
     Args:
         resume_description (str): The resume description.
         resume_id (str): Unique ID for the resume.
-        db (Session): Database session.
+        db (AsyncSession): Database session.
+        embed (EmbedFunction): Stores the embedding, returning 1 on success.
 
     Returns:
         bool: True if successful, False otherwise.
@@ -155,7 +311,7 @@ def _store_resume_embedding(resume_description: str, resume_id: int, db: Session
     start_time = time.time()
 
     try:
-        result = store_embedding(resume_description, resume_id)  # resume_id is already a string
+        result = await embed(resume_description, resume_id)
         
         if result == 1:
             time_taken = time.time() - start_time
@@ -163,11 +319,11 @@ def _store_resume_embedding(resume_description: str, resume_id: int, db: Session
             return True
         else:
             print("[❌] Failed to store embedding. Removing resume from DB...")
-            _delete_resume_from_db(resume_id, db)
+            await _delete_resume_from_db(resume_id, db)
             return False
     except Exception as e:
         print(f"[❌] Error during embedding storage: {e}")
-        _delete_resume_from_db(resume_id, db)
+        await _delete_resume_from_db(resume_id, db)
         return False
     
 def _prepare_generation_text(data: dict) -> str:
@@ -235,58 +391,307 @@ def _prepare_generation_text(data: dict) -> str:
     return formatted_text
     
 
-UPLOAD_DIR = "uploads"  # Folder to store uploaded PDFs
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+def _resume_generation_data(resume: Resume) -> dict:
+    """
+    Maps a stored resume row to the dictionary layout used by _prepare_generation_text.
+    """
+    return {
+        "Name": resume.name,
+        "Email": resume.email,
+        "Phone_number": resume.phone_number,
+        "Skills": resume.skills,
+        "Work_experience": resume.work_experience,
+        "Education": resume.education,
+        "Certifications": resume.certifications,
+        "Projects": resume.projects,
+        "Gpa": resume.gpa,
+    }
 
-async def _process_resume_extraction(file_path: str, db: Session, model_type: str):
-    """Background task to process the uploaded resume and extract data."""
+
+def resume_embedding_text(resume: Resume) -> str:
+    """Builds the text embedded for a stored resume, as used by reindexing and vector migrations."""
+    return _prepare_generation_text(_resume_generation_data(resume))
+
+
+REINDEX_PAGE_SIZE = int(os.getenv("REINDEX_PAGE_SIZE", "500"))
+
+def _reindex_resume_embeddings():
+    """Background task to re-embed every stored resume using bulk embedding/upsert requests."""
+    db = SessionLocal()
+    stored, failed = 0, {}
+    start_time = time.time()
     try:
-        # Call your function to extract structured data from the PDF
-        print("Extracting information from pdf")
-        extracted_data = extract_resume_data(file_path,model_type)
-        extracted_data['model_type']=model_type
+        last_id = 0
+        while True:
+            resumes = (
+                db.query(Resume)
+                .filter(Resume.id > last_id)
+                .order_by(Resume.id)
+                .limit(REINDEX_PAGE_SIZE)
+                .all()
+            )
+            if not resumes:
+                break
+            last_id = resumes[-1].id
+
+            items = []
+            for resume in resumes:
+                try:
+                    items.append((resume_embedding_text(resume), resume.id))
+                except Exception as e:
+                    failed[resume.id] = f"Failed to prepare text: {e}"
+
+            result = store_embeddings_batch(items)
+            stored += len(result["stored"])
+            failed.update(result["failed"])
+
+        print(f"[✅] Reindexed {stored} resumes in {time.time() - start_time:.2f} seconds, {len(failed)} failed")
+        for resume_id, error in failed.items():
+            print(f"[❌] Resume ID {resume_id} not reindexed: {error}")
+    except Exception as e:
+        print(f"[❌] Error reindexing resume embeddings: {e}")
+    finally:
+        db.close()
+
+
+@router.post("/resume/reindex", response_model=Dict[str, Any])
+async def reindex_resumes(background_tasks: BackgroundTasks = BackgroundTasks()):
+    """
+    Re-embed all stored resumes in the background using batched requests.
+    """
+    background_tasks.add_task(_reindex_resume_embeddings)
+    background_tasks.add_task(rebuild_search_index)
+    return {
+        "status": "processing",
+        "message": "All resumes are being reindexed in the background."
+    }
+
+
+UPLOAD_DIR = "uploads"  # Folder to store uploaded PDFs, named by content hash
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+# (content hash, model type) pairs scheduled for extraction but not finished yet
+_inflight_extractions = set()
+
+async def _find_ingested_resume(content_hash: str, model_type: str) -> Optional[int]:
+    """
+    Returns the ID of the resume already ingested from identical PDF bytes, if any.
+
+    A document counts as ingested when its extraction is cached and the
+    extracted email is present in the database. For 'auto' an extraction
+    with either routing target counts.
+    """
+    candidates = (AUTO_TEXT_MODEL_TYPE, AUTO_OCR_MODEL_TYPE) if model_type == AUTO_MODEL_TYPE else (model_type,)
+    cached_data = None
+    for candidate in candidates:
+        if await run_blocking(extraction_cache.contains, content_hash, candidate):
+            cached_data = await run_blocking(extraction_cache.get, content_hash, candidate)
+            break
+    if not cached_data or not cached_data.get("Email"):
+        return None
+
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(Resume.id).filter_by(email=cached_data.get("Email")))
+
 
-        # TODO: Save extracted_data into database using `db`
-        print("Extracted Data Successfully")  # Debugging
+async def _check_duplicate(content_hash: str, model_type: str) -> Optional[Dict[str, Any]]:
+    """
+    Detects uploads that need no extraction because the same bytes are already
+    being processed or were already ingested with this model type.
+    """
+    if (content_hash, model_type) in _inflight_extractions:
+        return {"status": "duplicate", "resume_id": None, "message": "An identical resume is already being processed."}
+
+    resume_id = await _find_ingested_resume(content_hash, model_type)
+    if resume_id is not None:
+        return {"status": "duplicate", "resume_id": resume_id, "message": "This resume has already been processed."}
+    return None
+
+
+async def _write_traces(rows: List[Dict[str, Any]]) -> None:
+    """Inserts a batch of ingestion trace rows in one statement."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(IngestionTrace), rows)
+        await db.commit()
+
+# Ingestion traces are buffered and written in batches off the ingestion path
+trace_writer = TraceWriter(_write_traces)
+
+
+async def _ingest_resume(file_path: str, model_type: str, content_hash: Optional[str] = None,
+                         file_name: Optional[str] = None, embed: EmbedFunction = store_embedding_async) -> int:
+    """
+    Runs the ingestion pipeline for one resume and records its trace.
+
+    Stage durations, token usage, retries and the outcome are collected while
+    the pipeline runs and handed to the trace writer, whether it succeeds or not.
+    """
+    start_time = time.perf_counter()
+    resume_id, error = None, None
+    with collect_stages() as timings:
+        try:
+            resume_id = await _run_ingestion_pipeline(file_path, model_type, content_hash, embed)
+            return resume_id
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            raise
+        finally:
+            trace_writer.record(build_trace(
+                content_hash, model_type, timings, time.perf_counter() - start_time,
+                resume_id=resume_id, error=error, file_name=file_name,
+            ))
+
+
+async def _run_ingestion_pipeline(file_path: str, model_type: str, content_hash: Optional[str] = None,
+                                  embed: EmbedFunction = store_embedding_async) -> int:
+    """
+    Runs extraction, storage and embedding for a single resume file.
+
+    The pipeline opens its own database session, so it is safe to run as a
+    background task after the request that scheduled it has finished.
+
+    Args:
+        file_path (str): Path to the PDF resume.
+        model_type (str): Model to use (one of MODEL_TYPES, e.g. 'gpt_fitz' or 'auto').
+        content_hash (str, optional): SHA-256 of the PDF bytes, if already known.
+        embed (EmbedFunction, optional): Stores the resume embedding.
+
+    Returns:
+        int: The stored resume ID.
 
+    Raises:
+        RuntimeError: If any stage of the pipeline fails.
+    """
+    # Resolve 'auto' here so the resume records the extractor that actually ran
+    if model_type == AUTO_MODEL_TYPE:
+        model_type = await resolve_model_type_async(file_path)
+
+    # Call your function to extract structured data from the PDF
+    print("Extracting information from pdf")
+    extracted_data = await extract_resume_data_async(file_path,model_type,content_hash)
+    if "error" in extracted_data:
+        raise RuntimeError(f"Extraction failed: {extracted_data['error']}")
+    extracted_data['model_type']=model_type
+    if not extracted_data.get("Name"):
+        # name is NOT NULL; fail with a clear message instead of an integrity error
+        raise RuntimeError(
+            f"Extraction with model type '{model_type}' found no candidate name. "
+            f"Retry with an LLM-backed model type such as 'gpt_fitz' or a hybrid one."
+        )
+
+    print("Extracted Data Successfully")  # Debugging
+
+    async with AsyncSessionLocal() as db:
         print("Saving extracted data in the database table")
-        id=store_resume_data(extracted_data,db)
+        with stage(DB_UPSERT):
+            id=await store_resume_data(extracted_data,db)
+        if id is None:
+            raise RuntimeError("Failed to store resume data")
 
         formatted_text = _prepare_generation_text(extracted_data)
 
-        _store_resume_embedding(formatted_text,id,db)
+        if not await _store_resume_embedding(formatted_text,id,db,embed):
+            raise RuntimeError("Failed to store resume embedding")
+        return id
 
+
+async def _process_resume_extraction(file_path: str, model_type: str, content_hash: Optional[str] = None,
+                                     file_name: Optional[str] = None):
+    """Background task to process the uploaded resume and extract data."""
+    try:
+        await _ingest_resume(file_path, model_type, content_hash, file_name)
     except Exception as e:
         print(f"Error processing resume: {str(e)}")
+    finally:
+        _inflight_extractions.discard((content_hash, model_type))
+
+
+async def _process_bulk_batch(batch_id: str, jobs: List[tuple], model_type: str):
+    """
+    Background task that fans a batch of stored PDFs out to the ingestion
+    pipeline with at most BULK_INGEST_CONCURRENCY files in flight. Embeddings
+    of files finishing close together are stored in shared batch requests.
+    """
+    semaphore = asyncio.Semaphore(BULK_INGEST_CONCURRENCY)
+    lookahead = BULK_INGEST_CONCURRENCY if model_type in OCR_PREFETCH_MODEL_TYPES else 0
+
+    async def prefetch(index: int):
+        # OCR the file that will take a free slot next while this one is structured by the chat model
+        if index < len(jobs):
+            upload = jobs[index][1]
+            if not await run_blocking(extraction_cache.contains, upload.content_hash, model_type):
+                prefetch_ocr(upload.path)
+
+    async def ingest(index: int, position: int, upload, file_name: str):
+        async with semaphore:
+            batch_registry.update_file(batch_id, position, status="processing")
+            start_time = time.time()
+            if lookahead:
+                await prefetch(index + lookahead)
+            try:
+                resume_id = await _ingest_resume(
+                    upload.path, model_type, upload.content_hash, file_name, embed=embedding_batcher.store
+                )
+                batch_registry.update_file(batch_id, position, status="done", resume_id=resume_id)
+            except Exception as e:
+                print(f"[❌] Bulk ingestion failed for {upload.path}: {e}")
+                batch_registry.update_file(batch_id, position, status="failed", error=str(e))
+            finally:
+                batch_registry.update_file(batch_id, position, duration=round(time.time() - start_time, 3))
+                _inflight_extractions.discard((upload.content_hash, model_type))
+                discard_prefetched_ocr(upload.path)
+
+    batch_registry.mark_started(batch_id)
+    await asyncio.gather(*(
+        ingest(index, position, upload, file_name) for index, (position, upload, file_name) in enumerate(jobs)
+    ))
+    batch_registry.mark_finished(batch_id)
+    print(f"[✅] Bulk batch {batch_id} finished with {len(jobs)} files processed")
+
+
+def _validate_model_type(model_type: str):
+    if model_type not in MODEL_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid model type: {model_type}. Choose one of {MODEL_TYPE_CHOICES}."
+        )
 
-    
 
 @router.post("/resume/", response_model=Dict[str, Any])
 async def upload_resume(
     model_type: str = Form(...),
     file: UploadFile = File(...),
     background_tasks: BackgroundTasks = BackgroundTasks(),
-    db: Session = Depends(get_db)
 ):
     """
     Upload a resume as a PDF file. The information will be extracted in the background.
     """
+    _validate_model_type(model_type)
+
     try:
-        # Save uploaded file
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Stream the upload to a content-addressed file while hashing it
+        with stage(UPLOAD_SAVE):
+            stored = await save_upload(file, UPLOAD_DIR)
+        print(f"Received resume: {file.filename}, saved at {stored.path}")
 
-        print(f"Received resume: {file.filename}, saved at {file_path}")
+        duplicate = await _check_duplicate(stored.content_hash, model_type)
+        if duplicate:
+            print(f"[⚠️] Duplicate upload {stored.content_hash[:12]}, skipping extraction")
+            return duplicate
 
         # Process the resume in the background
-        background_tasks.add_task(_process_resume_extraction, file_path, db, model_type)
+        _inflight_extractions.add((stored.content_hash, model_type))
+        background_tasks.add_task(
+            _process_resume_extraction, stored.path, model_type, stored.content_hash, file.filename
+        )
 
         return {
             "status": "processing",
             "message": "Your resume is being processed. This may take a few moments."
         }
     
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
     except Exception as e:
         print(f"Error uploading resume: {str(e)}")
         raise HTTPException(
@@ -295,134 +700,372 @@ async def upload_resume(
         )
     
 
-def get_travel_resume_by_id(db: Session, resume_id: int):
-    """
-    Fetches a resume from the database by ID.
+async def _count_bulk_files(files: List[UploadFile]) -> int:
+    """Counts the PDFs in a bulk upload, reading only the central directory of zip archives."""
+    count = 0
+    for file in files:
+        if is_zip_upload(file.filename, file.content_type):
+            count += await run_blocking(count_zip_pdfs, file.file)
+        else:
+            count += 1
+    return count
 
-    Parameters:
-    - db (Session): SQLAlchemy database session.
-    - resume_id (int): ID of the resume.
+
+async def _receive_bulk_files(files: List[UploadFile]) -> List[Tuple[str, Optional[StoredUpload], Optional[str]]]:
+    """
+    Stores every PDF of a bulk upload, unpacking zip archives.
 
     Returns:
-    - Resume: The matching travel resume object.
+        List[Tuple]: (file name, StoredUpload or None, error) for every received PDF.
+        If storing fails part-way, the files stored so far are deleted.
     """
+    received = []
     try:
-        resume = db.query(Resume).filter(Resume.id == resume_id).first()
-        
-        if resume:
-            print(f"[✅] Found Travel resume of :({resume.id})")
-            return resume
-        else:
-            print("[⚠️] No travel resume found for the given ID.")
-            return None
+        for file in files:
+            if is_zip_upload(file.filename, file.content_type):
+                entries = await run_blocking(
+                    extract_pdfs_from_zip, file.file, UPLOAD_DIR, len(received)
+                )
+                received.extend((entry["file_name"], entry["upload"], entry["error"]) for entry in entries)
+                continue
+
+            file_name = os.path.basename(file.filename or "resume.pdf")
+            try:
+                received.append((file_name, await save_upload(file, UPLOAD_DIR), None))
+            except UploadTooLargeError as e:
+                received.append((file_name, None, str(e)))
+    except Exception:
+        await run_blocking(remove_uploads, [upload for _, upload, _ in received if upload is not None])
+        raise
+    return received
+
+
+@router.post("/resume/bulk", response_model=Dict[str, Any])
+async def upload_resumes_bulk(
+    model_type: str = Form(...),
+    files: List[UploadFile] = File(...),
+    background_tasks: BackgroundTasks = BackgroundTasks(),
+):
+    """
+    Upload many PDF resumes, or zip archives of PDFs, in one request.
+    Files are processed in the background with bounded concurrency; poll the
+    returned batch ID for per-file status.
+    """
+    _validate_model_type(model_type)
 
+    try:
+        # Enforce the file limit before anything is stored or a batch is registered
+        if await _count_bulk_files(files) > BULK_MAX_FILES:
+            raise ValueError(f"Batch exceeds the {BULK_MAX_FILES} file limit")
+
+        received = await _receive_bulk_files(files)
+        batch_id = batch_registry.create(model_type)
+
+        jobs = []
+        rejected, duplicates = 0, 0
+        try:
+            for file_name, upload, error in received:
+                if upload is None:
+                    batch_registry.add_file(batch_id, file_name, None, error)
+                    rejected += 1
+                    continue
+
+                duplicate = await _check_duplicate(upload.content_hash, model_type)
+                if duplicate:
+                    duplicates += 1
+                    position = batch_registry.add_file(batch_id, file_name, upload.path, status="duplicate")
+                    batch_registry.update_file(batch_id, position, resume_id=duplicate["resume_id"])
+                    continue
+
+                _inflight_extractions.add((upload.content_hash, model_type))
+                jobs.append((batch_registry.add_file(batch_id, file_name, upload.path), upload, file_name))
+        except Exception as e:
+            # Nothing will process this batch: fail it and drop the files nobody references
+            batch_registry.mark_failed(batch_id, str(e))
+            for _, upload, _ in jobs:
+                _inflight_extractions.discard((upload.content_hash, model_type))
+            await run_blocking(remove_uploads, [upload for _, upload, _ in received if upload is not None])
+            raise
+
+        print(f"Received bulk batch {batch_id} with {len(jobs)} resumes")
+
+        # Process the batch in the background
+        background_tasks.add_task(_process_bulk_batch, batch_id, jobs, model_type)
+
+        return {
+            "status": "processing",
+            "batch_id": batch_id,
+            "accepted": len(jobs),
+            "duplicates": duplicates,
+            "rejected": rejected,
+            "message": "Your resumes are being processed. Poll the batch ID for progress."
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
-        print(f"[❌] Error fetching travel resume: {e}")
-        return None
+        print(f"Error uploading resume batch: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload resume batch: {str(e)}"
+        )
+
+
+@router.get("/resume/bulk/{batch_id}", response_model=Dict[str, Any])
+def get_bulk_batch_status(batch_id: str):
+    """
+    Retrieve per-file status and aggregate throughput of a bulk upload batch.
+    """
+    batch = batch_registry.get(batch_id)
+    if batch is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found"
+        )
+    return batch
+
+
+@router.get("/extraction-cache/stats", response_model=Dict[str, Any])
+def get_extraction_cache_stats():
+    """
+    Report hit/miss counters and size of the resume extraction cache.
+    """
+    return extraction_cache.stats()
+
+
+@router.get("/embedding-cache/stats", response_model=Dict[str, Any])
+def get_embedding_cache_stats():
+    """
+    Report memory/disk hit ratios of the embedding cache.
+    """
+    return embedding_cache.stats()
+
+
+@router.get("/prompt-cache/stats", response_model=Dict[str, Any])
+def get_prompt_cache_stats():
+    """
+    Report hit/miss counters of the search prompt extraction cache.
+    """
+    return prompt_info_cache.stats()
+
+
+@router.get("/ingestion-traces/stats", response_model=Dict[str, Any])
+def get_ingestion_trace_stats():
+    """
+    Report buffered, written and dropped counts of the ingestion trace writer.
+    """
+    return trace_writer.stats()
+
+
+TRACE_QUERY_MAX_LIMIT = 500
+
+def _trace_entry(trace: IngestionTrace) -> Dict[str, Any]:
+    return {
+        "id": trace.id,
+        "created_at": trace.created_at.isoformat() if trace.created_at else None,
+        "content_hash": trace.content_hash,
+        "file_name": trace.file_name,
+        "model_type": trace.model_type,
+        "resume_id": trace.resume_id,
+        "outcome": trace.outcome,
+        "error": trace.error,
+        "total_seconds": trace.total_seconds,
+        "stages": trace.stages,
+        "prompt_tokens": trace.prompt_tokens,
+        "completion_tokens": trace.completion_tokens,
+        "retries": trace.retries,
+        "routing": trace.routing,
+    }
+
+@router.get("/ingestion-traces/slowest", response_model=Dict[str, Any])
+async def get_slowest_ingestions(
+    limit: int = 20,
+    model_type: Optional[str] = None,
+    outcome: Optional[str] = None,
+    since_hours: Optional[float] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List the slowest recorded ingestions with their per-stage durations, token
+    counts, retries and errors, optionally per model type, outcome and time window.
+    """
+    try:
+        # Include traces still waiting in the writer's buffer
+        await trace_writer.flush()
+
+        query = (
+            select(IngestionTrace)
+            .order_by(IngestionTrace.total_seconds.desc(), IngestionTrace.id.desc())
+            .limit(max(1, min(limit, TRACE_QUERY_MAX_LIMIT)))
+        )
+        if model_type:
+            query = query.where(IngestionTrace.model_type == model_type)
+        if outcome:
+            query = query.where(IngestionTrace.outcome == outcome)
+        if since_hours:
+            query = query.where(IngestionTrace.created_at >= datetime.now(timezone.utc) - timedelta(hours=since_hours))
+
+        traces = (await db.execute(query)).scalars().all()
+        return {"count": len(traces), "results": [_trace_entry(trace) for trace in traces]}
+
+    except Exception as e:
+        print(f"Error querying ingestion traces: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error querying ingestion traces: {str(e)}"
+        )
+
+
+# Columns needed to build search responses
+SEARCH_RESULT_COLUMNS = (
+    Resume.id, Resume.name, Resume.email, Resume.phone_number, Resume.skills,
+    Resume.work_experience, Resume.education, Resume.certifications,
+    Resume.projects, Resume.gpa, Resume.model_type,
+)
+
+async def get_resumes_by_ids(db: AsyncSession, resume_ids: List[Any]) -> Tuple[List[Resume], List[int]]:
+    """
+    Fetches many resumes in a single `WHERE id IN (...)` query, preserving the given order.
+
+    Parameters:
+    - db (AsyncSession): SQLAlchemy database session.
+    - resume_ids (list): Resume IDs in ranking order (ints or numeric strings).
+
+    Returns:
+    - Tuple[List[Resume], List[int]]: The resumes found, in the input order,
+      and the IDs that no longer exist in the database.
+    """
+    ordered_ids = list(dict.fromkeys(int(resume_id) for resume_id in resume_ids))
+    if not ordered_ids:
+        return [], []
+
+    rows = (await db.execute(
+        select(Resume)
+        .options(load_only(*SEARCH_RESULT_COLUMNS))
+        .where(Resume.id.in_(ordered_ids))
+    )).scalars().all()
+    rows_by_id = {row.id: row for row in rows}
+
+    resumes = [rows_by_id[resume_id] for resume_id in ordered_ids if resume_id in rows_by_id]
+    missing_ids = [resume_id for resume_id in ordered_ids if resume_id not in rows_by_id]
+    print(f"[✅] Found {len(resumes)} of {len(ordered_ids)} matched resumes")
+    return resumes, missing_ids
+
+
+# Hybrid ranking settings from environment variables
+SEARCH_CANDIDATE_POOL = int(os.getenv("SEARCH_CANDIDATE_POOL", "50"))
+SEARCH_VECTOR_WEIGHT = float(os.getenv("SEARCH_VECTOR_WEIGHT", "0.6"))
+SEARCH_MAX_TOP_K = int(os.getenv("SEARCH_MAX_TOP_K", "100"))
+
+def _keyword_query(user_prompt: str, prompt_info: Dict[str, Any]) -> str:
+    """Combines the raw prompt with the fields the LLM extracted from it."""
+    extracted = [field_text(value) for key, value in prompt_info.items() if key != "gpa"]
+    return " ".join([user_prompt, *extracted])
+
+def rank_hybrid(vector_matches: List[Tuple[Any, float]], keyword_scores: Dict[int, float]) -> List[Dict[str, Any]]:
+    """
+    Fuses vector similarity and BM25 scores into one ranking.
+
+    Each score is scaled by its best value in the candidate set, then combined
+    as SEARCH_VECTOR_WEIGHT * vector + (1 - SEARCH_VECTOR_WEIGHT) * keyword.
+    Candidates found by only one retriever score 0 on the other.
+
+    Parameters:
+    - vector_matches (list): (resume id, cosine similarity) pairs from the vector store.
+    - keyword_scores (dict): Resume id to BM25 score.
+
+    Returns:
+    - list: {"resume_id", "score", "vector_score", "keyword_score"} dicts, best
+      first. The component scores are the raw cosine similarity and BM25 score,
+      None when that retriever did not return the resume.
+    """
+    vector_scores = {}
+    for resume_id, score in vector_matches:
+        resume_id = int(resume_id)
+        vector_scores[resume_id] = max(score, vector_scores.get(resume_id, score))
+
+    max_vector = max(vector_scores.values(), default=0.0)
+    max_keyword = max(keyword_scores.values(), default=0.0)
+
+    ranked = []
+    for resume_id in set(vector_scores) | set(keyword_scores):
+        vector_part = vector_scores.get(resume_id, 0.0) / max_vector if max_vector > 0 else 0.0
+        keyword_part = keyword_scores.get(resume_id, 0.0) / max_keyword if max_keyword > 0 else 0.0
+        ranked.append({
+            "resume_id": resume_id,
+            "score": SEARCH_VECTOR_WEIGHT * vector_part + (1 - SEARCH_VECTOR_WEIGHT) * keyword_part,
+            "vector_score": vector_scores.get(resume_id),
+            "keyword_score": keyword_scores.get(resume_id),
+        })
+
+    ranked.sort(key=lambda candidate: (-candidate["score"], candidate["resume_id"]))
+    return ranked
+
+
+async def _vector_candidates(user_prompt: str, top_k: int):
+    """Embeds the prompt and returns scored vector matches (None or -1 as in match_embeddings)."""
+    # Generate tags from user prompt # Is this the best method?
+    print(f"Generating embeddings from user prompt: {user_prompt}")
+    user_embeddings = await generate_embeddings_async(user_prompt)
+
+    # Pull a wide candidate set from the vector store for hybrid rescoring
+    print("Comparing against vector database")
+    return await match_embeddings_with_scores_async(user_embeddings, top_k)
+
+
+@router.get("/search-index/stats", response_model=Dict[str, Any])
+def get_search_index_stats():
+    """
+    Report size of the in-memory keyword search index.
+    """
+    return search_index.stats()
 
 
 @router.post("/search-resume/")
-async def process_resume_search_rag(request: SearchRequest, db: Session = Depends(get_db)):
+async def process_resume_search_rag(
+    request: SearchRequest,
+    background_tasks: BackgroundTasks = BackgroundTasks(),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Process a resume search request and send results by email.
+    Rank resumes against a search prompt and return one page of the shortlist.
+
+    Each result carries its fused score plus the raw vector similarity and
+    BM25 score. With `stream=true` the response is NDJSON: a preliminary page
+    ranked on the raw prompt is sent as soon as the vector lookup returns,
+    followed by the final page once the extracted prompt info is folded in.
     """
+    top_k = max(1, min(request.top_k, SEARCH_MAX_TOP_K))
+    offset = max(0, request.offset)
+    pool_size = max(SEARCH_CANDIDATE_POOL, offset + top_k)
+
+    if request.stream:
+        return StreamingResponse(
+            _stream_search(request, top_k, offset, pool_size, background_tasks),
+            media_type="application/x-ndjson",
+        )
 
     try:
             
-        # Generate tags from user prompt # Is this the best method?
-        print(f"Generating embeddings from user prompt: {request.user_prompt}")
-        user_embeddings = generate_embeddings(request.user_prompt)
-        
-        # Match tags against shortlisted tours
-        print("Comparing against pinecone database")
-        matched_result_ids = match_embeddings(user_embeddings)
+        # Extract relevant info from user prompt while the vector lookup runs
+        vector_matches, extracted_prompt_info = await asyncio.gather(
+            _vector_candidates(request.user_prompt, pool_size),
+            extract_prompt_info_async(request.user_prompt),
+        )
         
-        if not matched_result_ids:
+        if vector_matches == -1:
+            raise RuntimeError("Vector search failed")
+
+        ranked = await _rank_search_candidates(
+            request.user_prompt, extracted_prompt_info, vector_matches, pool_size, request.min_score
+        )
+        if not ranked:
             print("No suitable matches found after tag matching")
-            return {"message": "No suitable matches found for your preferences"}
-        
-        # Fetch all matched travel resume from DB
-        matched_resume = [get_travel_resume_by_id(db, match_id) for match_id in matched_result_ids]
-
-        # Convert matched resume to ResumeCreate objects
-        resume_objects = []
-        for resume in matched_resume:
-            resume_data = {
-                "name": resume.name,
-                "email": resume.email,
-                "phone_number": resume.phone_number,
-                "skills": resume.skills,
-                "work_experience": resume.work_experience,
-                "education": resume.education,
-                "certifications": resume.certifications,
-                "projects": resume.projects,
-                "gpa": resume.gpa,
-                "model_type": resume.model_type
-            }
-            resume_objects.append(ResumeCreate(**resume_data))
-        
-            # Extract relevant info from user prompt
-            extracted_prompt_info = extract_prompt_info(request.user_prompt)
-
-            # Query extracted user prompt information against resumes
-            print("Quering against the user prompt with specificty")
-            matching_resumes = []
-            for resume in resume_objects:
-                match_score = 0
-                
-                if extracted_prompt_info.get("skills"):
-                    for i in resume.skills:
-                        if isinstance(resume.skills[i], list):
-                            match_score += len(set(extracted_prompt_info["skills"]) & set(resume.skills[i]))
-                        else:
-                            match_score += len(set(extracted_prompt_info["skills"]) & set([resume.skills[i]]))
-                
-                if extracted_prompt_info.get("work_experience"):
-                    for i in resume.work_experience:
-                        for e in i:
-                            if isinstance(i[e], list):
-                                match_score += len(set(extracted_prompt_info["work_experience"]) & set(i[e]))
-                            else:
-                                match_score += len(set(extracted_prompt_info["work_experience"]) & set([i[e]]))
-                
-                if extracted_prompt_info.get("education"):
-                    for i in resume.education:
-                        for e in i:
-                            if isinstance(i[e], list):
-                                match_score += len(set(extracted_prompt_info["education"]) & set(i[e]))
-                            else:
-                                match_score += len(set(extracted_prompt_info["education"]) & set([i[e]]))
-                
-                if extracted_prompt_info.get("certifications"):
-                    for i in resume.certifications:
-                        for e in i:
-                            if isinstance(i[e], list):
-                                match_score += len(set(extracted_prompt_info["certifications"]) & set(i[e]))
-                            else:
-                                match_score += len(set(extracted_prompt_info["certifications"]) & set([i[e]]))
-                
-                if extracted_prompt_info.get("projects"):
-                    for i in resume.projects:
-                        for e in i:
-                            if isinstance(i[e], list):
-                                match_score += len(set(extracted_prompt_info["projects"]) & set(i[e]))
-                            else:
-                                match_score += len(set(extracted_prompt_info["projects"]) & set([i[e]]))
-
-                    
-                if extracted_prompt_info.get("gpa") and resume.gpa:
-                    match_score += 1 if int(extracted_prompt_info["gpa"]) >= int(resume.gpa) else 0
-                
-                print("match_score :",match_score)
-                matching_resumes.append((match_score, resume))
-
-            # Sort resumes by highest match score
-            matching_resumes.sort(reverse=True, key=lambda x: x[0])
-
-            # Return best-matching resumes
-            print("Reume with best match -> email:",matching_resumes[0][1].email)
-            return matching_resumes[0][1]
         
+        results = await _search_page(db, ranked, offset, top_k, background_tasks)
+        print(f"[✅] Returning {len(results)} of {len(ranked)} ranked resumes from offset {offset}")
+        return _page_summary(ranked, offset, top_k, results)
+    
     except Exception as e:
         print(f"Error processing search request: {str(e)}")
         raise HTTPException(
@@ -431,6 +1074,325 @@ async def process_resume_search_rag(request: SearchRequest, db: Session = Depend
         )
 
 
+async def _rank_search_candidates(user_prompt: str, prompt_info: Optional[Dict[str, Any]], vector_matches,
+                                  pool_size: int, min_score: float) -> List[Dict[str, Any]]:
+    """Fuses the vector matches with BM25 on the prompt (and its extracted info) and applies min_score."""
+    if not search_index.built:
+        await run_blocking(rebuild_search_index)
+
+    # Fuse vector similarity with BM25 over the structured resume fields
+    print("Rescoring candidates against the user prompt with BM25")
+    keyword_query = _keyword_query(user_prompt, prompt_info) if prompt_info else user_prompt
+    with stage(RESCORE):
+        ranked = rank_hybrid(vector_matches or [], search_index.score(keyword_query, top_k=pool_size))
+    return [candidate for candidate in ranked if candidate["score"] >= min_score]
+
+
+def _result_entry(rank: int, candidate: Optional[Dict[str, Any]], resume: Resume) -> Dict[str, Any]:
+    """Serializes one ranked resume with its scores."""
+    def rounded(key):
+        return round(candidate[key], 4) if candidate and candidate[key] is not None else None
+
+    return {
+        "rank": rank,
+        "score": rounded("score"),
+        "vector_score": rounded("vector_score"),
+        "keyword_score": rounded("keyword_score"),
+        "resume": ResumeResponse.model_validate(resume, from_attributes=True).model_dump(),
+    }
+
+
+async def _search_page(db: AsyncSession, ranked: List[Dict[str, Any]], offset: int, top_k: int,
+                       background_tasks: BackgroundTasks) -> List[Dict[str, Any]]:
+    """
+    Loads one page of ranked candidates from the database in a single query.
+
+    Candidates whose rows were deleted are dropped from the page and their
+    vectors are queued for removal after the response is sent.
+    """
+    page = ranked[offset:offset + top_k]
+    if not page:
+        return []
+
+    with stage(DB_FETCH):
+        resumes, missing_ids = await get_resumes_by_ids(db, [candidate["resume_id"] for candidate in page])
+
+    # Vectors and index entries pointing at deleted rows are removed after the response is sent
+    if missing_ids:
+        print(f"[⚠️] Matched vectors for deleted resumes: {missing_ids}")
+        for resume_id in missing_ids:
+            search_index.remove(resume_id)
+        queue_stale_vectors(missing_ids)
+        background_tasks.add_task(purge_stale_vectors_async)
+
+    candidates = {candidate["resume_id"]: candidate for candidate in page}
+    ranks = {candidate["resume_id"]: offset + position + 1 for position, candidate in enumerate(page)}
+    return [_result_entry(ranks[resume.id], candidates[resume.id], resume) for resume in resumes]
+
+
+def _page_summary(ranked: List[Dict[str, Any]], offset: int, top_k: int, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    next_offset = offset + top_k
+    return {
+        "total": len(ranked),
+        "offset": offset,
+        "top_k": top_k,
+        "next_offset": next_offset if next_offset < len(ranked) else None,
+        "results": results,
+    }
+
+
+async def _stream_search(request: SearchRequest, top_k: int, offset: int, pool_size: int,
+                         background_tasks: BackgroundTasks):
+    """
+    Yields NDJSON lines for a streamed search.
+
+    Lines are {"type": "page", "phase", "total", "offset", "top_k", "next_offset"}
+    followed by one {"type": "result", "phase", ...} per resume. The
+    "preliminary" phase is skipped when the prompt info is already available,
+    and the stream always ends with {"type": "done"} or {"type": "error"}.
+    The stream outlives the request dependencies, so it opens its own session.
+    """
+    def line(payload: Dict[str, Any]) -> bytes:
+        return (json.dumps(payload, default=str) + "\n").encode("utf-8")
+
+    prompt_task = asyncio.create_task(extract_prompt_info_async(request.user_prompt))
+    try:
+        async with AsyncSessionLocal() as db:
+            vector_matches = await _vector_candidates(request.user_prompt, pool_size)
+            if vector_matches == -1:
+                raise RuntimeError("Vector search failed")
+
+            phases = []
+            if not prompt_task.done():
+                phases.append(("preliminary", None))
+            phases.append(("final", prompt_task))
+
+            for phase, task in phases:
+                prompt_info = await task if task is not None else None
+                ranked = await _rank_search_candidates(
+                    request.user_prompt, prompt_info, vector_matches, pool_size, request.min_score
+                )
+                results = await _search_page(db, ranked, offset, top_k, background_tasks)
+                summary = _page_summary(ranked, offset, top_k, results)
+                summary.pop("results")
+                yield line({"type": "page", "phase": phase, **summary})
+                for result in results:
+                    yield line({"type": "result", "phase": phase, **result})
+
+        yield line({"type": "done"})
+    except Exception as e:
+        print(f"Error streaming search results: {str(e)}")
+        yield line({"type": "error", "detail": f"Error processing search request: {str(e)}"})
+    finally:
+        if not prompt_task.done():
+            prompt_task.cancel()
+
+
+FILTER_CANDIDATE_POOL = int(os.getenv("FILTER_CANDIDATE_POOL", "200"))
+
+def _apply_resume_filters(query, filters: ResumeFilters):
+    """
+    Adds the structured filters to a Resume select statement as SQL conditions.
+
+    Skill filters use JSONB containment/existence on `skill_tags` and nested
+    field filters use containment on the JSONB columns, so Postgres answers
+    them from the GIN indexes instead of scanning every row.
+    """
+    if filters.skills_all:
+        query = query.where(Resume.skill_tags.contains(skill_tags(filters.skills_all)))
+    if filters.skills_any:
+        query = query.where(Resume.skill_tags.has_any(array(skill_tags(filters.skills_any))))
+    if filters.min_gpa is not None:
+        query = query.where(Resume.gpa_value >= filters.min_gpa)
+    if filters.max_gpa is not None:
+        query = query.where(Resume.gpa_value <= filters.max_gpa)
+    if filters.model_types:
+        query = query.where(Resume.model_type.in_(filters.model_types))
+    if filters.education_contains:
+        query = query.where(Resume.education.contains([filters.education_contains]))
+    if filters.work_experience_contains:
+        query = query.where(Resume.work_experience.contains([filters.work_experience_contains]))
+    return query
+
+
+async def filter_resumes(db: AsyncSession, filters: ResumeFilters, candidate_ids: Optional[List[int]] = None,
+                         limit: Optional[int] = None) -> List[Resume]:
+    """
+    Runs the structured filters in Postgres, optionally restricted to ranked candidates.
+
+    Parameters:
+    - db (AsyncSession): SQLAlchemy database session.
+    - filters (ResumeFilters): Structured filters.
+    - candidate_ids (list, optional): Ranked resume IDs to intersect with. Their order is kept.
+    - limit (int, optional): Maximum number of resumes to return.
+
+    Returns:
+    - list: Matching resumes. Without candidates they are ordered by GPA, best first.
+    """
+    query = _apply_resume_filters(
+        select(Resume).options(load_only(*SEARCH_RESULT_COLUMNS, Resume.gpa_value)), filters
+    )
+
+    if candidate_ids is None:
+        query = query.order_by(Resume.gpa_value.desc().nullslast(), Resume.id).limit(limit)
+        return list((await db.execute(query)).scalars().all())
+
+    if not candidate_ids:
+        return []
+    rows = (await db.execute(query.where(Resume.id.in_(candidate_ids)))).scalars().all()
+    rows_by_id = {row.id: row for row in rows}
+    resumes = [rows_by_id[resume_id] for resume_id in candidate_ids if resume_id in rows_by_id]
+    return resumes[:limit] if limit is not None else resumes
+
+
+@router.post("/search-resume/filter", response_model=Dict[str, Any])
+async def search_resumes_with_filters(request: FilteredSearchRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Search resumes by structured filters, optionally ranked by a free-text prompt.
+
+    With a prompt, the hybrid vector + keyword candidates are intersected with
+    the filters in a single query. Without one, the filters alone select the
+    resumes, best GPA first.
+    """
+    try:
+        top_k = max(1, min(request.top_k, FILTER_CANDIDATE_POOL))
+        candidates = {}
+        candidate_ids = None
+
+        if request.user_prompt:
+            vector_matches = await _vector_candidates(request.user_prompt, FILTER_CANDIDATE_POOL)
+            if vector_matches == -1:
+                raise RuntimeError("Vector search failed")
+            with stage(RESCORE):
+                ranked = rank_hybrid(
+                    vector_matches or [],
+                    search_index.score(request.user_prompt, top_k=FILTER_CANDIDATE_POOL),
+                )
+            candidates = {candidate["resume_id"]: candidate for candidate in ranked}
+            candidate_ids = [candidate["resume_id"] for candidate in ranked]
+
+        with stage(DB_FETCH):
+            resumes = await filter_resumes(db, request.filters, candidate_ids, top_k)
+        print(f"[✅] Filtered search returned {len(resumes)} resumes")
+
+        return {
+            "count": len(resumes),
+            "results": [
+                _result_entry(rank, candidates.get(resume.id), resume)
+                for rank, resume in enumerate(resumes, start=1)
+            ],
+        }
+
+    except Exception as e:
+        print(f"Error processing filtered search request: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing filtered search request: {str(e)}"
+        )
+
+
+FACET_GROUPS = ("category", "model_type", "degree")
+FACET_MAX_LIMIT = 1000
+
+def _skill_facet_query(group_by: Optional[str]):
+    """
+    Builds the per-skill resume count select for a facet grouping.
+
+    Returns:
+        Tuple: (select, group column or None, count column).
+    """
+    resume_count = func.count(distinct(ResumeSkill.resume_id)).label("count")
+    if group_by == "category":
+        group = ResumeSkill.category
+        query = select(ResumeSkill.skill_norm, group, resume_count)
+    elif group_by == "model_type":
+        group = Resume.model_type
+        query = select(ResumeSkill.skill_norm, group, resume_count).join(Resume, Resume.id == ResumeSkill.resume_id)
+    elif group_by == "degree":
+        # Lax-mode "$[*]" yields each education entry, or the value itself when it is not a list.
+        # render_derived emits the "AS alias(entry)" column list Postgres needs to expose `entry`.
+        entries = (
+            func.jsonb_path_query(Resume.education, literal_column("'$[*]'::jsonpath"))
+            .table_valued(column("entry", JSONB))
+            .render_derived(with_types=False)
+            .lateral()
+        )
+        group = func.coalesce(entries.c.entry["Degree"].astext, entries.c.entry["degree"].astext)
+        query = (
+            select(ResumeSkill.skill_norm, group, resume_count)
+            .join(Resume, Resume.id == ResumeSkill.resume_id)
+            .join(entries, true())
+        )
+    else:
+        group = None
+        query = select(ResumeSkill.skill_norm, resume_count)
+    return query, group, resume_count
+
+
+async def compute_skill_facets(db: AsyncSession, request: FacetRequest) -> Dict[str, Any]:
+    """
+    Counts resumes per normalized skill over a filtered result set in one query.
+
+    The result set is the resumes matching `request.filters`, optionally
+    narrowed to `request.resume_ids`. Counts come from the resume_skill table,
+    optionally split by skill category, extraction model or education degree.
+
+    Parameters:
+    - db (AsyncSession): SQLAlchemy database session.
+    - request (FacetRequest): Result set, skills of interest, grouping and limit.
+
+    Returns:
+    - dict: {"total", "group_by", "facets": [{"skill", "group", "count"}]}, most common first.
+    """
+    result_set = _apply_resume_filters(select(Resume.id), request.filters)
+    if request.resume_ids is not None:
+        result_set = result_set.where(Resume.id.in_(request.resume_ids))
+    result_ids = result_set.subquery()
+    total = await db.scalar(select(func.count()).select_from(result_ids))
+
+    query, group, resume_count = _skill_facet_query(request.group_by)
+    query = query.where(ResumeSkill.resume_id.in_(select(result_ids.c.id)))
+    if request.skills:
+        query = query.where(ResumeSkill.skill_norm.in_([normalize_skill(skill) for skill in request.skills]))
+
+    group_columns = [ResumeSkill.skill_norm] + ([group] if group is not None else [])
+    rows = (await db.execute(
+        query.group_by(*group_columns)
+        .order_by(resume_count.desc(), ResumeSkill.skill_norm)
+        .limit(max(1, min(request.limit, FACET_MAX_LIMIT)))
+    )).all()
+
+    return {
+        "total": total,
+        "group_by": request.group_by,
+        "facets": [
+            {"skill": row[0], "group": row[1] if group is not None else None, "count": row[-1]}
+            for row in rows
+        ],
+    }
+
+
+@router.post("/search-resume/facets", response_model=Dict[str, Any])
+async def get_skill_facets(request: FacetRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Return resume counts per skill for a filtered result set, optionally grouped.
+    """
+    if request.group_by is not None and request.group_by not in FACET_GROUPS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid group_by: {request.group_by}. Choose one of {', '.join(FACET_GROUPS)}."
+        )
+
+    try:
+        return await compute_skill_facets(db, request)
+    except Exception as e:
+        print(f"Error computing skill facets: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing skill facets: {str(e)}"
+        )
+
+
 
 
 '''@router.post("/search-resume/")
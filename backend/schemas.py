@@ -3,7 +3,7 @@ from typing import List, Optional, Dict, Any
 
 class ResumeBase(BaseModel):
     name: str
-    email: str
+    email: Optional[str]
     phone_number: Optional[str]
     skills: Dict[str, Any]
     work_experience: Optional[List[Dict[str, Any]]]
@@ -18,11 +18,36 @@ class ResumeCreate(ResumeBase):
 
 class ResumeResponse(ResumeBase):
     id: int
+    gpa_value: Optional[float] = None
     
     class Config:
         orm_mode = True
 
 class SearchRequest(BaseModel):
     user_prompt: str
+    top_k: int = 10  # Page size
+    offset: int = 0  # Rank to start from; use next_offset from the previous page
+    min_score: float = 0.0  # Drop candidates whose fused score is below this (0 to 1)
+    stream: bool = False  # Stream NDJSON instead of returning one JSON document
 
 
+class ResumeFilters(BaseModel):
+    skills_all: List[str] = []  # Resume must list every one of these skills
+    skills_any: List[str] = []  # Resume must list at least one of these skills
+    min_gpa: Optional[float] = None  # On a 4.0 scale
+    max_gpa: Optional[float] = None
+    model_types: List[str] = []
+    education_contains: Optional[Dict[str, Any]] = None  # e.g. {"Degree": "MSc"}
+    work_experience_contains: Optional[Dict[str, Any]] = None  # e.g. {"Company": "Google"}
+
+class FilteredSearchRequest(BaseModel):
+    user_prompt: Optional[str] = None  # Ranks the filtered resumes when given
+    filters: ResumeFilters = ResumeFilters()
+    top_k: int = 10
+
+class FacetRequest(BaseModel):
+    filters: ResumeFilters = ResumeFilters()  # Defines the result set to aggregate over
+    resume_ids: Optional[List[int]] = None  # Further restrict to these resumes
+    skills: List[str] = []  # Only count these skills; all skills when empty
+    group_by: Optional[str] = None  # "category", "model_type" or "degree"
+    limit: int = 50
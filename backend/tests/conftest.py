@@ -0,0 +1,21 @@
+import os
+import sys
+
+# The backend runs from this directory (`uvicorn main:app`), so its modules import as `utils.*`
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Keep the module-level caches created on import out of the working tree
+_TEST_CACHE_DIR = os.path.join(BACKEND_DIR, ".pytest_cache", "backend")
+os.environ.setdefault("EXTRACTION_CACHE_DIR", os.path.join(_TEST_CACHE_DIR, "extractions"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(_TEST_CACHE_DIR, "embeddings.sqlite3"))
+os.environ.setdefault("LOCAL_VECTOR_STORE_PATH", os.path.join(_TEST_CACHE_DIR, "vector_store"))
+# Importing main selects the vector store; the local one needs no network
+os.environ.setdefault("VECTOR_STORE_BACKEND", "local")
+# database.py builds its engines on import; nothing connects unless a test opens a session
+for _name, _value in {"POSTGRES_USER": "test", "POSTGRES_PASSWORD": "test", "POSTGRES_HOST": "localhost",
+                      "POSTGRES_PORT": "5432", "POSTGRES_DB": "resume_test"}.items():
+    os.environ.setdefault(_name, _value)
+# The extractor modules refuse to import without keys; tests never reach the APIs
+os.environ.setdefault("OPENAI_API_KEY", "test-openai-key")
+os.environ.setdefault("MISTRAL_API_KEY", "test-mistral-key")
@@ -0,0 +1,74 @@
+import io
+import zipfile
+
+from utils.bulk_ingest import BatchRegistry, count_zip_pdfs, extract_pdfs_from_zip, is_zip_upload
+
+
+def test_tracks_file_status_and_counts():
+    registry = BatchRegistry(max_batches=10)
+    batch_id = registry.create("gpt_fitz")
+    first = registry.add_file(batch_id, "a.pdf", "uploads/a.pdf")
+    registry.add_file(batch_id, "b.pdf", None, error="Too large")
+    registry.mark_started(batch_id)
+    registry.update_file(batch_id, first, status="done", resume_id=7)
+
+    batch = registry.get(batch_id)
+    assert batch["status"] == "processing"
+    assert batch["counts"] == {"queued": 0, "processing": 0, "done": 1, "failed": 1, "duplicate": 0}
+    assert batch["files"][0]["resume_id"] == 7
+    assert "path" not in batch["files"][0]
+
+    registry.mark_finished(batch_id)
+    assert registry.get(batch_id)["status"] == "completed"
+
+
+def test_updates_to_evicted_batches_are_ignored():
+    registry = BatchRegistry(max_batches=1)
+    old = registry.create("gpt_fitz")
+    registry.create("gpt_fitz")
+
+    assert registry.get(old) is None
+    assert registry.add_file(old, "a.pdf", "uploads/a.pdf") == -1
+    registry.update_file(old, 0, status="done")
+    registry.mark_started(old)
+    registry.mark_finished(old)
+    assert registry.get("unknown") is None
+
+
+def test_evicts_finished_batches_before_running_ones():
+    registry = BatchRegistry(max_batches=2)
+    running = registry.create("gpt_fitz")
+    finished = registry.create("gpt_fitz")
+    registry.mark_finished(finished)
+    registry.create("gpt_fitz")
+
+    assert registry.get(running) is not None
+    assert registry.get(finished) is None
+
+
+def test_extracts_pdfs_from_zip(tmp_path):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("nested/dir/resume.pdf", b"%PDF-1.4 resume")
+        zf.writestr("notes.txt", b"ignored")
+    archive.seek(0)
+
+    assert count_zip_pdfs(archive) == 1
+    entries = extract_pdfs_from_zip(archive, str(tmp_path), 0)
+    assert [entry["file_name"] for entry in entries] == ["resume.pdf"]
+    assert entries[0]["error"] is None and entries[0]["upload"] is not None
+    assert is_zip_upload("batch.ZIP", None) and not is_zip_upload("a.pdf", "application/pdf")
+
+
+def test_mark_failed_fails_pending_files_and_finishes_the_batch():
+    registry = BatchRegistry(max_batches=10)
+    batch_id = registry.create("gpt_fitz")
+    registry.add_file(batch_id, "a.pdf", "uploads/a.pdf")
+    registry.add_file(batch_id, "b.pdf", "uploads/b.pdf", status="duplicate")
+
+    registry.mark_failed(batch_id, "database unavailable")
+
+    batch = registry.get(batch_id)
+    assert batch["status"] == "completed"
+    assert batch["counts"]["failed"] == 1 and batch["counts"]["duplicate"] == 1
+    assert batch["files"][0]["error"] == "database unavailable"
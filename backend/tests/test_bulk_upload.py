@@ -0,0 +1,78 @@
+import asyncio
+import io
+import os
+import zipfile
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException, UploadFile
+
+import routes.resume as resume_routes
+from utils.bulk_ingest import batch_registry
+
+
+def _zip(*names):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for name in names:
+            zf.writestr(name, f"%PDF-1.4 {name}".encode())
+    archive.seek(0)
+    return UploadFile(archive, filename="batch.zip")
+
+
+def _pdf(name):
+    return UploadFile(io.BytesIO(f"%PDF-1.4 {name}".encode()), filename=name)
+
+
+def _upload(files):
+    background_tasks = BackgroundTasks()
+    result = asyncio.run(resume_routes.upload_resumes_bulk("gpt_fitz", files, background_tasks))
+    return result, background_tasks
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(resume_routes, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(resume_routes, "BULK_MAX_FILES", 3)
+    return tmp_path
+
+
+def test_oversized_batch_is_rejected_before_storing_or_registering(upload_dir):
+    batches = len(batch_registry._batches)
+
+    with pytest.raises(HTTPException) as error:
+        _upload([_pdf("a.pdf"), _zip("b.pdf", "c.pdf", "notes.txt", "d.pdf")])
+
+    assert error.value.status_code == 400
+    assert len(batch_registry._batches) == batches
+    assert os.listdir(str(upload_dir)) == []
+
+
+def test_failed_registration_fails_the_batch_and_removes_uploads(upload_dir, monkeypatch):
+    async def broken_duplicate_check(content_hash, model_type):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(resume_routes, "_check_duplicate", broken_duplicate_check)
+
+    with pytest.raises(HTTPException) as error:
+        _upload([_pdf("a.pdf"), _zip("b.pdf")])
+
+    assert error.value.status_code == 500
+    batch = batch_registry.get(next(reversed(batch_registry._batches)))
+    assert batch["status"] == "completed"
+    assert os.listdir(str(upload_dir)) == []
+    assert not resume_routes._inflight_extractions
+
+
+def test_accepted_batch_queues_every_pdf(upload_dir, monkeypatch):
+    async def no_duplicate(content_hash, model_type):
+        return None
+
+    monkeypatch.setattr(resume_routes, "_check_duplicate", no_duplicate)
+
+    result, background_tasks = _upload([_pdf("a.pdf"), _zip("b.pdf", "c.pdf")])
+
+    assert (result["accepted"], result["rejected"]) == (3, 0)
+    assert len(os.listdir(str(upload_dir))) == 3
+    assert batch_registry.get(result["batch_id"])["counts"]["queued"] == 3
+    assert len(background_tasks.tasks) == 1
+    resume_routes._inflight_extractions.clear()
@@ -0,0 +1,84 @@
+import sqlite3
+import time
+
+from utils.embedding_cache import EmbeddingCache
+
+MODEL = "text-embedding-3-large"
+
+
+def _cache(tmp_path, memory_size=4, max_rows=100, max_age_seconds=3600):
+    return EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), memory_size, max_rows, max_age_seconds)
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.get(MODEL, "python developer") is None
+    cache.put(MODEL, "python developer", [0.5, -0.25])
+    assert cache.get(MODEL, "python developer") == [0.5, -0.25]
+
+    reopened = _cache(tmp_path)
+    assert reopened.get(MODEL, "python developer") == [0.5, -0.25]  # From SQLite
+    assert reopened.get(MODEL, "python developer") == [0.5, -0.25]  # From memory
+
+    stats = reopened.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["disk_entries"]) == (1, 1, 1)
+
+
+def test_returned_vectors_are_copies(tmp_path):
+    cache = _cache(tmp_path)
+    vector = [1.0, 2.0]
+    cache.put(MODEL, "text", vector)
+    vector.append(3.0)
+    cache.get(MODEL, "text").append(4.0)
+    assert cache.get(MODEL, "text") == [1.0, 2.0]
+
+
+def test_expired_rows_are_misses(tmp_path):
+    cache = _cache(tmp_path, memory_size=0, max_age_seconds=60)
+    cache.put(MODEL, "text", [1.0])
+    cache._conn.execute("UPDATE embeddings SET accessed_at = ?", (time.time() - 120,))
+    assert cache.get(MODEL, "text") is None
+
+
+def test_prunes_least_recently_used_rows_past_max_rows(tmp_path):
+    cache = _cache(tmp_path, memory_size=0, max_rows=10)
+    for index in range(10):
+        cache.put(MODEL, f"text {index}", [float(index)])
+    cache._conn.execute("UPDATE embeddings SET accessed_at = accessed_at - 100")
+    cache.get(MODEL, "text 0")  # Refreshes text 0
+
+    cache.put(MODEL, "text 10", [10.0])
+
+    stats = cache.stats()
+    assert stats["disk_entries"] == 9  # 11 rows, trimmed to 10 minus 10% headroom
+    assert stats["evictions"] == 2
+    assert cache.get(MODEL, "text 0") == [0.0]
+    assert cache.get(MODEL, "text 10") == [10.0]
+    assert cache.get(MODEL, "text 1") is None
+
+
+def test_adds_accessed_at_to_existing_caches(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE embeddings (key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL, "
+                 "vector BLOB NOT NULL)")
+    conn.commit()
+    conn.close()
+
+    cache = EmbeddingCache(path, 4, 100, 3600)
+    cache.put(MODEL, "text", [1.0])
+    assert cache.stats()["disk_entries"] == 1
+
+
+def test_batched_lookups_and_writes(tmp_path):
+    cache = _cache(tmp_path, memory_size=1)
+    cache.put_many(MODEL, [("a", [1.0]), ("b", [2.0]), ("c", [3.0])])
+    assert cache.stats()["disk_entries"] == 3
+
+    commits = []
+    cache._conn.set_trace_callback(lambda statement: commits.append(statement) if statement == "COMMIT" else None)
+    assert cache.get_many(MODEL, ["a", "missing", "c", "b"]) == [[1.0], None, [3.0], [2.0]]
+    assert len(commits) == 1
+
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 2, 1)
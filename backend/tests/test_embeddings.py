@@ -0,0 +1,149 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import utils.embeddings as embeddings
+from utils.stage_timing import collect_stages, record_stage, EMBEDDING
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def _response(inputs):
+    return SimpleNamespace(data=[
+        SimpleNamespace(index=index, embedding=[float(len(text))]) for index, text in enumerate(inputs)
+    ])
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(embeddings.embedding_cache, "get", lambda model, text: None)
+    monkeypatch.setattr(embeddings.embedding_cache, "put", lambda model, text, embedding: None)
+    monkeypatch.setattr(embeddings.embedding_cache, "get_many", lambda model, texts: [None] * len(texts))
+    monkeypatch.setattr(embeddings.embedding_cache, "put_many", lambda model, items: None)
+
+
+def _fake_provider(monkeypatch, error=BadRequest):
+    requests = []
+
+    def create(inputs):
+        requests.append(list(inputs))
+        if any(text.startswith("bad") for text in inputs):
+            raise error("input too long")
+        return _response(inputs)
+
+    async def create_async(inputs):
+        return create(inputs)
+
+    monkeypatch.setattr(embeddings, "_create_embeddings", create)
+    monkeypatch.setattr(embeddings, "_create_embeddings_async", create_async)
+    return requests
+
+
+TEXTS = ["one", "two", "bad three", "four", "five", "six", "bad seven", "eight"]
+
+
+def test_rejected_chunk_is_bisected_to_the_bad_inputs(monkeypatch):
+    requests = _fake_provider(monkeypatch)
+    vectors, errors = embeddings._embed_texts(TEXTS)
+
+    assert sorted(errors) == [2, 6]
+    assert all(vectors[i] == [float(len(TEXTS[i]))] for i in range(len(TEXTS)) if i not in errors)
+    assert requests[0] == TEXTS
+    assert len(requests) < 2 * len(TEXTS)
+
+
+def test_async_bisection_matches_sync(monkeypatch):
+    _fake_provider(monkeypatch)
+    vectors, errors = asyncio.run(embeddings._embed_texts_async(TEXTS))
+    assert sorted(errors) == [2, 6]
+    assert vectors[0] == [3.0]
+
+
+def test_transient_errors_fail_the_chunk_without_splitting(monkeypatch):
+    requests = _fake_provider(monkeypatch, error=RateLimited)
+    _, errors = embeddings._embed_texts(TEXTS)
+    assert sorted(errors) == list(range(len(TEXTS)))
+    assert len(requests) == 1
+
+
+def test_empty_texts_are_reported_per_item(monkeypatch):
+    _fake_provider(monkeypatch)
+    vectors, errors = embeddings._embed_texts(["one", "  "])
+    assert errors == {1: "Empty text"}
+    assert vectors[0] == [3.0]
+
+
+def test_batcher_coalesces_concurrent_stores(monkeypatch):
+    batches = []
+
+    async def store_batch(items):
+        batches.append(items)
+        record_stage(EMBEDDING, 0.5)
+        return {"stored": [id for _, id in items if id != 3], "failed": {3: "Upsert failed"}}
+
+    monkeypatch.setattr(embeddings, "store_embeddings_batch_async", store_batch)
+    batcher = embeddings.EmbeddingBatcher(window_seconds=0.01, max_items=10)
+
+    async def store(id):
+        with collect_stages() as timings:
+            stored = await batcher.store(f"resume {id}", id)
+        return stored, timings.as_dict()
+
+    async def run():
+        return await asyncio.gather(*(store(id) for id in range(1, 5)))
+
+    results = asyncio.run(run())
+    assert len(batches) == 1 and [id for _, id in batches[0]] == [1, 2, 3, 4]
+    assert [stored for stored, _ in results] == [1, 1, 0, 1]
+    assert all(timings[EMBEDDING] == 0.5 for _, timings in results)
+
+
+def test_batcher_flushes_when_full(monkeypatch):
+    batches = []
+
+    async def store_batch(items):
+        batches.append(len(items))
+        return {"stored": [id for _, id in items], "failed": {}}
+
+    monkeypatch.setattr(embeddings, "store_embeddings_batch_async", store_batch)
+    batcher = embeddings.EmbeddingBatcher(window_seconds=60, max_items=2)
+
+    async def run():
+        return await asyncio.gather(*(batcher.store("text", id) for id in range(4)))
+
+    assert asyncio.run(run()) == [1, 1, 1, 1]
+    assert batches == [2, 2]
+
+
+def test_async_cache_io_is_batched_off_the_event_loop(monkeypatch):
+    _fake_provider(monkeypatch)
+    calls = []
+
+    def get_many(model, texts):
+        calls.append(("get", threading.get_ident(), list(texts)))
+        return [[0.5] if text == "one" else None for text in texts]
+
+    def put_many(model, items):
+        calls.append(("put", threading.get_ident(), [text for text, _ in items]))
+
+    monkeypatch.setattr(embeddings.embedding_cache, "get_many", get_many)
+    monkeypatch.setattr(embeddings.embedding_cache, "put_many", put_many)
+
+    async def run():
+        return threading.get_ident(), await embeddings._embed_texts_async(TEXTS)
+
+    loop_thread, (vectors, errors) = asyncio.run(run())
+
+    assert [(op, texts) for op, _, texts in calls] == [
+        ("get", TEXTS), ("put", [text for text in TEXTS if text not in ("one", "bad three", "bad seven")]),
+    ]
+    assert all(thread != loop_thread for _, thread, _ in calls)
+    assert vectors[0] == [0.5] and sorted(errors) == [2, 6]
@@ -0,0 +1,67 @@
+import os
+import time
+
+from utils.extraction_cache import ExtractionCache, hash_file
+
+
+def _cache(tmp_path, max_entries=10, max_age_seconds=3600, schema_version=1):
+    return ExtractionCache(str(tmp_path), max_entries, max_age_seconds, schema_version)
+
+
+def test_hash_file_is_content_addressed(tmp_path):
+    first, second = tmp_path / "a.pdf", tmp_path / "b.pdf"
+    first.write_bytes(b"%PDF-1.4 same bytes")
+    second.write_bytes(b"%PDF-1.4 same bytes")
+    assert hash_file(str(first)) == hash_file(str(second))
+    assert len(hash_file(str(first))) == 64
+
+
+def test_get_put_and_stats(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.get("abc", "gpt_fitz") is None
+    cache.put("abc", "gpt_fitz", {"Name": "Ada"})
+
+    assert cache.get("abc", "gpt_fitz") == {"Name": "Ada"}
+    assert cache.get("abc", "mistral") is None
+    assert cache.contains("abc", "gpt_fitz")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    assert stats["hit_ratio"] == round(1 / 3, 4)
+
+
+def test_schema_version_invalidates_old_entries(tmp_path):
+    _cache(tmp_path, schema_version=1).put("abc", "gpt_fitz", {"Name": "Ada"})
+    cache = _cache(tmp_path, schema_version=2)
+    assert cache.get("abc", "gpt_fitz") is None
+    assert not cache.contains("abc", "gpt_fitz")
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = _cache(tmp_path, max_age_seconds=60)
+    cache.put("abc", "gpt_fitz", {"Name": "Ada"})
+    path = cache._entry_path("abc", "gpt_fitz")
+    old = time.time() - 120
+    os.utime(path, (old, old))
+
+    assert cache.get("abc", "gpt_fitz") is None
+    assert not os.path.exists(path)
+    assert cache.stats()["entries"] == 0
+
+
+def test_evicts_least_recently_used_past_max_entries(tmp_path):
+    cache = _cache(tmp_path, max_entries=3)
+    now = time.time()
+    for index in range(3):
+        cache.put(f"doc{index}", "gpt_fitz", {"index": index})
+        path = cache._entry_path(f"doc{index}", "gpt_fitz")
+        os.utime(path, (now - 100 + index, now - 100 + index))
+    cache.get("doc0", "gpt_fitz")  # Touching doc0 makes doc1 the oldest
+
+    cache.put("doc3", "gpt_fitz", {"index": 3})
+
+    assert cache.contains("doc0", "gpt_fitz")
+    assert not cache.contains("doc1", "gpt_fitz")
+    assert cache.contains("doc3", "gpt_fitz")
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 3
@@ -0,0 +1,51 @@
+import utils.extractor_routing as extractor_routing
+from utils.extractor_routing import choose_model_type
+from utils.stage_timing import collect_stages
+
+
+def test_born_digital_pages_use_the_text_layer():
+    decision = choose_model_type(3, [(1500, 0.0), (1200, 0.1), (900, 0.0)])
+    assert decision["model_type"] == "gpt_fitz"
+    assert decision["text_pages"] == 3
+    assert decision["chars_per_page"] == 1200.0
+
+
+def test_full_page_scans_use_ocr_even_with_a_hidden_text_layer():
+    decision = choose_model_type(2, [(2000, 1.0), (1800, 0.95)])
+    assert decision["model_type"] == "mistral"
+    assert decision["text_pages"] == 0
+    assert decision["image_coverage"] == 1.0
+
+
+def test_text_page_ratio_threshold():
+    text, scan = (800, 0.0), (10, 1.0)
+    assert choose_model_type(5, [text] * 4 + [scan])["model_type"] == "gpt_fitz"
+    assert choose_model_type(5, [text] * 3 + [scan] * 2)["model_type"] == "mistral"
+
+
+def test_character_and_coverage_thresholds_are_inclusive():
+    assert choose_model_type(1, [(200, 0.5)])["model_type"] == "gpt_fitz"
+    assert choose_model_type(1, [(199, 0.5)])["model_type"] == "mistral"
+    assert choose_model_type(1, [(200, 0.51)])["model_type"] == "mistral"
+
+
+def test_blank_pages_are_ignored():
+    decision = choose_model_type(3, [(1000, 0.0), (0, 0.0), (12, 0.01)])
+    assert decision["model_type"] == "gpt_fitz"
+    assert decision["reason"] == "1/1 probed pages have a usable text layer"
+
+
+def test_only_sparse_pages_fall_back_on_any_text():
+    assert choose_model_type(1, [(50, 0.0)])["model_type"] == "gpt_fitz"
+    assert choose_model_type(1, [(0, 0.0)])["model_type"] == "mistral"
+    assert choose_model_type(0, [])["model_type"] == "mistral"
+
+
+def test_failed_probe_routes_to_ocr(monkeypatch):
+    def broken_probe(pdf_path):
+        raise RuntimeError("cannot open broken document")
+
+    monkeypatch.setattr(extractor_routing, "probe_text_layer", broken_probe)
+    with collect_stages() as stages:
+        assert extractor_routing.resolve_model_type("broken.pdf") == "mistral"
+    assert stages.detail("routing")["reason"] == "probe failed: cannot open broken document"
@@ -0,0 +1,77 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import utils.gpt_finder as gpt_finder
+from utils.stage_timing import collect_stages, PROMPT_LLM
+
+
+def _fake_client(monkeypatch, content='{"Skills": ["Python"]}', delay=0.05, error=None):
+    requests = []
+
+    async def create(model, messages):
+        requests.append(messages)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(gpt_finder, "get_async_openai_client", lambda: client)
+    return requests
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(gpt_finder, "prompt_info_cache", gpt_finder.PromptInfoCache(60, 16))
+
+
+def test_concurrent_identical_prompts_share_one_request(monkeypatch):
+    requests = _fake_client(monkeypatch)
+
+    async def search(prompt):
+        with collect_stages() as timings:
+            info = await gpt_finder.extract_prompt_info_async(prompt)
+        return info, timings
+
+    async def run():
+        return await asyncio.gather(search("Python developer"), search("  python   DEVELOPER"))
+
+    (first, first_timings), (second, second_timings) = asyncio.run(run())
+    assert len(requests) == 1
+    assert first == second and first["skills"] == ["Python"]
+    assert first is not second
+    assert PROMPT_LLM in first_timings.seconds and PROMPT_LLM in second_timings.seconds
+    assert gpt_finder._inflight_prompts == {}
+
+
+def test_cancelled_caller_does_not_fail_the_shared_request(monkeypatch):
+    requests = _fake_client(monkeypatch)
+
+    async def run():
+        leader = asyncio.ensure_future(gpt_finder.extract_prompt_info_async("Go developer"))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(gpt_finder.extract_prompt_info_async("go developer"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run())["skills"] == ["Python"]
+    assert len(requests) == 1
+
+
+def test_failed_request_reaches_every_caller_and_is_not_reused(monkeypatch):
+    requests = _fake_client(monkeypatch, error=ValueError("model unavailable"))
+
+    async def run():
+        return await asyncio.gather(
+            gpt_finder.extract_prompt_info_async("Rust developer"),
+            gpt_finder.extract_prompt_info_async("rust developer"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(requests) == 1
+    assert gpt_finder._inflight_prompts == {}
@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+import utils.llm_client as llm_client
+import utils.prompt_compaction as prompt_compaction
+from utils.llm_client import (
+    CircuitBreaker, CircuitOpenError, LLMProvider, TokenBucket, estimate_tokens, is_retryable
+)
+from utils.stage_timing import RETRIES, collect_stages
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_RETRY_BASE_SECONDS", 0.0)
+
+
+def _provider(max_retries=3):
+    return LLMProvider("test", requests_per_minute=0, tokens_per_minute=0, concurrency=2,
+                       timeout_seconds=1, max_retries=max_retries)
+
+
+def _flaky(errors, result="ok"):
+    calls = []
+
+    def request():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return request, calls
+
+
+def test_is_retryable_classifies_errors():
+    assert is_retryable(StatusError(429)) and is_retryable(StatusError(503))
+    assert is_retryable(TimeoutError()) and is_retryable(ConnectionError())
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(ValueError("bad json"))
+
+
+def test_estimate_tokens_uses_a_character_estimate(monkeypatch):
+    monkeypatch.setattr(prompt_compaction, "_get_encoder", lambda: pytest.fail("estimate_tokens must not tokenize"))
+    assert estimate_tokens("a" * 400, "b" * 400, completion=0) == 200
+    assert estimate_tokens("a" * 40, completion=100) == 110
+
+
+def test_token_bucket_waits_once_budget_is_spent():
+    bucket = TokenBucket(60)
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+
+    bucket.adjust(30)
+    assert bucket.reserve(1) == 0.0
+    assert TokenBucket(0).reserve(10 ** 6) == 0.0
+
+
+def test_circuit_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0)
+    breaker.record_failure()
+    assert not breaker.is_open and breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+
+    # Half-open: one trial at a time, a failed trial reopens the circuit
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+
+    assert breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open and breaker.allow()
+
+
+def test_circuit_breaker_stays_open_until_reset_and_releases_trials():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    breaker.reset_seconds = 0
+    assert breaker.allow()
+    breaker.release_trial()
+    assert breaker.allow()
+
+
+def test_call_retries_transient_errors():
+    provider = _provider()
+    request, calls = _flaky([StatusError(429), StatusError(503)])
+
+    with collect_stages() as stages:
+        assert provider.call(request) == "ok"
+
+    assert len(calls) == 3
+    assert stages.counter(RETRIES) == 2
+    assert not provider.breaker.is_open
+
+
+def test_call_raises_permanent_errors_without_retrying():
+    provider = _provider()
+    request, calls = _flaky([StatusError(400)])
+
+    with pytest.raises(StatusError):
+        provider.call(request)
+    assert len(calls) == 1
+
+
+def test_call_gives_up_after_max_retries_and_breaker_rejects():
+    provider = _provider(max_retries=1)
+    provider.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    request, calls = _flaky([StatusError(500)] * 5)
+
+    with pytest.raises(StatusError):
+        provider.call(request)
+    assert len(calls) == 2
+    with pytest.raises(CircuitOpenError):
+        provider.call(request)
+    assert len(calls) == 2
+
+
+def test_call_async_retries_transient_errors():
+    provider = _provider()
+    errors = [TimeoutError()]
+
+    async def request():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert asyncio.run(provider.call_async(request)) == "ok"
+    assert not errors
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+import utils.local_parser as local_parser
+from utils.local_parser import find_gpa, find_phone, parse_resume_text, plan_hybrid_extraction
+
+RESUME = """JANE DOE
+jane.doe@example.com | +1 (555) 123-4567
+
+Skills
+Languages: Python, Go
+Docker, Kubernetes
+
+Experience
+Acme Corp, Engineer
+2020 - 2023
+Built things
+
+Education
+BSc Computer Science, 2019
+GPA: 3.8/4.0
+"""
+
+
+def test_parse_resume_text_reads_contact_block_and_sections():
+    data = parse_resume_text(RESUME)
+
+    assert data["Name"] == "Jane Doe"
+    assert data["Email"] == "jane.doe@example.com"
+    assert data["Phone Number"] == "+1 (555) 123-4567"
+    assert data["Gpa"] == "3.8/4.0"
+    assert data["Skills"] == {"Languages": ["Python", "Go"], "Other": ["Docker", "Kubernetes"]}
+    assert [entry["Duration"] for entry in data["Work Experience"]] == ["2020 - 2023"]
+    assert [entry["Year"] for entry in data["Education"]] == ["2019"]
+    assert data["Certifications"] == [] and data["Projects"] == []
+
+
+def test_plan_hybrid_extraction_sends_only_unresolved_sections():
+    resolved, pending, llm_text = plan_hybrid_extraction(RESUME)
+
+    assert set(resolved) == {"Name", "Email", "Phone Number", "Skills", "Gpa"}
+    assert pending == ["Work Experience", "Education", "Certifications", "Projects"]
+    assert llm_text.startswith("Experience\nAcme Corp")
+    assert "Education" in llm_text
+    assert "jane.doe@example.com" not in llm_text and "Kubernetes" not in llm_text
+
+
+def test_find_helpers_skip_year_ranges_and_missing_values():
+    assert find_phone("Worked there 2019 - 2023") is None
+    assert find_gpa("No grades listed") is None
+
+
+def test_async_hybrid_plans_off_the_event_loop(monkeypatch):
+    threads = []
+
+    def plan(text):
+        threads.append(threading.get_ident())
+        return plan_hybrid_extraction(text)
+
+    async def complete(prompt):
+        assert "Acme Corp" in prompt
+        return {"Work Experience": [{"Company": "Acme Corp"}], "Name": "Model Name"}
+
+    async def run():
+        return threading.get_ident(), await local_parser.extract_hybrid_async([RESUME], complete)
+
+    monkeypatch.setattr(local_parser, "plan_hybrid_extraction", plan)
+    loop_thread, data = asyncio.run(run())
+
+    assert threads and threads[0] != loop_thread
+    assert data["Name"] == "Jane Doe"
+    assert data["Work Experience"] == [{"Company": "Acme Corp"}]
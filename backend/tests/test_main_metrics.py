@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+
+import main
+from utils.metrics import registry
+
+
+def test_requests_are_labelled_by_their_full_route_template():
+    client = TestClient(main.app)
+    client.get("/api/v1/resume/bulk/abc123")
+    client.get("/api/v1/resume/bulk/def456")
+    client.get("/no/such/path/42")
+
+    text = registry.render()
+    assert 'route="/api/v1/resume/bulk/{batch_id}",status="404"} 2' in text
+    assert 'route="unmatched",status="404"} 1' in text
+    assert "abc123" not in text and "/no/such/path" not in text
+
+
+def test_pool_timeouts_are_exported_as_a_monotonic_counter(monkeypatch):
+    timeouts = {"sync": 3}
+
+    def pool_stats():
+        return {name: {"checked_out": 1, "idle": 2, "overflow": -5, "timeouts": count}
+                for name, count in timeouts.items()}
+
+    monkeypatch.setattr(main, "get_pool_stats", pool_stats)
+    monkeypatch.setattr(main, "_pool_timeouts_seen", {})
+    start = main.db_pool_checkout_timeouts._values.get(("sync",), 0.0)
+
+    main._collect_pool_metrics()
+    main._collect_pool_metrics()
+    timeouts["sync"] = 5
+    main._collect_pool_metrics()
+    timeouts["sync"] = 1  # Engine recreated, its count starts over
+    main._collect_pool_metrics()
+
+    assert main.db_pool_checkout_timeouts._values[("sync",)] - start == 6
@@ -0,0 +1,49 @@
+import pytest
+
+from utils.metrics import Counter, Gauge, Histogram, MetricsRegistry, _Metric
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("name", "doc")
+
+
+def test_counter_and_gauge_render():
+    registry = MetricsRegistry()
+    calls = registry.register(Counter("calls_total", "Calls.", ["provider"]))
+    open_circuits = registry.register(Gauge("circuit_open", "Open circuits.", ["provider"]))
+    registry.add_collector(lambda: open_circuits.set(1, provider="openai"))
+    calls.inc(provider="openai")
+    calls.inc(2, provider="openai")
+    calls.inc(0.5, provider='mis"tral')
+
+    text = registry.render()
+    assert "# TYPE calls_total counter" in text
+    assert 'calls_total{provider="openai"} 3' in text
+    assert 'calls_total{provider="mis\\"tral"} 0.5' in text
+    assert 'circuit_open{provider="openai"} 1' in text
+
+
+def test_counters_cannot_be_set():
+    assert not hasattr(Counter("calls_total", "Calls."), "set")
+    assert hasattr(Gauge("circuit_open", "Open circuits."), "set")
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("stage_seconds", "Stage time.", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, stage="llm")
+
+    lines = histogram.render()
+    assert 'stage_seconds_bucket{stage="llm",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="llm",le="1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="llm",le="+Inf"} 4' in lines
+    assert 'stage_seconds_sum{stage="llm"} 6.05' in lines
+    assert 'stage_seconds_count{stage="llm"} 4' in lines
+
+
+def test_failing_collector_does_not_break_render():
+    registry = MetricsRegistry()
+    registry.register(Counter("calls_total", "Calls."))
+    registry.add_collector(lambda: 1 / 0)
+    assert "# HELP calls_total Calls." in registry.render()
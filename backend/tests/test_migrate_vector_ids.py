@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import migrate_vector_ids as migration
+from models import Resume
+
+
+class FakeIndex:
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.deleted = []
+
+    def list(self):
+        return [list(self.vectors)]
+
+    def fetch(self, ids):
+        return SimpleNamespace(vectors={
+            vector_id: SimpleNamespace(id=vector_id, values=[0.0], metadata=self.vectors[vector_id])
+            for vector_id in ids
+        })
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *criteria):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def query(self, model):
+        return FakeQuery(self.rows)
+
+    def close(self):
+        pass
+
+
+def _setup(monkeypatch, vectors, rows, failed=()):
+    index = FakeIndex(vectors)
+    embedded = []
+
+    def store_embeddings_batch(items):
+        embedded.extend(items)
+        return {
+            "stored": [resume_id for _, resume_id in items if resume_id not in failed],
+            "failed": {resume_id: "rejected" for _, resume_id in items if resume_id in failed},
+        }
+
+    monkeypatch.setattr(migration, "configure_vector_store", lambda backend, path: SimpleNamespace(index=index))
+    monkeypatch.setattr(migration, "SessionLocal", lambda: FakeSession(rows))
+    monkeypatch.setattr(migration, "store_embeddings_batch", store_embeddings_batch)
+    monkeypatch.setattr(migration, "resume_embedding_text", lambda resume: f"current {resume.name}")
+    return index, embedded
+
+
+VECTORS = {
+    "uuid-a": {"id": "1", "text": "old version"},
+    "uuid-b": {"id": "1", "text": "older version"},
+    "uuid-c": {"id": "2"},
+    "uuid-d": {"id": "3"},
+    "resume-3": {"id": "3"},
+    "uuid-e": {},
+}
+
+
+def test_reembeds_from_the_current_row_instead_of_copying_a_legacy_vector(monkeypatch):
+    index, embedded = _setup(monkeypatch, VECTORS, [Resume(id=1, name="Jane")])
+
+    summary = migration.migrate_vector_ids()
+
+    assert embedded == [("current Jane", 1)]
+    assert sorted(index.deleted) == ["uuid-a", "uuid-b", "uuid-c", "uuid-d"]
+    assert (summary["reembedded"], summary["deleted_resumes"], summary["orphans"]) == (1, 1, 1)
+
+
+def test_failed_reembedding_keeps_legacy_vectors(monkeypatch):
+    index, _ = _setup(monkeypatch, VECTORS, [Resume(id=1, name="Jane"), Resume(id=2, name="John")], failed={1})
+
+    summary = migration.migrate_vector_ids()
+
+    assert sorted(index.deleted) == ["uuid-c", "uuid-d"]
+    assert (summary["reembedded"], summary["failed"], summary["deleted"]) == (1, 1, 2)
+
+
+def test_dry_run_changes_nothing(monkeypatch):
+    index, embedded = _setup(monkeypatch, VECTORS, [Resume(id=1, name="Jane")])
+
+    summary = migration.migrate_vector_ids(dry_run=True)
+
+    assert embedded == [] and index.deleted == []
+    assert summary["reembedded"] == 1 and summary["deleted"] == 4
@@ -0,0 +1,34 @@
+import time
+
+from utils.mistral import UploadRegistry
+
+
+def test_registry_reuses_uploads_by_content_hash():
+    registry = UploadRegistry(ttl_seconds=60, max_entries=10)
+    assert registry.get("abc") is None
+    assert registry.put("abc", "file-1") == []
+    assert registry.get("abc") == "file-1"
+    assert registry.reused == 1
+
+    assert registry.put("abc", "file-2") == ["file-1"]
+    assert registry.discard("abc") == "file-2"
+    assert registry.get("abc") is None
+
+
+def test_registry_evicts_oldest_and_drains():
+    registry = UploadRegistry(ttl_seconds=60, max_entries=2)
+    registry.put("a", "file-a")
+    registry.put("b", "file-b")
+    assert registry.put("c", "file-c") == ["file-a"]
+    assert sorted(registry.drain()) == ["file-b", "file-c"]
+    assert registry.drain() == []
+
+
+def test_disabled_or_expired_entries_are_not_reused():
+    assert UploadRegistry(ttl_seconds=0, max_entries=2).put("a", "file-a") == ["file-a"]
+
+    registry = UploadRegistry(ttl_seconds=60, max_entries=2)
+    registry.put("a", "file-a")
+    registry._entries["a"] = ("file-a", time.time() - 120)
+    assert registry.get("a") is None
+    assert registry.put("b", "file-b") == ["file-a"]
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import fitz
+import pytest
+
+import utils.pdf_text as pdf_text
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    yield
+    pdf_text.shutdown_pdf_pool()
+
+
+def _write_pdf(path, pages):
+    doc = fitz.open()
+    for index in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {index + 1} text")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_extracts_every_page_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_text, "PDF_PAGES_PER_TASK", 2)
+    path = _write_pdf(tmp_path / "resume.pdf", 5)
+
+    pages = pdf_text.extract_pdf_pages(path)
+    assert [page.strip() for page in pages] == [f"Page {index} text" for index in range(1, 6)]
+    assert asyncio.run(pdf_text.extract_pdf_pages_async(path)) == pages
+
+
+def test_probe_counts_text_and_images(tmp_path):
+    page_count, samples = pdf_text.probe_text_layer(_write_pdf(tmp_path / "resume.pdf", 2))
+    assert page_count == 2
+    assert samples == [(len("Page1text"), 0.0), (len("Page2text"), 0.0)]
+
+
+def test_timeout_kills_the_hung_worker_and_frees_the_pool():
+    pool = pdf_text._get_pool()
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pdf_text._run_in_pool(
+            lambda pool, futures: pdf_text._submit(pool, futures, time.sleep, 30).result(timeout=0.5), "hung.pdf"
+        )
+    assert time.monotonic() - start < 5
+    assert pdf_text._get_pool() is not pool
+
+
+def test_async_timeout_kills_the_hung_worker():
+    pool = pdf_text._get_pool()
+
+    async def hang(pool, futures):
+        return await asyncio.wrap_future(pdf_text._submit(pool, futures, time.sleep, 30))
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(pdf_text._run_in_pool_async(hang, "hung.pdf", 0.5))
+    assert pdf_text._get_pool() is not pool
+
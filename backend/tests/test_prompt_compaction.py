@@ -0,0 +1,64 @@
+from utils.prompt_compaction import (
+    build_extraction_prompt,
+    chunk_text,
+    compact_pages,
+    count_tokens,
+    merge_extractions,
+    split_sections,
+)
+
+
+def test_compact_pages_drops_page_numbers_and_repeated_headers():
+    pages = [
+        "Jane Doe - Resume\n\nExperience\nAcme   Corp\n\n\n\nPage 1 of 2",
+        "Jane Doe - Resume\nEducation\nState University\n2",
+    ]
+    text = compact_pages(pages)
+
+    assert text.count("Jane Doe - Resume") == 1
+    assert "Page 1 of 2" not in text and "\n2\n" not in f"{text}\n"
+    assert "Acme Corp" in text
+    assert "\n\n\n" not in text
+
+
+def test_split_sections_keeps_contact_block_first():
+    sections = split_sections("Jane Doe\njane@example.com\n\n## Skills:\nPython\n\nWork Experience\nAcme")
+    assert [(name, heading) for name, heading, _ in sections] == [
+        (None, None), ("skills", "## Skills:"), ("work experience", "Work Experience"),
+    ]
+    assert sections[2][2] == "Work Experience\nAcme"
+
+
+def test_chunk_text_respects_budget_and_drops_low_priority_sections_first():
+    text = "Jane Doe"
+    assert chunk_text(text, budget=100) == [text]
+
+    experience = "Experience\n" + "\n\n".join(f"Role {i} " + "x" * 120 for i in range(6))
+    publications = "Publications\n" + "\n\n".join(f"Paper {i} " + "y" * 120 for i in range(6))
+    chunks = chunk_text(f"{experience}\n\n{publications}", budget=80, max_chunks=3)
+
+    assert len(chunks) <= 3
+    assert all(count_tokens(chunk) <= 80 for chunk in chunks)
+    assert "Role 5" in "".join(chunks)
+    assert "Paper 5" not in "".join(chunks)
+    assert any(chunk.startswith("Experience (continued)") for chunk in chunks)
+
+
+def test_build_extraction_prompt_lists_requested_fields_and_part():
+    prompt = build_extraction_prompt("text", part=2, parts=3, fields=["Email"])
+    assert prompt.startswith("This is part 2 of 3")
+    assert "Email" in prompt and "Gpa" not in prompt
+    assert prompt.endswith("Resume Text:\ntext")
+
+
+def test_merge_extractions_combines_chunk_results():
+    merged = merge_extractions([
+        {"Name": "Jane Doe", "Email": "N/A", "Skills": {"Languages": ["Python"]}, "Projects": [{"Name": "A"}]},
+        {"Name": "Someone Else", "Email": "jane@example.com", "Skills": ["Docker"],
+         "Projects": [{"Name": "a"}, {"Name": "B"}]},
+    ])
+
+    assert merged["Name"] == "Jane Doe"
+    assert merged["Email"] == "jane@example.com"
+    assert merged["Skills"] == {"Languages": ["Python"], "Other": ["Docker"]}
+    assert merged["Projects"] == [{"Name": "A"}, {"Name": "B"}]
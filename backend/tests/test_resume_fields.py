@@ -0,0 +1,51 @@
+import pytest
+
+from utils.resume_fields import parse_gpa, skill_rows, skill_tags, text_fields
+from utils.search_index import field_text, iter_strings
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("3.6", 3.6),
+    ("3.6/4.0", 3.6),
+    ("8.2/10", 3.28),
+    ("8.5", 3.4),
+    ("85%", 3.4),
+    (3.8, 3.8),
+    ("0", None),
+    ("", None),
+    (None, None),
+    ("N/A", None),
+    ("5/4", None),
+])
+def test_parse_gpa(value, expected):
+    assert parse_gpa(value) == expected
+
+
+def test_skill_rows_use_top_level_keys_as_categories():
+    skills = {"Cloud": ["Kubernetes", " AWS "], "Rust": "Expert", "Tools": {"CI": ["GitHub  Actions"]}}
+    assert skill_rows(skills) == [
+        ("aws", "cloud"), ("ci", "tools"), ("expert", "rust"), ("github actions", "tools"), ("kubernetes", "cloud"),
+    ]
+    assert skill_rows(["Python", "python", ""]) == [("python", "general")]
+
+
+def test_skill_tags_drop_categories():
+    assert skill_tags({"Cloud": ["Kubernetes", "AWS"], "Languages": ["Python", "aws"]}) == [
+        "aws", "kubernetes", "python",
+    ]
+
+
+def test_iter_strings_flattens_nested_fields():
+    value = {"Company": "Acme", "Roles": [{"Title": "Engineer", "Years": 3}, None]}
+    assert list(iter_strings(value)) == ["Company", "Acme", "Roles", "Title", "Engineer", "Years", "3"]
+    assert field_text(["Python", {"Level": "Senior"}]) == "Python Level Senior"
+
+
+def test_text_fields_coerces_numbers_for_string_columns():
+    data = {"Name": "Ada", "Gpa": 3.8, "Phone Number": 5550100, "Email": None, "Skills": {"Languages": ["Go"]}}
+    converted = text_fields(data)
+
+    assert converted["Gpa"] == "3.8" and converted["Phone Number"] == "5550100"
+    assert converted["Email"] is None and "model_type" not in converted
+    assert converted["Skills"] is data["Skills"]
+    assert data["Gpa"] == 3.8  # The caller's dict is left alone
@@ -0,0 +1,28 @@
+import re
+
+from sqlalchemy.dialects import postgresql
+
+from routes.resume import _skill_facet_query
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_degree_facet_names_the_lateral_entry_column():
+    query, group, _ = _skill_facet_query("degree")
+    sql = _sql(query)
+
+    match = re.search(r"JOIN LATERAL jsonb_path_query\(resume\.education, '\$\[\*\]'::jsonpath\) AS (\w+)\(entry\)", sql)
+    assert match, sql
+    assert f"{match.group(1)}.entry ->>" in sql
+    assert group is not None
+
+
+def test_facet_groupings():
+    assert "resume_skill.category" in _sql(_skill_facet_query("category")[0])
+    assert "JOIN resume ON resume.id = resume_skill.resume_id" in _sql(_skill_facet_query("model_type")[0])
+
+    query, group, _ = _skill_facet_query(None)
+    assert group is None
+    assert "JOIN" not in _sql(query)
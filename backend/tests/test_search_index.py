@@ -0,0 +1,56 @@
+from utils.search_index import ResumeSearchIndex, tokenize
+
+
+def _index():
+    index = ResumeSearchIndex()
+    index.rebuild([
+        (1, {"skills": {"Languages": ["Python", "Go"]}, "projects": [{"Name": "Kubernetes operator"}]}),
+        (2, {"skills": ["Kubernetes", "Docker"], "work_experience": [{"Role": "Platform engineer"}]}),
+        (3, {"skills": ["Java"], "education": [{"Degree": "BSc Computer Science"}]}),
+    ])
+    return index
+
+
+def test_tokenize_keeps_tech_terms_and_drops_stop_words():
+    assert tokenize("Looking for C++, C# and Node.js with .NET skills") == ["c++", "c#", "node.js", ".net"]
+
+
+def test_skill_matches_outrank_project_mentions():
+    scores = _index().score("kubernetes")
+    assert set(scores) == {1, 2}
+    assert scores[2] > scores[1]
+
+
+def test_candidates_and_top_k_limit_scoring():
+    index = _index()
+    assert set(index.score("kubernetes python", candidate_ids=[1, 3])) == {1}
+    assert list(index.score("kubernetes python java", top_k=1)) == [1]
+    assert index.score("rust") == {}
+    assert index.score("the and") == {}
+
+
+def test_add_replaces_and_remove_drops_documents():
+    index = _index()
+    index.add(3, {"skills": ["Kubernetes"]})
+    assert 3 in index.score("kubernetes") and 3 not in index.score("java")
+
+    index.remove(3)
+    index.remove(42)
+    assert 3 not in index.score("kubernetes")
+    assert index.stats()["documents"] == 2
+    assert index.stats()["built"] is True
+
+
+def test_rebuild_keeps_changes_made_while_reading_documents():
+    index = _index()
+
+    def documents():
+        yield 1, {"skills": ["Python"]}
+        # Ingested and deleted by this worker while the rebuild was paging through the database
+        index.add(4, {"skills": ["Rust"]})
+        index.remove(1)
+        yield 2, {"skills": ["Kubernetes"]}
+
+    assert index.rebuild(documents()) == 2
+    assert set(index.score("rust kubernetes python")) == {2, 4}
+    assert index.stats()["age_seconds"] is not None
@@ -0,0 +1,30 @@
+import pytest
+
+import routes.resume as resume_routes
+
+
+@pytest.fixture(autouse=True)
+def vector_weight(monkeypatch):
+    monkeypatch.setattr(resume_routes, "SEARCH_VECTOR_WEIGHT", 0.6)
+
+
+def test_rank_hybrid_fuses_normalized_scores():
+    ranked = resume_routes.rank_hybrid([("1", 0.9), ("2", 0.8)], {2: 10.0, 3: 5.0})
+
+    assert [candidate["resume_id"] for candidate in ranked] == [2, 1, 3]
+    assert ranked[0]["score"] == pytest.approx(0.6 * 0.8 / 0.9 + 0.4)
+    assert ranked[1]["score"] == pytest.approx(0.6)
+    assert ranked[2]["score"] == pytest.approx(0.4 * 0.5)
+    assert (ranked[1]["vector_score"], ranked[1]["keyword_score"]) == (0.9, None)
+    assert (ranked[2]["vector_score"], ranked[2]["keyword_score"]) == (None, 5.0)
+
+
+def test_rank_hybrid_keeps_best_duplicate_and_breaks_ties_by_id():
+    ranked = resume_routes.rank_hybrid([(5, 0.5), (4, 0.7), (5, 0.7)], {})
+    assert [(candidate["resume_id"], candidate["vector_score"]) for candidate in ranked] == [(4, 0.7), (5, 0.7)]
+
+
+def test_rank_hybrid_handles_empty_retrievers():
+    assert resume_routes.rank_hybrid([], {}) == []
+    ranked = resume_routes.rank_hybrid([], {7: 0.0})
+    assert ranked[0]["score"] == 0.0
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+import routes.resume as resume_routes
+from models import Resume, ResumeSkill
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def first(self):
+        return self._rows[0] if self._rows else None
+
+
+class FakeSession:
+    """Just enough of AsyncSession for store_resume_data, checking what asyncpg would reject."""
+
+    def __init__(self, existing=None):
+        self.existing = existing
+        self.added = []
+        self.committed = False
+        self.lookups = 0
+
+    async def execute(self, statement):
+        if statement.is_select:
+            self.lookups += 1
+        return _Result([self.existing] if self.existing is not None else [])
+
+    def add(self, instance):
+        self.added.append(instance)
+
+    def add_all(self, instances):
+        self.added.extend(instances)
+
+    async def flush(self):
+        for instance in self.added:
+            if isinstance(instance, Resume) and instance.id is None:
+                instance.id = 1
+
+    async def commit(self):
+        for instance in self.added + [self.existing]:
+            if isinstance(instance, Resume):
+                for column in ("name", "email", "phone_number", "gpa", "model_type"):
+                    value = getattr(instance, column)
+                    assert value is None or isinstance(value, str), f"{column}={value!r}"
+        self.committed = True
+
+    async def rollback(self):
+        pass
+
+
+EXTRACTED = {
+    "Name": "Ada Lovelace",
+    "Email": "ada@example.com",
+    "Phone Number": 5550100,
+    "Skills": {"Languages": ["Python"]},
+    "Work Experience": [],
+    "Education": [{"Degree": "BSc"}],
+    "Certifications": [],
+    "Projects": [],
+    "Gpa": 3.8,
+    "model_type": "gpt_fitz",
+}
+
+
+def test_new_resume_with_numeric_gpa_and_phone(monkeypatch):
+    monkeypatch.setattr(resume_routes, "_index_resume", lambda resume: None)
+    db = FakeSession()
+
+    assert asyncio.run(resume_routes.store_resume_data(dict(EXTRACTED), db)) == 1
+    resume = next(instance for instance in db.added if isinstance(instance, Resume))
+    assert (resume.gpa, resume.phone_number, resume.gpa_value) == ("3.8", "5550100", 3.8)
+    assert [row.skill_norm for row in db.added if isinstance(row, ResumeSkill)] == ["python"]
+    assert db.committed
+
+
+def test_existing_resume_with_numeric_gpa_and_phone(monkeypatch):
+    monkeypatch.setattr(resume_routes, "_index_resume", lambda resume: None)
+    existing = Resume(id=7, name="Ada", email="ada@example.com", phone_number="1", skills={}, education=[],
+                      projects=[], gpa="3.0", model_type="mistral")
+    db = FakeSession(existing)
+
+    assert asyncio.run(resume_routes.store_resume_data(dict(EXTRACTED, Gpa=8.6), db)) == 7
+    assert (existing.gpa, existing.phone_number, existing.gpa_value) == ("8.6", "5550100", 3.44)
+    assert db.committed
+
+
+def test_resume_without_email_never_matches_an_existing_row(monkeypatch):
+    monkeypatch.setattr(resume_routes, "_index_resume", lambda resume: None)
+    existing = Resume(id=7, name="Ada", email=None, phone_number="1", skills={}, education=[],
+                      projects=[], gpa="3.0", model_type="local")
+    db = FakeSession(existing)
+
+    assert asyncio.run(resume_routes.store_resume_data(dict(EXTRACTED, Email=None), db)) == 1
+    assert db.lookups == 0 and existing.name == "Ada"
+    resume = next(instance for instance in db.added if isinstance(instance, Resume))
+    assert resume.email is None
+
+
+def test_pipeline_rejects_extraction_without_name(monkeypatch):
+    async def extract(file_path, model_type, content_hash=None):
+        return dict(EXTRACTED, Name=None)
+
+    monkeypatch.setattr(resume_routes, "extract_resume_data_async", extract)
+    with pytest.raises(RuntimeError, match="model type 'local' found no candidate name"):
+        asyncio.run(resume_routes._run_ingestion_pipeline("resume.pdf", "local"))
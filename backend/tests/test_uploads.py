@@ -0,0 +1,37 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+import utils.uploads as uploads
+from utils.uploads import UploadTooLargeError, store_stream
+
+
+def test_store_stream_names_files_by_content_hash(tmp_path):
+    data = b"%PDF-1.4 resume"
+    stored = store_stream(io.BytesIO(data), str(tmp_path))
+
+    content_hash = hashlib.sha256(data).hexdigest()
+    assert stored.path == os.path.join(str(tmp_path), f"{content_hash}.pdf")
+    assert (stored.content_hash, stored.size, stored.duplicate) == (content_hash, len(data), False)
+    with open(stored.path, "rb") as f:
+        assert f.read() == data
+
+
+def test_identical_uploads_are_stored_once(tmp_path):
+    first = store_stream(io.BytesIO(b"same bytes"), str(tmp_path))
+    second = store_stream(io.BytesIO(b"same bytes"), str(tmp_path))
+
+    assert second.duplicate and second.path == first.path
+    assert os.listdir(str(tmp_path)) == [os.path.basename(first.path)]
+
+
+def test_oversized_upload_is_rejected_while_streaming(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_SIZE", 4)
+    with pytest.raises(UploadTooLargeError):
+        store_stream(io.BytesIO(b"0123456789"), str(tmp_path), max_bytes=6)
+    assert os.listdir(str(tmp_path)) == []
+
+    stored = store_stream(io.BytesIO(b"012345"), str(tmp_path), max_bytes=6)
+    assert stored.size == 6
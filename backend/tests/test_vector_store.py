@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+
+from utils.vector_store import LocalVectorStore
+
+
+def _ids(matches):
+    return [match["id"] for match in matches]
+
+
+def test_upsert_query_delete_round_trip(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.upsert([
+        ("1", [1.0, 0.0, 0.0], {"name": "x"}),
+        ("2", [0.0, 1.0, 0.0], None),
+        ("3", [0.7, 0.7, 0.0], {}),
+    ])
+
+    matches = store.query([2.0, 0.1, 0.0], top_k=2)
+    assert _ids(matches) == ["1", "3"]
+    assert matches[0]["metadata"] == {"name": "x"}
+    assert matches[0]["score"] == pytest.approx(0.9988, abs=1e-3)
+
+    store.upsert([("1", [0.0, 0.0, 1.0], {"name": "y"})])
+    assert _ids(store.query([0.0, 0.0, 1.0], top_k=1)) == ["1"]
+
+    store.delete(["1", "missing"])
+    assert "1" not in _ids(store.query([0.0, 0.0, 1.0], top_k=5))
+    assert len(store.query([1.0, 1.0, 1.0], top_k=5)) == 2
+
+
+def test_deleted_rows_are_reused_and_state_survives_reload(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    store.upsert([("1", [1.0, 0.0], {}), ("2", [0.0, 1.0], {"keep": True})])
+    store.delete(["1"])
+    store.upsert([("3", [1.0, 0.1], {})])
+    assert store._rows["3"] == 0
+
+    reloaded = LocalVectorStore(str(tmp_path))
+    assert reloaded.dim == 2
+    assert sorted(_ids(reloaded.query([1.0, 1.0], top_k=5))) == ["2", "3"]
+    assert reloaded.query([0.0, 1.0], top_k=1)[0]["metadata"] == {"keep": True}
+    with open(os.path.join(str(tmp_path), "header.json"), encoding="utf-8") as f:
+        assert json.load(f) == {"dim": 2, "capacity": LocalVectorStore.INITIAL_CAPACITY}
+
+
+def test_query_edge_cases_and_dimension_mismatch(tmp_path):
+    store = LocalVectorStore(str(tmp_path))
+    assert store.query([1.0, 0.0], top_k=3) == []
+
+    store.upsert([("1", [1.0, 0.0], {})])
+    assert store.query([0.0, 0.0], top_k=3) == []
+    assert store.query([1.0, 0.0], top_k=0) == []
+    with pytest.raises(ValueError):
+        store.upsert([("2", [1.0, 0.0, 0.0], {})])
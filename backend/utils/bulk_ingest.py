@@ -0,0 +1,184 @@
+import os
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from utils.uploads import store_stream, UPLOAD_MAX_BYTES
+
+# Bulk ingestion limits from environment variables
+BULK_INGEST_CONCURRENCY = int(os.getenv("BULK_INGEST_CONCURRENCY", "4"))
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "1000"))
+BULK_MAX_TRACKED_BATCHES = int(os.getenv("BULK_MAX_TRACKED_BATCHES", "100"))
+
+
+def _safe_name(file_name: str) -> str:
+    """Strips directories from an uploaded or archived file name."""
+    return os.path.basename(file_name.replace("\\", "/")) or "resume.pdf"
+
+
+def is_zip_upload(file_name: Optional[str], content_type: Optional[str]) -> bool:
+    """Checks whether an uploaded file should be treated as a zip archive."""
+    return (file_name or "").lower().endswith(".zip") or content_type in (
+        "application/zip",
+        "application/x-zip-compressed",
+    )
+
+
+def _is_pdf_member(member: zipfile.ZipInfo) -> bool:
+    return not member.is_dir() and member.filename.lower().endswith(".pdf")
+
+
+def count_zip_pdfs(source: BinaryIO) -> int:
+    """Counts the PDF members of a zip archive from its central directory, without extracting them."""
+    with zipfile.ZipFile(source) as archive:
+        return sum(1 for member in archive.infolist() if _is_pdf_member(member))
+
+
+def extract_pdfs_from_zip(source: BinaryIO, upload_dir: str, start_index: int) -> List[Dict[str, Any]]:
+    """
+    Streams every PDF member of a zip archive into the content-addressed upload store.
+
+    Members are never fully loaded into memory, directory components are
+    dropped, and oversized members are rejected individually.
+
+    Args:
+        source (BinaryIO): Seekable zip file object.
+        upload_dir (str): Directory to store the PDFs in.
+        start_index (int): Number of files already in the batch.
+
+    Returns:
+        List[dict]: One {"file_name", "upload", "error"} entry per PDF member.
+    """
+    entries = []
+    with zipfile.ZipFile(source) as archive:
+        for member in archive.infolist():
+            if not _is_pdf_member(member):
+                continue
+            if start_index + len(entries) >= BULK_MAX_FILES:
+                raise ValueError(f"Batch exceeds the {BULK_MAX_FILES} file limit")
+
+            entry = {"file_name": _safe_name(member.filename), "upload": None, "error": None}
+            if member.file_size > UPLOAD_MAX_BYTES:
+                entry["error"] = f"File exceeds the {UPLOAD_MAX_BYTES} byte limit"
+            else:
+                try:
+                    with archive.open(member) as member_file:
+                        entry["upload"] = store_stream(member_file, upload_dir)
+                except Exception as e:
+                    entry["error"] = str(e)
+            entries.append(entry)
+    return entries
+
+
+class BatchRegistry:
+    """
+    In-memory record of bulk ingestion batches and their per-file status.
+
+    Only the most recent BULK_MAX_TRACKED_BATCHES batches are kept, evicting
+    finished batches before running ones. Updates to an evicted batch are
+    ignored, and lookups return None. All updates happen on the event loop,
+    so no locking is needed.
+    """
+
+    def __init__(self, max_batches: int):
+        self.max_batches = max_batches
+        self._batches: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def create(self, model_type: str) -> str:
+        batch_id = uuid.uuid4().hex
+        self._batches[batch_id] = {
+            "batch_id": batch_id,
+            "model_type": model_type,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "files": [],
+        }
+        while len(self._batches) > self.max_batches:
+            self._evict_one()
+        return batch_id
+
+    def _evict_one(self) -> None:
+        for batch_id, batch in self._batches.items():
+            if batch["finished_at"] is not None:
+                del self._batches[batch_id]
+                return
+        self._batches.popitem(last=False)
+
+    def add_file(self, batch_id: str, file_name: str, path: Optional[str], error: Optional[str] = None,
+                 status: Optional[str] = None) -> int:
+        """Adds a file to a batch and returns its position, or -1 if the batch was evicted."""
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return -1
+        files = batch["files"]
+        files.append({
+            "file_name": file_name,
+            "path": path,
+            "status": status or ("failed" if error else "queued"),
+            "resume_id": None,
+            "error": error,
+            "duration": None,
+        })
+        return len(files) - 1
+
+    def update_file(self, batch_id: str, position: int, **fields) -> None:
+        batch = self._batches.get(batch_id)
+        if batch is not None and 0 <= position < len(batch["files"]):
+            batch["files"][position].update(fields)
+
+    def mark_started(self, batch_id: str) -> None:
+        batch = self._batches.get(batch_id)
+        if batch is not None:
+            batch["started_at"] = time.time()
+
+    def mark_failed(self, batch_id: str, error: str) -> None:
+        """Fails the files of a batch that will never be processed and finishes it."""
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return
+        for file in batch["files"]:
+            if file["status"] in ("queued", "processing"):
+                file.update(status="failed", error=error)
+        batch["finished_at"] = time.time()
+
+    def mark_finished(self, batch_id: str) -> None:
+        batch = self._batches.get(batch_id)
+        if batch is not None:
+            batch["finished_at"] = time.time()
+
+    def get(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Returns per-file status plus aggregate counts and throughput for a batch."""
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            return None
+
+        counts = {"queued": 0, "processing": 0, "done": 0, "failed": 0, "duplicate": 0}
+        for file in batch["files"]:
+            counts[file["status"]] += 1
+
+        elapsed = None
+        throughput = None
+        if batch["started_at"] is not None:
+            elapsed = (batch["finished_at"] or time.time()) - batch["started_at"]
+            finished = counts["done"] + counts["failed"] + counts["duplicate"]
+            throughput = round(finished / elapsed, 3) if elapsed > 0 else None
+
+        return {
+            "batch_id": batch_id,
+            "model_type": batch["model_type"],
+            "status": "completed" if batch["finished_at"] else "processing",
+            "total": len(batch["files"]),
+            "counts": counts,
+            "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+            "files_per_second": throughput,
+            "files": [
+                {key: value for key, value in file.items() if key != "path"}
+                for file in batch["files"]
+            ],
+        }
+
+
+batch_registry = BatchRegistry(BULK_MAX_TRACKED_BATCHES)
@@ -0,0 +1,33 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Size of the shared pool used to offload blocking calls from the event loop
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "32"))
+
+_blocking_pool = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Runs a blocking function on the shared bounded thread pool.
+
+    The caller's context variables are carried over to the worker thread.
+
+    Args:
+        func: The blocking callable.
+        *args, **kwargs: Arguments passed to `func`.
+
+    Returns:
+        Whatever `func` returns.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_blocking_pool, functools.partial(context.run, func, *args, **kwargs))
+
+
+def shutdown_blocking_pool():
+    """Waits for in-flight blocking calls and stops the pool."""
+    _blocking_pool.shutdown(wait=True)
@@ -0,0 +1,239 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Cache configuration from environment variables
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join("cache", "embeddings.sqlite3"))
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "2048"))
+EMBEDDING_CACHE_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "100000"))
+EMBEDDING_CACHE_MAX_AGE_SECONDS = int(os.getenv("EMBEDDING_CACHE_MAX_AGE_SECONDS", str(30 * 24 * 3600)))
+
+# Expired rows are also swept every this many writes, even below the row limit
+PRUNE_EVERY_WRITES = 1000
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    """Returns the cache key for a (model, text) pair."""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache: an in-process LRU in front of an on-disk SQLite
+    table of float32 vectors. Disk hits are promoted into the LRU.
+
+    Rows record when they were last read or written. Rows older than
+    `max_age_seconds` are misses and get pruned, and the least recently used
+    rows are dropped once the table grows past `max_rows`.
+    """
+
+    def __init__(self, db_path: str, memory_size: int, max_rows: int = EMBEDDING_CACHE_MAX_ROWS,
+                 max_age_seconds: int = EMBEDDING_CACHE_MAX_AGE_SECONDS):
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self.max_rows = max_rows
+        self.max_age_seconds = max_age_seconds
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Vectors are kept as tuples so callers can't mutate the cached copy
+        self._memory: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL, "
+            "accessed_at REAL NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+        if "accessed_at" not in columns:
+            # Caches created before pruning existed: existing rows count as fresh from now on
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE embeddings SET accessed_at = ?", (time.time(),))
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed_at ON embeddings (accessed_at)")
+        self._conn.commit()
+        self._row_count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _remember(self, key: str, embedding: Tuple[float, ...]) -> None:
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _is_expired(self, accessed_at: float) -> bool:
+        return self.max_age_seconds > 0 and time.time() - accessed_at > self.max_age_seconds
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """
+        Looks up a cached embedding, first in memory and then on disk.
+
+        Args:
+            model (str): Embedding model name.
+            text (str): Embedded text.
+
+        Returns:
+            Optional[List[float]]: A copy of the cached embedding, or None on a miss.
+        """
+        return self.get_many(model, [text])[0]
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Looks up many embeddings with at most one disk read and one commit.
+
+        Returns:
+            List[Optional[List[float]]]: Copies of the cached embeddings aligned
+            with `texts`, None for misses.
+        """
+        keys = [embedding_cache_key(model, text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        with self._lock:
+            disk_keys = []
+            for i, key in enumerate(keys):
+                embedding = self._memory.get(key)
+                if embedding is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    results[i] = list(embedding)
+                else:
+                    disk_keys.append(key)
+
+            rows = {}
+            if disk_keys:
+                try:
+                    rows = self._read_rows(disk_keys)
+                except sqlite3.Error as e:
+                    print(f"[⚠️] Embedding cache read failed: {e}")
+
+            for i, key in enumerate(keys):
+                if results[i] is not None:
+                    continue
+                vector = rows.get(key)
+                if vector is None:
+                    self.misses += 1
+                    continue
+                embedding = tuple(array("f", vector))
+                self._remember(key, embedding)
+                self.disk_hits += 1
+                results[i] = list(embedding)
+        return results
+
+    def _read_rows(self, keys: List[str]) -> Dict[str, bytes]:
+        """Reads the unexpired vectors for `keys` and refreshes their access time. Caller holds the lock."""
+        rows: Dict[str, bytes] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(unique_keys), 500):
+            batch = unique_keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for key, vector, accessed_at in self._conn.execute(
+                f"SELECT key, vector, accessed_at FROM embeddings WHERE key IN ({placeholders})", batch
+            ):
+                if not self._is_expired(accessed_at):
+                    rows[key] = vector
+        if rows:
+            now = time.time()
+            self._conn.executemany("UPDATE embeddings SET accessed_at = ? WHERE key = ?", [(now, key) for key in rows])
+            self._conn.commit()
+        return rows
+
+    def put(self, model: str, text: str, embedding: List[float]) -> None:
+        """
+        Stores an embedding in both tiers and prunes the disk tier if needed.
+
+        Args:
+            model (str): Embedding model name.
+            text (str): Embedded text.
+            embedding (List[float]): The embedding vector.
+        """
+        self.put_many(model, [(text, embedding)])
+
+    def put_many(self, model: str, items: List[Tuple[str, List[float]]]) -> None:
+        """Stores many (text, embedding) pairs in both tiers with a single commit."""
+        if not items:
+            return
+        entries = {embedding_cache_key(model, text): embedding for text, embedding in items}
+        with self._lock:
+            for key, embedding in entries.items():
+                self._remember(key, tuple(embedding))
+            try:
+                now = time.time()
+                inserted = 0
+                for key, embedding in entries.items():
+                    vector = array("f", embedding).tobytes()
+                    updated = self._conn.execute(
+                        "UPDATE embeddings SET model = ?, dim = ?, vector = ?, accessed_at = ? WHERE key = ?",
+                        (model, len(embedding), vector, now, key),
+                    ).rowcount
+                    if not updated:
+                        self._conn.execute(
+                            "INSERT INTO embeddings (key, model, dim, vector, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                            (key, model, len(embedding), vector, now),
+                        )
+                        inserted += 1
+                self._conn.commit()
+                self._row_count += inserted
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                print(f"[⚠️] Embedding cache write failed: {e}")
+                return
+
+            self._writes_since_prune += len(entries)
+            if self._row_count > self.max_rows or self._writes_since_prune >= PRUNE_EVERY_WRITES:
+                self._prune()
+
+    def _prune(self) -> None:
+        """Deletes expired rows, then the least recently used ones above the row limit. Caller holds the lock."""
+        self._writes_since_prune = 0
+        try:
+            removed = 0
+            if self.max_age_seconds > 0:
+                removed += self._conn.execute(
+                    "DELETE FROM embeddings WHERE accessed_at < ?", (time.time() - self.max_age_seconds,)
+                ).rowcount
+
+            # Trim an extra 10% so we don't prune again on every put
+            overflow = self._row_count - removed - self.max_rows
+            if overflow > 0:
+                overflow += self.max_rows // 10
+                removed += self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY accessed_at LIMIT ?)", (overflow,)
+                ).rowcount
+            self._conn.commit()
+            self._row_count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            self.evictions += removed
+        except sqlite3.Error as e:
+            print(f"[⚠️] Embedding cache prune failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns per-tier hit counters and the overall hit ratio."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_size": self.memory_size,
+                "disk_entries": self._row_count,
+                "max_rows": self.max_rows,
+                "max_age_seconds": self.max_age_seconds,
+                "evictions": self.evictions,
+            }
+
+
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MEMORY_SIZE)
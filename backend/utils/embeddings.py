@@ -1,42 +1,73 @@
-import openai
-from pinecone import Pinecone, ServerlessSpec
-import uuid
-from typing import List
+import asyncio
+from typing import List, Dict, Tuple, Any, Optional
 import os
+from utils.embedding_cache import embedding_cache
+from utils.vector_store import VectorStore, create_vector_store
+from utils.concurrency import run_blocking
+from utils.stage_timing import stage, collect_stages, merge_stages, EMBEDDING, VECTOR_UPSERT, VECTOR_QUERY
+from utils.llm_client import (
+    openai_calls, get_openai_client, get_async_openai_client, estimate_tokens, is_retryable, CircuitOpenError
+)
 
-# Initialize Pinecone
-PINECONE_API_KEY = os.getenv("PINECONE_KEY")
-PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT") 
-INDEX_NAME = os.getenv("INDEX_NAME")
+EMBEDDING_MODEL = "text-embedding-3-large"
 
-def init_pinecone():
-    """Initialize Pinecone connection and return index."""
-    try:
-        # Initialize Pinecone client
-        pc = Pinecone(api_key=PINECONE_API_KEY)
+# Batch limits (OpenAI accepts up to 2048 inputs per embeddings request)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+EMBEDDING_BATCH_MAX_CHARS = int(os.getenv("EMBEDDING_BATCH_MAX_CHARS", "600000"))
+# How long EmbeddingBatcher waits for more resumes before sending a batch
+EMBEDDING_BATCH_WINDOW_SECONDS = float(os.getenv("EMBEDDING_BATCH_WINDOW_SECONDS", "0.2"))
+PINECONE_UPSERT_BATCH_SIZE = int(os.getenv("PINECONE_UPSERT_BATCH_SIZE", "100"))
 
-        # List existing indexes
-        existing_indexes = pc.list_indexes().names()
+# Vector store backend, selected via main.Settings (falls back to the environment)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", "vector_store")
 
-        # Ensure the index exists before connecting
-        if INDEX_NAME not in existing_indexes:
-            print(f"[⚠️] Index '{INDEX_NAME}' does not exist")
-            return
+_vector_store: Optional[VectorStore] = None
+_vector_store_initialized = False
 
-        # Connect to the index
-        index = pc.Index(INDEX_NAME)
-        print(f"[✅] Connected to Pinecone index: {INDEX_NAME}")
-        return index
+# Resume ids whose vectors matched a search but no longer exist in the database
+_stale_resume_ids = set()
 
-    except Exception as e:
-        print(f"[❌] Error initializing Pinecone: {e}")
-        return None
-    
-index = init_pinecone()
+def _create_embeddings(inputs: List[str]):
+    return openai_calls.call(
+        lambda: get_openai_client().embeddings.create(input=inputs, model=EMBEDDING_MODEL),
+        tokens=estimate_tokens(*inputs, completion=0),
+    )
+
+async def _create_embeddings_async(inputs: List[str]):
+    return await openai_calls.call_async(
+        lambda: get_async_openai_client().embeddings.create(input=inputs, model=EMBEDDING_MODEL),
+        tokens=estimate_tokens(*inputs, completion=0),
+    )
+
+def configure_vector_store(backend: str, local_path: str) -> Optional[VectorStore]:
+    """
+    Selects and initializes the vector store backend.
+
+    Args:
+        backend (str): 'pinecone' or 'local'.
+        local_path (str): Directory used by the local backend.
+
+    Returns:
+        Optional[VectorStore]: The initialized store, or None on failure.
+    """
+    global _vector_store, _vector_store_initialized
+    _vector_store = create_vector_store(backend, local_path)
+    _vector_store_initialized = True
+    return _vector_store
+
+def get_vector_store() -> Optional[VectorStore]:
+    """Returns the active vector store, initializing it from the environment on first use."""
+    if not _vector_store_initialized:
+        configure_vector_store(VECTOR_STORE_BACKEND, LOCAL_VECTOR_STORE_PATH)
+    return _vector_store
 
 def generate_embeddings(text: str) -> List[float]:
     """
     Generates an embedding for the given text using OpenAI.
+
+    Embeddings are served from the embedding cache when the same text was
+    embedded before with the same model.
     
     Args:
         text (str): The input text to embed.
@@ -44,21 +75,260 @@ def generate_embeddings(text: str) -> List[float]:
     Returns:
         List[float]: A list of floating-point numbers representing the embedding.
     """
+    cached_embedding = embedding_cache.get(EMBEDDING_MODEL, text)
+    if cached_embedding is not None:
+        print(f"[✅] Embedding cache hit for: '{text[:30]}...'")
+        return cached_embedding
+
+    try:
+        with stage(EMBEDDING):
+            response = _create_embeddings([text])
+        embedding = response.data[0].embedding
+        print(f"[✅] Successfully generated embedding for: '{text[:30]}...'")
+        embedding_cache.put(EMBEDDING_MODEL, text, embedding)
+        return embedding
+    except Exception as e:
+        print(f"[❌] Error generating embedding: {e}")
+        return []
+
+async def generate_embeddings_async(text: str) -> List[float]:
+    """Async variant of generate_embeddings; the SQLite cache is read and written on the blocking pool."""
+    cached_embedding = await run_blocking(embedding_cache.get, EMBEDDING_MODEL, text)
+    if cached_embedding is not None:
+        print(f"[✅] Embedding cache hit for: '{text[:30]}...'")
+        return cached_embedding
+
     try:
-        response = openai.embeddings.create(input=[text], model="text-embedding-3-large")
+        with stage(EMBEDDING):
+            response = await _create_embeddings_async([text])
         embedding = response.data[0].embedding
         print(f"[✅] Successfully generated embedding for: '{text[:30]}...'")
+        await run_blocking(embedding_cache.put, EMBEDDING_MODEL, text, embedding)
         return embedding
     except Exception as e:
         print(f"[❌] Error generating embedding: {e}")
         return []
 
-import uuid
-from typing import Optional
+def _chunk_indices(texts: List[str], indices: List[int]) -> List[List[int]]:
+    """Groups text indices into chunks that respect the provider's request limits."""
+    chunks, current, current_chars = [], [], 0
+    for i in indices:
+        text_chars = len(texts[i])
+        if current and (len(current) >= EMBEDDING_BATCH_SIZE or current_chars + text_chars > EMBEDDING_BATCH_MAX_CHARS):
+            chunks.append(current)
+            current, current_chars = [], 0
+        current.append(i)
+        current_chars += text_chars
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_cached(texts: List[str]) -> Tuple[List[List[float]], Dict[int, str], List[int]]:
+    """Fills cached embeddings and returns (embeddings, errors, positions still to embed)."""
+    embeddings: List[List[float]] = [[] for _ in texts]
+    errors: Dict[int, str] = {}
+
+    lookups = []
+    for i, text in enumerate(texts):
+        if not text or not text.strip():
+            errors[i] = "Empty text"
+        else:
+            lookups.append(i)
+
+    # One cache call for the whole batch: a single SQLite read and commit
+    cached = embedding_cache.get_many(EMBEDDING_MODEL, [texts[i] for i in lookups])
+    pending = []
+    for i, cached_embedding in zip(lookups, cached):
+        if cached_embedding is not None:
+            embeddings[i] = cached_embedding
+        else:
+            pending.append(i)
+    return embeddings, errors, pending
+
+
+def _cache_new_embeddings(texts: List[str], pending: List[int], embeddings: List[List[float]]) -> None:
+    """Writes the freshly generated embeddings to the cache in one transaction."""
+    embedding_cache.put_many(EMBEDDING_MODEL, [(texts[i], embeddings[i]) for i in pending if embeddings[i]])
+
+
+def _apply_embedding_response(texts: List[str], chunk: List[int], response, embeddings: List[List[float]]) -> None:
+    """Copies one embeddings response into the aligned result list."""
+    for item in response.data:
+        embeddings[chunk[item.index]] = item.embedding
+    print(f"[✅] Generated {len(chunk)} embeddings in one request")
+
+
+def _record_chunk_failure(chunk: List[int], errors: Dict[int, str], error: Exception) -> None:
+    print(f"[❌] Error generating embeddings for a batch of {len(chunk)}: {error}")
+    for i in chunk:
+        errors[i] = f"Embedding request failed: {error}"
+
+
+def _should_split(chunk: List[int], error: Exception) -> bool:
+    """
+    A rejected multi-item request is split in half to isolate the bad inputs
+    (e.g. one text over the model's token limit). Transient errors were already
+    retried by the call layer and would fail the halves the same way.
+    """
+    return len(chunk) > 1 and not is_retryable(error) and not isinstance(error, CircuitOpenError)
+
+
+def _embed_chunk(texts: List[str], chunk: List[int], embeddings: List[List[float]], errors: Dict[int, str]) -> None:
+    try:
+        with stage(EMBEDDING):
+            response = _create_embeddings([texts[i] for i in chunk])
+        _apply_embedding_response(texts, chunk, response, embeddings)
+    except Exception as e:
+        if not _should_split(chunk, e):
+            _record_chunk_failure(chunk, errors, e)
+            return
+        middle = len(chunk) // 2
+        _embed_chunk(texts, chunk[:middle], embeddings, errors)
+        _embed_chunk(texts, chunk[middle:], embeddings, errors)
+
+
+async def _embed_chunk_async(texts: List[str], chunk: List[int], embeddings: List[List[float]],
+                             errors: Dict[int, str]) -> None:
+    try:
+        with stage(EMBEDDING):
+            response = await _create_embeddings_async([texts[i] for i in chunk])
+        _apply_embedding_response(texts, chunk, response, embeddings)
+    except Exception as e:
+        if not _should_split(chunk, e):
+            _record_chunk_failure(chunk, errors, e)
+            return
+        middle = len(chunk) // 2
+        await asyncio.gather(
+            _embed_chunk_async(texts, chunk[:middle], embeddings, errors),
+            _embed_chunk_async(texts, chunk[middle:], embeddings, errors),
+        )
+
+
+def _embed_texts(texts: List[str]) -> Tuple[List[List[float]], Dict[int, str]]:
+    """
+    Embeds many texts with one API request per chunk.
+
+    When the provider rejects a chunk, it is bisected until only the inputs
+    that fail on their own are reported, so one bad text never fails its chunk.
+
+    Returns:
+        Tuple: Embeddings aligned with `texts` ([] where it failed) and a
+        mapping of failed positions to error messages.
+    """
+    embeddings, errors, pending = _split_cached(texts)
+
+    for chunk in _chunk_indices(texts, pending):
+        _embed_chunk(texts, chunk, embeddings, errors)
+
+    _cache_new_embeddings(texts, pending, embeddings)
+    return embeddings, errors
+
+
+async def _embed_texts_async(texts: List[str]) -> Tuple[List[List[float]], Dict[int, str]]:
+    """Async variant of _embed_texts; chunks are requested concurrently and cache I/O runs on the blocking pool."""
+    embeddings, errors, pending = await run_blocking(_split_cached, texts)
+
+    await asyncio.gather(*(
+        _embed_chunk_async(texts, chunk, embeddings, errors) for chunk in _chunk_indices(texts, pending)
+    ))
+    await run_blocking(_cache_new_embeddings, texts, pending, embeddings)
+    return embeddings, errors
+
+
+def generate_embeddings_batch(texts: List[str]) -> List[List[float]]:
+    """
+    Generates embeddings for many texts, chunked to the provider's limits.
+
+    Args:
+        texts (List[str]): The input texts to embed.
+
+    Returns:
+        List[List[float]]: Embeddings aligned with `texts`; an empty list marks
+        an item that could not be embedded.
+    """
+    embeddings, _ = _embed_texts(texts)
+    return embeddings
+
+
+VECTOR_ID_PREFIX = "resume-"
+
+def _vector_id(resume_id: int) -> str:
+    """Returns the deterministic vector ID for a resume."""
+    return f"{VECTOR_ID_PREFIX}{resume_id}"
+
+
+def _upsert_embeddings(vector_store: VectorStore, items: List[Tuple[str, int]], embeddings: List[List[float]],
+                       errors: Dict[int, str]) -> Dict[str, Any]:
+    """Upserts embedded items in bulk batches and reports per-item outcomes."""
+    result: Dict[str, Any] = {"stored": [], "failed": {}}
+
+    vectors = []
+    for i, (text, resume_id) in enumerate(items):
+        if i in errors:
+            result["failed"][resume_id] = errors[i]
+        else:
+            vectors.append((resume_id, (_vector_id(resume_id), embeddings[i], {"text": text, "id": str(resume_id)})))
+
+    for start in range(0, len(vectors), PINECONE_UPSERT_BATCH_SIZE):
+        batch = vectors[start:start + PINECONE_UPSERT_BATCH_SIZE]
+        try:
+            with stage(VECTOR_UPSERT):
+                vector_store.upsert([vector for _, vector in batch])
+            result["stored"].extend(resume_id for resume_id, _ in batch)
+        except Exception as e:
+            print(f"[❌] Error upserting {len(batch)} embeddings in vector store: {e}")
+            for resume_id, _ in batch:
+                result["failed"][resume_id] = f"Upsert failed: {e}"
+
+    print(f"[✅] Stored {len(result['stored'])} embeddings, {len(result['failed'])} failed")
+    return result
+
+
+def _vector_store_unavailable(items: List[Tuple[str, int]]) -> Dict[str, Any]:
+    print("[⚠️] Vector store not initialized. Skipping storage.")
+    return {"stored": [], "failed": {resume_id: "Vector store not initialized" for _, resume_id in items}}
+
+
+def store_embeddings_batch(items: List[Tuple[str, int]]) -> Dict[str, Any]:
+    """
+    Embeds and upserts many resumes using bulk requests.
+
+    Args:
+        items (List[Tuple[str, int]]): (text, resume id) pairs.
+
+    Returns:
+        dict: {"stored": [resume ids], "failed": {resume id: error message}}.
+    """
+    if not items:
+        return {"stored": [], "failed": {}}
+
+    vector_store = get_vector_store()
+    if vector_store is None:
+        return _vector_store_unavailable(items)
+
+    embeddings, errors = _embed_texts([text for text, _ in items])
+    return _upsert_embeddings(vector_store, items, embeddings, errors)
+
+
+async def store_embeddings_batch_async(items: List[Tuple[str, int]]) -> Dict[str, Any]:
+    """Async variant of store_embeddings_batch; vector store calls run on the blocking pool."""
+    if not items:
+        return {"stored": [], "failed": {}}
+
+    vector_store = await run_blocking(get_vector_store)
+    if vector_store is None:
+        return _vector_store_unavailable(items)
+
+    embeddings, errors = await _embed_texts_async([text for text, _ in items])
+    return await run_blocking(_upsert_embeddings, vector_store, items, embeddings, errors)
 
 def store_embedding(text: str, id: int) -> int:
     """
-    Stores or updates an embedding in the Pinecone index with error handling.
+    Stores or updates an embedding in the vector store with error handling.
+
+    The vector ID is derived from the resume id, so storing the same resume
+    again is a single idempotent upsert that overwrites the previous vector.
 
     Args:
         text (str): The input text to embed and store.
@@ -67,73 +337,121 @@ def store_embedding(text: str, id: int) -> int:
     Returns:
         int: 1 if success, 0 if failure.
     """
-    
-    if index is None:
-        print("[⚠️] Pinecone index not initialized. Skipping storage.")
-        return 0
+    result = store_embeddings_batch([(text, id)])
 
-    embedding = generate_embeddings(text)
-    
-    if not embedding:
-        print("[⚠️] Failed to generate embedding. Skipping storage.")
-        return 0
-    
-    try:
-        # Check if an embedding with the given "id" already exists
-        existing_results = index.query(vector=embedding, top_k=1, include_metadata=True)
+    if id in result["stored"]:
+        print(f"[✅] Upserted embedding with ID: {_vector_id(id)}")
+        return 1
 
-        existing_pinecone_id: Optional[str] = None
-        for match in existing_results["matches"]:
-            if match["metadata"].get("id") == str(id):
-                existing_pinecone_id = match["id"]
-                break
+    print(f"[❌] Error storing embedding in vector store: {result['failed'].get(id)}")
+    return 0
 
-        # Use the existing Pinecone ID if found, otherwise generate a new one
-        pinecone_id = existing_pinecone_id if existing_pinecone_id else str(uuid.uuid4())
+async def store_embedding_async(text: str, id: int) -> int:
+    """Async variant of store_embedding."""
+    result = await store_embeddings_batch_async([(text, id)])
 
-        # Upsert (update if exists, insert if not)
-        index.upsert(vectors=[(pinecone_id, embedding, {"text": text, "id": str(id)})])
+    if id in result["stored"]:
+        print(f"[✅] Upserted embedding with ID: {_vector_id(id)}")
+        return 1
 
-        if existing_pinecone_id:
-            print(f"[✅] Updated embedding with ID: {existing_pinecone_id}")
-        else:
-            print(f"[✅] Stored new embedding with ID: {pinecone_id}")
+    print(f"[❌] Error storing embedding in vector store: {result['failed'].get(id)}")
+    return 0
 
-        return 1
-    except Exception as e:
-        print(f"[❌] Error storing embedding in Pinecone: {e}")
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent store_embedding_async calls into store_embeddings_batch_async.
+
+    Resumes submitted within `window_seconds` of the first pending one (up to
+    `max_items`) share one embeddings request and one vector upsert, so
+    pipelines running side by side (bulk ingestion) don't embed one file at a
+    time. Every caller gets its own outcome, and the batch's stage timings are
+    merged into each caller's collector.
+    """
+
+    def __init__(self, window_seconds: float = EMBEDDING_BATCH_WINDOW_SECONDS,
+                 max_items: int = EMBEDDING_BATCH_SIZE):
+        self.window_seconds = window_seconds
+        self.max_items = max_items
+        self._pending: List[Tuple[str, int, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def store(self, text: str, id: int) -> int:
+        """Drop-in replacement for store_embedding_async: 1 if stored, 0 if not."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, id, future))
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        stored, error, timings = await future
+        merge_stages(timings)
+        if stored:
+            print(f"[✅] Upserted embedding with ID: {_vector_id(id)}")
+            return 1
+        print(f"[❌] Error storing embedding in vector store: {error}")
         return 0
 
-    
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._pending = self._pending, []
+        if items:
+            task = asyncio.get_running_loop().create_task(self._store_batch(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
 
-def match_embeddings(user_embedding, top_k=3):
+    async def _store_batch(self, items: List[Tuple[str, int, asyncio.Future]]) -> None:
+        # A collector of its own, so the batch isn't charged to whichever caller scheduled it
+        with collect_stages() as timings:
+            try:
+                result = await store_embeddings_batch_async([(text, id) for text, id, _ in items])
+            except Exception as e:
+                result = {"stored": [], "failed": {id: str(e) for _, id, _ in items}}
+        stored = set(result["stored"])
+        print(f"[INFO] Embedded a batch of {len(items)} resumes")
+        for _, id, future in items:
+            if not future.done():
+                future.set_result((id in stored, result["failed"].get(id), timings))
+
+
+embedding_batcher = EmbeddingBatcher()
+
+
+
+def match_embeddings_with_scores(user_embedding, top_k=3):
     """
-    Matches the user_embedding against stored embeddings in Pinecone and returns
-    the index of the most similar match.
+    Matches the user_embedding against stored embeddings in the vector store and
+    returns the resume ids of the most similar matches with their similarity.
 
     Parameters:
     - user_embedding (list): The query embedding.
-    - index (pinecone.Index): The Pinecone index to query.
-    - top_k (int): Number of top matches to retrieve (default is 1).
+    - top_k (int): Number of top matches to retrieve (default is 3).
 
     Returns:
-    - str: The ID of the highest similarity match.
+    - list: (resume id, score) tuples of the top matches, ordered by similarity.
+      None if nothing matched, -1 if the search failed.
     """
     
-    if index is None:
-        print("[⚠️] Pinecone index not initialized. Skipping storage.")
+    vector_store = get_vector_store()
+    if vector_store is None:
+        print("[⚠️] Vector store not initialized. Skipping search.")
         return -1
     
     try:
         # Perform similarity search
-        results = index.query(vector=user_embedding, top_k=top_k, include_metadata=True)
+        with stage(VECTOR_QUERY):
+            top_matches = vector_store.query(user_embedding, top_k)
 
-        if results and results['matches']:
-            top_matches = results['matches']  
-            match_ids = [match['metadata']['id'] for match in top_matches]  # Extract IDs
+        if top_matches:
+            matches = [(match['metadata']['id'], float(match['score'])) for match in top_matches]
 
-            print(f"[✅] Top {top_k} Matches: {match_ids}")
-            return match_ids
+            print(f"[✅] Top {top_k} Matches: {[match_id for match_id, _ in matches]}")
+            return matches
         else:
             print("[⚠️] No matches found.")
             return None
@@ -142,3 +460,63 @@ def match_embeddings(user_embedding, top_k=3):
         print(f"[❌] Error matching embeddings: {e}")
         return -1
 
+
+def match_embeddings(user_embedding, top_k=3):
+    """
+    Matches the user_embedding against stored embeddings in the vector store and
+    returns the resume ids of the most similar matches.
+
+    Parameters:
+    - user_embedding (list): The query embedding.
+    - top_k (int): Number of top matches to retrieve (default is 3).
+
+    Returns:
+    - list: Resume IDs of the top matches, ordered by similarity.
+    """
+    matches = match_embeddings_with_scores(user_embedding, top_k)
+    if not matches or matches == -1:
+        return matches
+    return [match_id for match_id, _ in matches]
+
+
+async def match_embeddings_async(user_embedding, top_k=3):
+    """Async variant of match_embeddings; the vector store query runs on the blocking pool."""
+    return await run_blocking(match_embeddings, user_embedding, top_k)
+
+
+async def match_embeddings_with_scores_async(user_embedding, top_k=3):
+    """Async variant of match_embeddings_with_scores."""
+    return await run_blocking(match_embeddings_with_scores, user_embedding, top_k)
+
+
+def queue_stale_vectors(resume_ids: List[Any]) -> None:
+    """Queues the vectors of deleted resumes for removal from the vector store."""
+    _stale_resume_ids.update(int(resume_id) for resume_id in resume_ids)
+
+
+def purge_stale_vectors() -> int:
+    """
+    Deletes every queued stale vector from the vector store.
+
+    Returns:
+        int: Number of vectors deleted.
+    """
+    vector_store = get_vector_store()
+    if vector_store is None or not _stale_resume_ids:
+        return 0
+
+    resume_ids = list(_stale_resume_ids)
+    _stale_resume_ids.difference_update(resume_ids)
+    try:
+        vector_store.delete([_vector_id(resume_id) for resume_id in resume_ids])
+        print(f"[🗑️] Removed {len(resume_ids)} stale vectors")
+        return len(resume_ids)
+    except Exception as e:
+        print(f"[❌] Error removing stale vectors: {e}")
+        _stale_resume_ids.update(resume_ids)  # Retry on the next purge
+        return 0
+
+
+async def purge_stale_vectors_async() -> int:
+    """Async variant of purge_stale_vectors."""
+    return await run_blocking(purge_stale_vectors)
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Cache configuration from environment variables
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", os.path.join("cache", "extractions"))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+EXTRACTION_CACHE_MAX_AGE_SECONDS = int(os.getenv("EXTRACTION_CACHE_MAX_AGE_SECONDS", str(30 * 24 * 3600)))
+
+# Part of every cache key. Bump it whenever extractor prompts or the output schema
+# change so results from the old prompts stop being served (they age out on disk).
+# v2: compacted, chunked prompts. v3: hybrid local/LLM extraction.
+EXTRACTION_SCHEMA_VERSION = 3
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """
+    Computes the SHA-256 digest of a file without loading it fully into memory.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        str: Hex encoded SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Disk backed cache of structured resume JSON keyed by (content hash, model type,
+    schema version).
+
+    Each entry is a JSON file whose modification time doubles as its last access
+    time, so eviction drops expired entries first and then the least recently used
+    ones once the cache grows past `max_entries`.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int, max_age_seconds: int,
+                 schema_version: int = EXTRACTION_SCHEMA_VERSION):
+        self.cache_dir = cache_dir
+        self.schema_version = schema_version
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._entry_count = len(self._scan())
+
+    def _entry_path(self, content_hash: str, model_type: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.{model_type}.v{self.schema_version}.json")
+
+    def _is_expired(self, mtime: float) -> bool:
+        return self.max_age_seconds > 0 and time.time() - mtime > self.max_age_seconds
+
+    def get(self, content_hash: str, model_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached extraction for a document, or None on a miss.
+
+        Args:
+            content_hash (str): SHA-256 of the PDF bytes.
+            model_type (str): Extractor that produced the entry.
+
+        Returns:
+            Optional[dict]: Structured resume data if cached and still fresh.
+        """
+        path = self._entry_path(content_hash, model_type)
+        data = None
+        try:
+            if self._is_expired(os.path.getmtime(path)):
+                if self._remove(path):
+                    with self._lock:
+                        self._entry_count -= 1
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            data = None
+
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def contains(self, content_hash: str, model_type: str) -> bool:
+        """Checks for a fresh entry without touching the hit/miss counters."""
+        try:
+            return not self._is_expired(os.path.getmtime(self._entry_path(content_hash, model_type)))
+        except OSError:
+            return False
+
+    def put(self, content_hash: str, model_type: str, data: Dict[str, Any]) -> None:
+        """
+        Stores a structured extraction and evicts old entries if needed.
+
+        Args:
+            content_hash (str): SHA-256 of the PDF bytes.
+            model_type (str): Extractor that produced the data.
+            data (dict): Structured resume data.
+        """
+        path = self._entry_path(content_hash, model_type)
+        is_new = not os.path.exists(path)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[⚠️] Failed to write extraction cache entry: {e}")
+            self._remove(tmp_path)
+            return
+
+        with self._lock:
+            if is_new:
+                self._entry_count += 1
+            needs_eviction = self._entry_count > self.max_entries
+        if needs_eviction:
+            self._evict()
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _scan(self):
+        """Lists (mtime, path) for every cache entry on disk."""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        continue
+        return entries
+
+    def _evict(self) -> None:
+        """Drops expired entries, then the least recently used ones above the size limit."""
+        with self._lock:
+            entries = sorted(self._scan())
+            fresh = []
+            for mtime, path in entries:
+                if self._is_expired(mtime):
+                    self.evictions += self._remove(path)
+                else:
+                    fresh.append(path)
+
+            # Trim an extra 10% so we don't rescan the directory on every put
+            overflow = len(fresh) - self.max_entries
+            if overflow > 0:
+                overflow += self.max_entries // 10
+                for path in fresh[:overflow]:
+                    self.evictions += self._remove(path)
+                fresh = fresh[overflow:]
+
+            self._entry_count = len(fresh)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and the current number of entries."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": self._entry_count,
+                "max_entries": self.max_entries,
+                "max_age_seconds": self.max_age_seconds,
+                "schema_version": self.schema_version,
+            }
+
+
+extraction_cache = ExtractionCache(
+    EXTRACTION_CACHE_DIR,
+    EXTRACTION_CACHE_MAX_ENTRIES,
+    EXTRACTION_CACHE_MAX_AGE_SECONDS,
+)
@@ -0,0 +1,109 @@
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+from utils.metrics import registry, Counter
+from utils.pdf_text import probe_text_layer, probe_text_layer_async
+from utils.stage_timing import stage, record_detail, ROUTING_PROBE
+
+AUTO_MODEL_TYPE = "auto"
+
+# Routing settings from environment variables
+AUTO_TEXT_MODEL_TYPE = os.getenv("AUTO_TEXT_MODEL_TYPE", "gpt_fitz")  # Born-digital PDFs
+AUTO_OCR_MODEL_TYPE = os.getenv("AUTO_OCR_MODEL_TYPE", "mistral")  # Scanned PDFs
+AUTO_MIN_CHARS_PER_PAGE = int(os.getenv("AUTO_MIN_CHARS_PER_PAGE", "200"))
+AUTO_MAX_IMAGE_COVERAGE = float(os.getenv("AUTO_MAX_IMAGE_COVERAGE", "0.5"))
+AUTO_MIN_TEXT_PAGE_RATIO = float(os.getenv("AUTO_MIN_TEXT_PAGE_RATIO", "0.8"))
+
+# Pages with less image coverage than this and little text are treated as blank and ignored
+BLANK_PAGE_IMAGE_COVERAGE = 0.05
+
+routing_decisions = registry.register(Counter(
+    "resume_extractor_routing_total", "Extractor chosen for 'auto' uploads.", ["model_type"]
+))
+
+
+def choose_model_type(page_count: int, samples: List[Tuple[int, float]]) -> Dict[str, Any]:
+    """
+    Decides between the text-layer and the OCR extractor from a text layer probe.
+
+    A page has a usable text layer when it carries at least AUTO_MIN_CHARS_PER_PAGE
+    characters and images cover at most AUTO_MAX_IMAGE_COVERAGE of it. Full-page
+    scans fail the coverage check even when they carry a hidden OCR layer.
+    Near-empty pages without images are ignored.
+
+    Args:
+        page_count (int): Pages in the document.
+        samples (List[Tuple[int, float]]): (characters, image coverage) per probed page.
+
+    Returns:
+        dict: The chosen model type, the reason and the probe measurements.
+    """
+    counted = [
+        (chars, coverage) for chars, coverage in samples
+        if chars >= AUTO_MIN_CHARS_PER_PAGE or coverage >= BLANK_PAGE_IMAGE_COVERAGE
+    ]
+    text_pages = sum(
+        1 for chars, coverage in counted if chars >= AUTO_MIN_CHARS_PER_PAGE and coverage <= AUTO_MAX_IMAGE_COVERAGE
+    )
+
+    if counted:
+        ratio = text_pages / len(counted)
+        born_digital = ratio >= AUTO_MIN_TEXT_PAGE_RATIO
+        reason = f"{text_pages}/{len(counted)} probed pages have a usable text layer"
+    else:
+        born_digital = any(chars for chars, _ in samples)
+        reason = "only sparse pages" + (" with some text" if born_digital else " without text")
+
+    return {
+        "model_type": AUTO_TEXT_MODEL_TYPE if born_digital else AUTO_OCR_MODEL_TYPE,
+        "reason": reason,
+        "page_count": page_count,
+        "pages_probed": len(samples),
+        "text_pages": text_pages,
+        "chars_per_page": round(sum(chars for chars, _ in samples) / len(samples), 1) if samples else 0.0,
+        "image_coverage": round(max((coverage for _, coverage in samples), default=0.0), 3),
+    }
+
+
+def _record(decision: Dict[str, Any], seconds: float) -> str:
+    decision["probe_seconds"] = round(seconds, 4)
+    record_detail("routing", decision)
+    routing_decisions.inc(model_type=decision["model_type"])
+    print(f"[INFO] Routed to '{decision['model_type']}' ({decision['reason']}) in {seconds * 1000:.1f} ms")
+    return decision["model_type"]
+
+
+def _probe_failed(error: Exception) -> Dict[str, Any]:
+    # A PDF PyMuPDF cannot read has no text layer to rely on, so let OCR try it
+    return {"model_type": AUTO_OCR_MODEL_TYPE, "reason": f"probe failed: {str(error) or type(error).__name__}"}
+
+
+def resolve_model_type(pdf_path: str) -> str:
+    """
+    Picks the extractor for an 'auto' upload from a PyMuPDF probe of its text layer.
+
+    The decision and the probe time are recorded as the "routing" detail of
+    the active stage collector (and so in the ingestion trace).
+
+    Returns:
+        str: AUTO_TEXT_MODEL_TYPE for born-digital PDFs, AUTO_OCR_MODEL_TYPE for scans.
+    """
+    start = time.perf_counter()
+    try:
+        with stage(ROUTING_PROBE):
+            decision = choose_model_type(*probe_text_layer(pdf_path))
+    except Exception as e:
+        decision = _probe_failed(e)
+    return _record(decision, time.perf_counter() - start)
+
+
+async def resolve_model_type_async(pdf_path: str) -> str:
+    """Async variant of resolve_model_type; the probe runs in the PDF process pool."""
+    start = time.perf_counter()
+    try:
+        with stage(ROUTING_PROBE):
+            decision = choose_model_type(*await probe_text_layer_async(pdf_path))
+    except Exception as e:
+        decision = _probe_failed(e)
+    return _record(decision, time.perf_counter() - start)
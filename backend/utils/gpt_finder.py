@@ -1,14 +1,85 @@
-from openai import OpenAI
+import asyncio
+import copy
 import os
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 
-client = OpenAI(
-    api_key=os.getenv('OPENAI_API_KEY'),
-)
+from utils.stage_timing import stage, PROMPT_LLM
+from utils.llm_client import openai_calls, get_openai_client, get_async_openai_client, estimate_tokens
 
-def extract_prompt_info(description: str) -> Dict[str, Any]:
-    print("Generating information based on user prompt")
-    prompt = f"""Extract relevant resume details from the given user description. 
+SYSTEM_PROMPT = "You are an expert in analyzing user descriptions to extract resume-related information."
+
+# Prompt info cache settings from environment variables
+PROMPT_INFO_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_INFO_CACHE_TTL_SECONDS", "3600"))
+PROMPT_INFO_CACHE_MAX_ENTRIES = int(os.getenv("PROMPT_INFO_CACHE_MAX_ENTRIES", "1024"))
+
+
+def normalize_prompt(description: str) -> str:
+    """Collapses case and whitespace so equivalent prompts share a cache entry."""
+    return " ".join(description.lower().split())
+
+
+class PromptInfoCache:
+    """
+    Thread-safe TTL + LRU cache of extracted prompt info keyed by normalized prompt.
+
+    Repeated searches with the same wording skip the GPT-4 call entirely.
+    Values are copied on the way in and out so callers cannot mutate the cache.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, description: str) -> Optional[Dict[str, Any]]:
+        key = normalize_prompt(description)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, description: str, info: Dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        key = normalize_prompt(description)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(info))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+prompt_info_cache = PromptInfoCache(PROMPT_INFO_CACHE_TTL_SECONDS, PROMPT_INFO_CACHE_MAX_ENTRIES)
+
+# Normalized prompt -> GPT-4 request in progress, shared by concurrent identical searches
+_inflight_prompts: Dict[str, "asyncio.Task"] = {}
+
+def _build_prompt(description: str) -> str:
+    return f"""Extract relevant resume details from the given user description. 
 The user may provide explicit or implicit information about their skills, work experience, education, certifications, projects, or GPA.
 
 Extract and classify the following fields:
@@ -26,15 +97,8 @@ If a field is not mentioned, return it as an empty list.
     
     Return the extracted information in JSON format without explanations or extra text.
     """
-    
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": "You are an expert in analyzing user descriptions to extract resume-related information."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    
+
+def _parse_prompt_info(response) -> Dict[str, Any]:
     extracted_data = response.choices[0].message.content.strip()
     print(extracted_data)
     
@@ -50,4 +114,78 @@ If a field is not mentioned, return it as an empty list.
         "certifications": resume_info.get("Certifications", []),
         "projects": resume_info.get("Projects", []),
         "gpa": resume_info.get("Gpa", "0")
-    }
\ No newline at end of file
+    }
+
+def _is_cacheable(info: Dict[str, Any]) -> bool:
+    """Only cache responses that parsed into at least one field."""
+    return any(info[field] for field in ("skills", "work_experience", "education", "certifications", "projects"))
+
+def _messages(description: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": _build_prompt(description)}
+    ]
+
+def _estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    return estimate_tokens(*(message["content"] for message in messages))
+
+def extract_prompt_info(description: str) -> Dict[str, Any]:
+    cached = prompt_info_cache.get(description)
+    if cached is not None:
+        print("Using cached prompt information")
+        return cached
+
+    print("Generating information based on user prompt")
+    messages = _messages(description)
+    with stage(PROMPT_LLM):
+        response = openai_calls.call(
+            lambda: get_openai_client().chat.completions.create(model="gpt-4", messages=messages),
+            tokens=_estimate_tokens(messages),
+        )
+    info = _parse_prompt_info(response)
+    if _is_cacheable(info):
+        prompt_info_cache.put(description, info)
+    return info
+
+async def _request_prompt_info_async(description: str) -> Dict[str, Any]:
+    print("Generating information based on user prompt")
+    messages = _messages(description)
+    response = await openai_calls.call_async(
+        lambda: get_async_openai_client().chat.completions.create(model="gpt-4", messages=messages),
+        tokens=_estimate_tokens(messages),
+    )
+    info = _parse_prompt_info(response)
+    if _is_cacheable(info):
+        prompt_info_cache.put(description, info)
+    return info
+
+def _forget_prompt_request(key: str, task: "asyncio.Task") -> None:
+    if _inflight_prompts.get(key) is task:
+        del _inflight_prompts[key]
+    if not task.cancelled():
+        task.exception()  # Retrieved even when every waiter was cancelled
+
+async def extract_prompt_info_async(description: str) -> Dict[str, Any]:
+    """
+    Async variant of extract_prompt_info.
+
+    Concurrent calls with the same normalized prompt share one GPT-4 request
+    instead of each missing the cache. The request runs as its own task, so a
+    cancelled caller (e.g. a client that disconnected) doesn't fail the others.
+    """
+    cached = prompt_info_cache.get(description)
+    if cached is not None:
+        print("Using cached prompt information")
+        return cached
+
+    key = normalize_prompt(description)
+    task = _inflight_prompts.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_request_prompt_info_async(description))
+        _inflight_prompts[key] = task
+        task.add_done_callback(lambda done: _forget_prompt_request(key, done))
+    else:
+        print("Waiting for the in-flight request for the same prompt")
+    with stage(PROMPT_LLM):
+        info = await asyncio.shield(task)
+    return copy.deepcopy(info)
@@ -1,15 +1,102 @@
-import fitz  # PyMuPDF for PDF text extraction
 import json
 import os
-from openai import OpenAI
+from utils.concurrency import run_blocking
+from utils.pdf_text import extract_pdf_pages, extract_pdf_pages_async
+from utils.stage_timing import stage, record_token_usage, PDF_PARSE, LLM, JSON_PARSE
+from utils.prompt_compaction import prepare_resume_chunks, extract_chunks, extract_chunks_async
+from utils.local_parser import extract_hybrid, extract_hybrid_async
+from utils.llm_client import openai_calls, get_openai_client, get_async_openai_client, estimate_tokens
 
-# Initialize OpenAI client
+# The OpenAI client is shared through utils.llm_client, which also rate limits and retries calls
 api_key = os.getenv('OPENAI_API_KEY')
 if not api_key:
     raise ValueError("Missing OpenAI API key. Set 'OPENAI_API_KEY' in the environment.")
 
-client = OpenAI(api_key=api_key)
-print("[INFO] OpenAI client initialized successfully.")
+SYSTEM_PROMPT = "You extract structured information from resumes and return JSON."
+
+
+def _check_extracted_text(pages):
+    if not "".join(pages).strip():
+        raise ValueError("Extracted text is empty. Ensure the PDF contains selectable text.")
+
+    print("[INFO] Successfully extracted text from PDF.")
+    return pages
+
+
+def _read_pdf_pages(pdf_path):
+    """Extracts the text layer of each PDF page with PyMuPDF in the PDF process pool."""
+    print(f"[INFO] Extracting text from PDF: {pdf_path}")
+    try:
+        with stage(PDF_PARSE):
+            pages = extract_pdf_pages(pdf_path)
+    except Exception as e:
+        raise RuntimeError(f"Error reading PDF file: {str(e) or type(e).__name__}")
+    return _check_extracted_text(pages)
+
+
+async def _read_pdf_pages_async(pdf_path):
+    """Async variant of _read_pdf_pages."""
+    print(f"[INFO] Extracting text from PDF: {pdf_path}")
+    try:
+        with stage(PDF_PARSE):
+            pages = await extract_pdf_pages_async(pdf_path)
+    except Exception as e:
+        raise RuntimeError(f"Error reading PDF file: {str(e) or type(e).__name__}")
+    return _check_extracted_text(pages)
+
+
+def _parse_response(response):
+    """Parses the JSON payload out of a chat completion."""
+    record_token_usage(response.usage)
+    try:
+        with stage(JSON_PARSE):
+            structured_data = json.loads(response.choices[0].message.content.strip("```json\n").rstrip("\n```"))
+        print("[INFO] Successfully parsed structured data.")
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Failed to parse GPT response. Error: {str(e)}")
+    return structured_data
+
+
+def _messages(prompt):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _complete(prompt):
+    """Sends one structuring prompt to GPT-4 Turbo and parses the JSON reply."""
+    try:
+        with stage(LLM):
+            response = openai_calls.call(
+                lambda: get_openai_client().chat.completions.create(
+                    model="gpt-4-turbo", messages=_messages(prompt), temperature=0
+                ),
+                tokens=estimate_tokens(SYSTEM_PROMPT, prompt),
+            )
+    except Exception as e:
+        raise RuntimeError(f"Error calling OpenAI API: {str(e)}")
+
+    print("[INFO] Received response from GPT-4 Turbo.")
+    return _parse_response(response)
+
+
+async def _complete_async(prompt):
+    """Async variant of _complete."""
+    try:
+        with stage(LLM):
+            response = await openai_calls.call_async(
+                lambda: get_async_openai_client().chat.completions.create(
+                    model="gpt-4-turbo", messages=_messages(prompt), temperature=0
+                ),
+                tokens=estimate_tokens(SYSTEM_PROMPT, prompt),
+            )
+    except Exception as e:
+        raise RuntimeError(f"Error calling OpenAI API: {str(e)}")
+
+    print("[INFO] Received response from GPT-4 Turbo.")
+    return _parse_response(response)
+
 
 def extract_resume_data_and_structure(pdf_path):
     """Extracts text from a PDF resume and processes it with GPT-4 Turbo to return structured JSON."""
@@ -17,62 +104,61 @@ def extract_resume_data_and_structure(pdf_path):
     try:
 
         # Extract text from the PDF
-        print(f"[INFO] Extracting text from PDF: {pdf_path}")
-        try:
-            doc = fitz.open(pdf_path)
-            extracted_text = "\n".join(page.get_text("text") for page in doc)
-        except Exception as e:
-            raise RuntimeError(f"Error reading PDF file: {str(e)}")
-        
-        if not extracted_text.strip():
-            raise ValueError("Extracted text is empty. Ensure the PDF contains selectable text.")
-
-        print("[INFO] Successfully extracted text from PDF.")
-
-        # Define the prompt
-        prompt = f"""
-        Extract the following details from this resume and return JSON:
-        - Name
-        - Email
-        - Phone Number
-        - Skills
-        - Work Experience (Company, Role, Duration)
-        - Education (Degree, Institution, Year)
-        - Certifications
-        - Projects
-        - Gpa
-
-        Resume Text:
-        {extracted_text}
-        """
+        pages = _read_pdf_pages(pdf_path)
+
+        # Compact the text and split long documents into token-budgeted chunks
+        chunks = prepare_resume_chunks(pages)
 
         print("[INFO] Sending extracted text to GPT-4 Turbo for processing...")
 
-        # Call GPT-4 Turbo
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4-turbo",
-                messages=[
-                    {"role": "system", "content": "You extract structured information from resumes and return JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0
-            )
-        except Exception as e:
-            raise RuntimeError(f"Error calling OpenAI API: {str(e)}")
+        # Call GPT-4 Turbo once per chunk and merge the parsed JSON
+        return extract_chunks(_complete, chunks)
 
-        print("[INFO] Received response from GPT-4 Turbo.")
+    except Exception as e:
+        print(f"[ERROR] {str(e)}")
+        return {"error": str(e)}
 
-        # Parse JSON response
-        try:
-            structured_data = json.loads(response.choices[0].message.content.strip("```json\n").rstrip("\n```"))
-            print("[INFO] Successfully parsed structured data.")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse GPT response. Error: {str(e)}")
 
-        return structured_data
+async def extract_resume_data_and_structure_async(pdf_path):
+    """Async variant of extract_resume_data_and_structure that never blocks the event loop."""
+    
+    try:
+
+        # Extract text from the PDF off the event loop
+        pages = await _read_pdf_pages_async(pdf_path)
+
+        # Compact the text and split long documents into token-budgeted chunks (tokenizing is CPU-bound)
+        chunks = await run_blocking(prepare_resume_chunks, pages)
+
+        print("[INFO] Sending extracted text to GPT-4 Turbo for processing...")
+
+        # Call GPT-4 Turbo once per chunk (concurrently) and merge the parsed JSON
+        return await extract_chunks_async(_complete_async, chunks)
 
     except Exception as e:
         print(f"[ERROR] {str(e)}")
         return {"error": str(e)}
 
+
+def extract_resume_data_hybrid(pdf_path):
+    """Parses contact fields and simple sections locally and sends only the rest to GPT-4 Turbo."""
+    
+    try:
+        pages = _read_pdf_pages(pdf_path)
+        return extract_hybrid(pages, _complete)
+
+    except Exception as e:
+        print(f"[ERROR] {str(e)}")
+        return {"error": str(e)}
+
+
+async def extract_resume_data_hybrid_async(pdf_path):
+    """Async variant of extract_resume_data_hybrid."""
+    
+    try:
+        pages = await _read_pdf_pages_async(pdf_path)
+        return await extract_hybrid_async(pages, _complete_async)
+
+    except Exception as e:
+        print(f"[ERROR] {str(e)}")
+        return {"error": str(e)}
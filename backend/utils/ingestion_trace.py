@@ -0,0 +1,132 @@
+import asyncio
+import os
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from utils.stage_timing import StageTimings, PROMPT_TOKENS, COMPLETION_TOKENS, RETRIES
+
+# Trace writer settings from environment variables
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", "50"))
+TRACE_FLUSH_INTERVAL_SECONDS = float(os.getenv("TRACE_FLUSH_INTERVAL_SECONDS", "5"))
+TRACE_MAX_BUFFER = int(os.getenv("TRACE_MAX_BUFFER", "10000"))
+TRACE_ERROR_MAX_CHARS = 2000
+
+
+def build_trace(content_hash: Optional[str], model_type: str, timings: StageTimings, total_seconds: float,
+                resume_id: Optional[int] = None, error: Optional[str] = None,
+                file_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Builds one ingestion trace row from the stages collected during ingestion.
+
+    Returns:
+        dict: Column values for the ingestion_trace table.
+    """
+    return {
+        "created_at": datetime.now(timezone.utc),
+        "content_hash": content_hash,
+        "file_name": file_name,
+        "model_type": model_type,
+        "resume_id": resume_id,
+        "outcome": "failed" if error else "success",
+        "error": error[:TRACE_ERROR_MAX_CHARS] if error else None,
+        "total_seconds": round(total_seconds, 4),
+        "stages": {name: round(seconds, 4) for name, seconds in timings.as_dict().items()},
+        "prompt_tokens": timings.counter(PROMPT_TOKENS),
+        "completion_tokens": timings.counter(COMPLETION_TOKENS),
+        "retries": timings.counter(RETRIES),
+        "routing": timings.detail("routing"),
+    }
+
+
+class TraceWriter:
+    """
+    Buffers trace rows in memory and writes them in batches from a background task.
+
+    Recording a trace is a non-blocking append, so ingestion never waits on the
+    database. The buffer is flushed every TRACE_FLUSH_INTERVAL_SECONDS, or as
+    soon as TRACE_BATCH_SIZE rows are waiting. Rows from a failed write are put
+    back, and the oldest rows are dropped once TRACE_MAX_BUFFER is exceeded.
+    All calls happen on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, write_batch: Callable[[List[Dict[str, Any]]], Awaitable[None]],
+                 batch_size: int = TRACE_BATCH_SIZE, flush_interval: float = TRACE_FLUSH_INTERVAL_SECONDS,
+                 max_buffer: int = TRACE_MAX_BUFFER):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.written = 0
+        self.dropped = 0
+        self.failed_writes = 0
+
+    def _trim(self) -> None:
+        while len(self._buffer) > self.max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+
+    def record(self, row: Dict[str, Any]) -> None:
+        self._buffer.append(row)
+        self._trim()
+        if self._wake is not None and len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """Writes every buffered row, one batch at a time. Returns the number written."""
+        flushed = 0
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                await self.write_batch(batch)
+            except Exception as e:
+                self.failed_writes += 1
+                print(f"[⚠️] Failed to write {len(batch)} ingestion traces, will retry: {e}")
+                self._buffer.extendleft(reversed(batch))
+                self._trim()
+                break
+            self.written += len(batch)
+            flushed += len(batch)
+        return flushed
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Starts the background flush task on the running event loop."""
+        if self._task is None:
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops the flush task and writes whatever is still buffered."""
+        if self._task is not None:
+            # Let an in-flight write finish instead of cancelling it mid-batch
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+            self._wake = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_writes": self.failed_writes,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+        }
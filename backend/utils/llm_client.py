@@ -0,0 +1,344 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from mistralai import Mistral
+from openai import OpenAI, AsyncOpenAI
+
+from utils.metrics import registry, Counter, Gauge
+from utils.stage_timing import record_count, record_stage, RETRIES, RATE_LIMIT_WAIT
+
+# Retry and circuit breaker settings from environment variables
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "20"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+# Completion tokens reserved per chat call until the response reports the real usage
+LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "1000"))
+
+# Status codes worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+def _provider_setting(provider: str, name: str, default: str) -> str:
+    return os.getenv(f"{provider.upper()}_{name}", default)
+
+
+llm_calls = registry.register(Counter(
+    "llm_calls_total", "LLM provider calls by outcome (success, error, rejected).", ["provider", "outcome"]
+))
+llm_retries = registry.register(Counter(
+    "llm_retries_total", "LLM provider calls retried after a transient error.", ["provider"]
+))
+llm_rate_limit_wait = registry.register(Counter(
+    "llm_rate_limit_wait_seconds_total", "Time spent waiting for the provider's rate limit budget.", ["provider"]
+))
+llm_circuit_open = registry.register(Gauge(
+    "llm_circuit_open", "1 while the provider's circuit breaker rejects calls.", ["provider"]
+))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+
+class TokenBucket:
+    """
+    Per-minute budget refilled continuously, e.g. requests or tokens per minute.
+
+    `reserve` takes the amount immediately, letting the balance go negative,
+    and returns how long the caller must wait before using it. Reservations
+    are served in arrival order this way, and both threads (time.sleep) and
+    coroutines (asyncio.sleep) can wait without polling. A limit of 0 disables
+    the bucket.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        if self.capacity <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            self._available -= min(amount, self.capacity)
+            return max(0.0, -self._available / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Gives back (positive) or takes (negative) budget once the real usage is known."""
+        if self.capacity <= 0 or not amount:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._available = min(self.capacity, self._available + amount)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider after `failure_threshold` consecutive transient
+    failures. After `reset_seconds` one trial call is let through (half-open):
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running or time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def release_trial(self) -> None:
+        """Ends a trial call whose error says nothing about provider health (e.g. a 400)."""
+        with self._lock:
+            self._trial_running = False
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are transient; other errors are not."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status_code = _status_code(error)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    # SDK timeout/connection errors carry no status code (openai.APITimeoutError, httpx.ConnectError, ...)
+    name = type(error).__name__
+    return "Timeout" in name or "Connect" in name
+
+
+def _retry_after(error: Exception) -> float:
+    # Mistral errors carry the headers themselves, OpenAI errors on their response
+    headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _usage_tokens(result: Any) -> Optional[int]:
+    total = getattr(getattr(result, "usage", None), "total_tokens", None)
+    return total if isinstance(total, int) else None
+
+
+class LLMProvider:
+    """
+    Shared call path for one provider: rate limits, bounded concurrency, timeouts,
+    jittered retries and a circuit breaker.
+
+    Calls are passed as zero-argument callables so any SDK method fits. Tokens
+    per minute are reserved from the caller's estimate and corrected with the
+    response's usage. Sync calls (worker threads) and async calls (event loop)
+    share the rate limits and the breaker but have separate concurrency slots.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float, concurrency: int,
+                 timeout_seconds: float, max_retries: int = LLM_MAX_RETRIES):
+        self.name = name
+        self.timeout_seconds = timeout_seconds
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._async_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_async_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._async_slots is None or self._async_slots_loop is not loop:
+            self._async_slots = asyncio.Semaphore(self.concurrency)
+            self._async_slots_loop = loop
+        return self._async_slots
+
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            llm_calls.inc(provider=self.name, outcome="rejected")
+            raise CircuitOpenError(f"{self.name} circuit breaker is open after repeated failures, try again later")
+
+    def _reserve(self, tokens: int) -> float:
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > 0:
+            llm_rate_limit_wait.inc(wait, provider=self.name)
+            record_stage(RATE_LIMIT_WAIT, wait)
+        return wait
+
+    def _on_success(self, result: Any, tokens: int) -> None:
+        self.breaker.record_success()
+        llm_calls.inc(provider=self.name, outcome="success")
+        used = _usage_tokens(result)
+        if used is not None:
+            self.tokens.adjust(tokens - used)
+
+    def _on_error(self, error: Exception, attempt: int) -> float:
+        """Records a failed attempt. Returns the backoff before the next one, or raises if it should not be retried."""
+        if not is_retryable(error):
+            self.breaker.release_trial()
+            llm_calls.inc(provider=self.name, outcome="error")
+            raise error
+        self.breaker.record_failure()
+        llm_calls.inc(provider=self.name, outcome="error")
+        if attempt >= self.max_retries or self.breaker.is_open:
+            raise error
+
+        # Full jitter spreads out the retries of calls that failed together
+        backoff = random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** attempt))
+        backoff = max(backoff, min(_retry_after(error), LLM_RETRY_MAX_SECONDS))
+        llm_retries.inc(provider=self.name)
+        record_count(RETRIES)
+        print(f"[⚠️] {self.name} call failed ({type(error).__name__}: {error}), retry {attempt + 1} in {backoff:.2f}s")
+        return backoff
+
+    def call(self, request: Callable[[], Any], tokens: int = 0) -> Any:
+        """
+        Runs a blocking provider call with rate limiting, retries and the breaker.
+
+        Args:
+            request (Callable): Performs the SDK call; invoked once per attempt.
+            tokens (int): Estimated prompt + completion tokens, for the TPM budget.
+        """
+        attempt = 0
+        while True:
+            self._admit()
+            time.sleep(self._reserve(tokens))
+            try:
+                with self._slots:
+                    result = request()
+            except Exception as e:
+                time.sleep(self._on_error(e, attempt))
+                attempt += 1
+                continue
+            self._on_success(result, tokens)
+            return result
+
+    async def call_async(self, request: Callable[[], Awaitable[Any]], tokens: int = 0) -> Any:
+        """Async variant of call; the SDK timeout is backed by a hard asyncio timeout."""
+        attempt = 0
+        while True:
+            self._admit()
+            wait = self._reserve(tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                async with self._get_async_slots():
+                    result = await asyncio.wait_for(request(), self.timeout_seconds + 5)
+            except Exception as e:
+                await asyncio.sleep(self._on_error(e, attempt))
+                attempt += 1
+                continue
+            self._on_success(result, tokens)
+            return result
+
+
+def _provider(name: str, rpm: str, tpm: str, concurrency: str, timeout: str) -> LLMProvider:
+    return LLMProvider(
+        name,
+        requests_per_minute=float(_provider_setting(name, "RPM", rpm)),
+        tokens_per_minute=float(_provider_setting(name, "TPM", tpm)),
+        concurrency=int(_provider_setting(name, "CONCURRENCY", concurrency)),
+        timeout_seconds=float(_provider_setting(name, "TIMEOUT_SECONDS", timeout)),
+    )
+
+
+# Limits default to common tier ceilings; set OPENAI_RPM=0 etc. to disable a bucket
+openai_calls = _provider("openai", rpm="500", tpm="300000", concurrency="16", timeout="60")
+mistral_calls = _provider("mistral", rpm="300", tpm="500000", concurrency="8", timeout="90")
+
+
+def _collect_breaker_state() -> None:
+    for provider in (openai_calls, mistral_calls):
+        llm_circuit_open.set(1 if provider.breaker.is_open else 0, provider=provider.name)
+
+
+registry.add_collector(_collect_breaker_state)
+
+# Shared SDK clients, created on first use. SDK-level retries are disabled
+# because the providers above retry with the shared budget and breaker.
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client(key: str, factory: Callable[[], Any]) -> Any:
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = factory()
+        return _clients[key]
+
+
+def get_openai_client() -> OpenAI:
+    return _get_client("openai", lambda: OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"), timeout=openai_calls.timeout_seconds, max_retries=0
+    ))
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    return _get_client("openai_async", lambda: AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"), timeout=openai_calls.timeout_seconds, max_retries=0
+    ))
+
+
+def get_mistral_client() -> Mistral:
+    """One Mistral client serves both the sync and the *_async methods."""
+    # MISTRAL_SERVER_URL points the client at a compatible endpoint, e.g. the benchmark stand-in server
+    return _get_client("mistral", lambda: Mistral(
+        api_key=os.getenv("MISTRAL_API_KEY"),
+        server_url=os.getenv("MISTRAL_SERVER_URL") or None,
+        timeout_ms=int(mistral_calls.timeout_seconds * 1000),
+    ))
+
+
+def estimate_tokens(*texts: str, completion: int = LLM_COMPLETION_TOKEN_ESTIMATE) -> int:
+    """
+    Estimates the tokens a call will use, for the tokens-per-minute budget.
+
+    Uses ~4 characters per token instead of tokenizing: it runs on the event
+    loop for every call (up to EMBEDDING_BATCH_SIZE texts for embeddings), and
+    the reservation is corrected with the response's real usage anyway.
+    """
+    return sum(len(text) for text in texts) // 4 + completion
@@ -0,0 +1,305 @@
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.concurrency import run_blocking
+from utils.pdf_text import extract_pdf_pages, extract_pdf_pages_async
+from utils.prompt_compaction import (
+    FIELD_DESCRIPTIONS, compact_pages, split_sections, chunk_text, merge_extractions, extract_chunks,
+    extract_chunks_async
+)
+from utils.stage_timing import stage, PDF_PARSE, PROMPT_COMPACTION, LOCAL_PARSE
+
+# Fields the local parser resolves well enough to skip the LLM in hybrid modes
+LOCAL_FIELDS = ("Name", "Email", "Phone Number", "Skills", "Certifications", "Gpa")
+CONTACT_FIELDS = ("Name", "Email", "Phone Number")
+
+# Canonical section names (see prompt_compaction.SECTION_HEADINGS) and the field they hold
+SECTION_FIELDS = {
+    "experience": "Work Experience", "work experience": "Work Experience",
+    "professional experience": "Work Experience", "employment": "Work Experience",
+    "employment history": "Work Experience", "work history": "Work Experience",
+    "research": "Work Experience", "research experience": "Work Experience",
+    "teaching": "Work Experience", "teaching experience": "Work Experience",
+    "education": "Education", "academic background": "Education",
+    "skills": "Skills", "technical skills": "Skills", "core competencies": "Skills",
+    "projects": "Projects",
+    "certifications": "Certifications", "certificates": "Certifications", "licenses": "Certifications",
+}
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[a-z]{2,}", re.IGNORECASE)
+_PHONE = re.compile(r"(?<![\w+])\+?\(?\d[\d\s().-]{6,}\d(?![\w])")
+_YEAR_RANGE = re.compile(r"^\(?\d{4}\s*[-–—]\s*\d{2,4}\)?$")
+_GPA = re.compile(
+    r"\b(?:c?gpa|grade point average)\b\s*(?:of|is|:|-)?\s*"
+    r"(\d{1,2}(?:\.\d{1,2})?(?:\s*(?:/|out of)\s*\d{1,3}(?:\.\d{1,2})?)?)"
+    r"|(\d{1,2}\.\d{1,2}\s*(?:/|out of)\s*\d{1,3}(?:\.\d{1,2})?)\s*c?gpa\b",
+    re.IGNORECASE,
+)
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+"
+_DATE_RANGE = re.compile(
+    rf"(?:{_MONTH})?(?:19|20)\d{{2}}\s*(?:-|–|—|to)\s*(?:(?:{_MONTH})?(?:19|20)\d{{2}}|present|current|now)",
+    re.IGNORECASE,
+)
+_YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+_BULLET = re.compile(r"^[\s•·▪●◦‣∙*+-]+")
+_SKILL_SEPARATORS = re.compile(r"\s*[,;|•·]\s*")
+_NAME = re.compile(r"^[A-Za-zÀ-ÿ][A-Za-zÀ-ÿ.'-]*(?:\s+[A-Za-zÀ-ÿ][A-Za-zÀ-ÿ.'-]*){1,4}$")
+
+
+def _clean(line: str) -> str:
+    return _BULLET.sub("", line).strip().rstrip(".")
+
+
+def _body_lines(body: str, heading: Optional[str]) -> List[str]:
+    lines = body.splitlines()
+    if heading is not None and lines and lines[0] == heading:
+        lines = lines[1:]
+    return lines
+
+
+def find_email(text: str) -> Optional[str]:
+    match = _EMAIL.search(text)
+    return match.group(0) if match else None
+
+
+def find_phone(text: str) -> Optional[str]:
+    """Returns the first run of 7-15 digits that looks like a phone number rather than a date."""
+    for match in _PHONE.finditer(text):
+        candidate = match.group(0).strip()
+        digits = re.sub(r"\D", "", candidate)
+        if 7 <= len(digits) <= 15 and not _YEAR_RANGE.match(candidate):
+            return candidate
+    return None
+
+
+def find_gpa(text: str) -> Optional[str]:
+    """Returns the GPA as written, e.g. "3.8/4.0" or "8.6", for utils.resume_fields.parse_gpa."""
+    match = _GPA.search(text)
+    if not match:
+        return None
+    return re.sub(r"\s+", "", match.group(1) or match.group(2))
+
+
+def find_name(contact_block: str) -> Optional[str]:
+    """Takes the first line of the contact block that reads like a person's name."""
+    for line in contact_block.splitlines()[:5]:
+        line = _clean(line)
+        if _NAME.match(line) and not _EMAIL.search(line):
+            return line.title() if line.isupper() else line
+    return None
+
+
+def parse_skills(lines: List[str]) -> Dict[str, List[str]]:
+    """
+    Splits skill lines into categories. "Languages: Python, Go" becomes a
+    "Languages" category and unlabelled lines are collected under "Other".
+    """
+    skills: Dict[str, List[str]] = {}
+    for line in lines:
+        line = _clean(line)
+        if not line:
+            continue
+        category, _, items = line.partition(":") if ":" in line[:40] else ("Other", "", line)
+        values = [item.strip() for item in _SKILL_SEPARATORS.split(items) if item.strip()]
+        if values:
+            skills.setdefault(category.strip() or "Other", []).extend(values)
+    return skills
+
+
+def parse_entries(lines: List[str], date_key: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Groups section lines into entries, one per blank-line separated block or
+    per dated line once the current entry already has a date.
+
+    Args:
+        lines (List[str]): Section lines without the heading.
+        date_key (str, optional): Key to store the entry's date under ("Duration" or "Year").
+    """
+    entries: List[Dict[str, Any]] = []
+    current: List[str] = []
+    current_date: Optional[str] = None
+
+    def close():
+        if current:
+            entry: Dict[str, Any] = {"Details": "; ".join(current)}
+            if date_key and current_date:
+                entry[date_key] = current_date
+            entries.append(entry)
+
+    for line in lines:
+        line = _clean(line)
+        if not line:
+            close()
+            current, current_date = [], None
+            continue
+        date = _DATE_RANGE.search(line) or _YEAR.search(line)
+        if date and current_date:
+            close()
+            current, current_date = [], None
+        if date and not current_date:
+            current_date = date.group(0)
+        current.append(line)
+    close()
+    return entries
+
+
+def parse_resume_text(text: str) -> Dict[str, Any]:
+    """
+    Extracts resume fields from compacted text with regexes and heuristics only.
+
+    Contact fields and the GPA are matched directly; skills and certifications
+    are read line by line from their sections. Experience, education and
+    projects are returned as unstructured "Details" entries (plus dates).
+
+    Args:
+        text (str): Compacted resume text (see prompt_compaction.compact_pages).
+
+    Returns:
+        dict: Resume data in the extractor schema. Fields not found are None or empty.
+    """
+    sections = split_sections(text)
+    contact_block = sections[0][2] if sections and sections[0][0] is None else ""
+
+    data: Dict[str, Any] = {
+        "Name": find_name(contact_block),
+        "Email": find_email(contact_block) or find_email(text),
+        "Phone Number": find_phone(contact_block) or find_phone(text),
+        "Skills": {},
+        "Work Experience": [],
+        "Education": [],
+        "Certifications": [],
+        "Projects": [],
+        "Gpa": find_gpa(text),
+    }
+    for name, heading, body in sections:
+        field = SECTION_FIELDS.get(name)
+        lines = _body_lines(body, heading)
+        if field == "Skills":
+            for category, values in parse_skills(lines).items():
+                data["Skills"].setdefault(category, []).extend(values)
+        elif field == "Certifications":
+            data["Certifications"].extend(parse_entries(lines, "Year"))
+        elif field == "Work Experience":
+            data["Work Experience"].extend(parse_entries(lines, "Duration"))
+        elif field == "Education":
+            data["Education"].extend(parse_entries(lines, "Year"))
+        elif field == "Projects":
+            data["Projects"].extend(parse_entries(lines))
+    return data
+
+
+def plan_hybrid_extraction(text: str) -> Tuple[Dict[str, Any], List[str], str]:
+    """
+    Decides which fields still need the LLM after local parsing, and which text to send.
+
+    Only sections that hold an unresolved field are kept: the contact block
+    when a contact field is missing, and untitled sections (summary, awards,
+    ...) only when skills could not be read from a skills section.
+
+    Returns:
+        Tuple: (locally resolved fields, fields for the LLM, text for the LLM).
+    """
+    parsed = parse_resume_text(text)
+    resolved = {field: parsed[field] for field in LOCAL_FIELDS if parsed[field]}
+    pending = [field for field in FIELD_DESCRIPTIONS if field not in resolved]
+
+    sections = split_sections(text)
+    if len(sections) <= 1:
+        # No recognizable headings: the model has to read the whole document
+        return resolved, pending, text if pending else ""
+
+    kept = []
+    for name, _, body in sections:
+        field = SECTION_FIELDS.get(name)
+        if name is None:
+            keep = any(field in pending for field in CONTACT_FIELDS)
+        elif field is None:
+            keep = "Skills" in pending
+        else:
+            keep = field in pending or (field == "Education" and "Gpa" in pending)
+        if keep:
+            kept.append(body)
+    return resolved, pending, "\n\n".join(kept)
+
+
+def _compact(pages: List[str]) -> str:
+    with stage(PROMPT_COMPACTION):
+        return compact_pages(pages)
+
+
+def _check_pages(pages: List[str]) -> List[str]:
+    if not "".join(pages).strip():
+        raise ValueError("Extracted text is empty. Ensure the PDF contains selectable text.")
+    return pages
+
+
+def _parse_pages(pages: List[str]) -> Dict[str, Any]:
+    text = _compact(pages)
+    with stage(LOCAL_PARSE):
+        return parse_resume_text(text)
+
+
+def extract_resume_locally(pdf_path: str):
+    """Extracts structured resume data from the PDF text layer without any network call."""
+    try:
+        print(f"[INFO] Parsing PDF locally: {pdf_path}")
+        with stage(PDF_PARSE):
+            pages = _check_pages(extract_pdf_pages(pdf_path))
+        structured_data = _parse_pages(pages)
+        print("[INFO] Successfully parsed resume locally.")
+        return structured_data
+    except Exception as e:
+        print(f"[ERROR] {str(e)}")
+        return {"error": str(e)}
+
+
+async def extract_resume_locally_async(pdf_path: str):
+    """Async variant of extract_resume_locally; PDF parsing runs in the PDF process pool."""
+    try:
+        print(f"[INFO] Parsing PDF locally: {pdf_path}")
+        with stage(PDF_PARSE):
+            pages = _check_pages(await extract_pdf_pages_async(pdf_path))
+        # Regex parsing is CPU-bound, so it runs on the blocking pool
+        structured_data = await run_blocking(_parse_pages, pages)
+        print("[INFO] Successfully parsed resume locally.")
+        return structured_data
+    except Exception as e:
+        print(f"[ERROR] {str(e)}")
+        return {"error": str(e)}
+
+
+def _plan(pages: List[str]) -> Tuple[Dict[str, Any], List[str], List[str]]:
+    text = _compact(pages)
+    with stage(LOCAL_PARSE):
+        resolved, pending, llm_text = plan_hybrid_extraction(text)
+    with stage(PROMPT_COMPACTION):
+        chunks = chunk_text(llm_text) if pending and llm_text.strip() else []
+    print(
+        f"[INFO] Resolved {len(resolved)} fields locally, sending {len(pending)} fields "
+        f"in {len(chunks)} chunk(s) to the LLM"
+    )
+    return resolved, pending, chunks
+
+
+def extract_hybrid(pages: List[str], complete: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Structures a resume with the local parser first and the LLM only for what it left unresolved.
+
+    Args:
+        pages (List[str]): Text (or OCR markdown) of each page.
+        complete (Callable): Provider call, prompt -> parsed JSON.
+    """
+    resolved, pending, chunks = _plan(pages)
+    if not chunks:
+        return resolved
+    # Local values come first so they win over the model's for single-valued fields
+    return merge_extractions([resolved, extract_chunks(complete, chunks, pending)])
+
+
+async def extract_hybrid_async(pages: List[str],
+                               complete: Callable[[str], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Async variant of extract_hybrid; local parsing and chunking run on the blocking pool."""
+    resolved, pending, chunks = await run_blocking(_plan, pages)
+    if not chunks:
+        return resolved
+    return merge_extractions([resolved, await extract_chunks_async(complete, chunks, pending)])
@@ -1,96 +1,421 @@
-from mistralai import Mistral
+import asyncio
+import base64
+import hashlib
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+from utils.concurrency import run_blocking
+from utils.stage_timing import (
+    stage, collect_stages, merge_stages, record_token_usage, StageTimings, OCR_UPLOAD, OCR, LLM, JSON_PARSE
+)
+from utils.prompt_compaction import prepare_resume_chunks, extract_chunks, extract_chunks_async
+from utils.local_parser import extract_hybrid, extract_hybrid_async
+from utils.llm_client import mistral_calls, get_mistral_client, estimate_tokens
 
-# Initialize Mistral client
+# The Mistral client is shared through utils.llm_client, which also rate limits and retries calls
 api_key = os.getenv('MISTRAL_API_KEY')
 if not api_key:
     raise ValueError("Missing MISTRAL API key. Set 'MISTRAL_API_KEY' in the environment.")
-        
-client = Mistral(api_key=api_key)
-print("[INFO] Mistral client initialized successfully.")
 
-def extract_and_structure_resume(pdf_path: str):
-    """Extracts text from a PDF resume using Mistral OCR and processes it to return structured JSON."""
-    
+# OCR settings from environment variables. PDFs up to MISTRAL_INLINE_MAX_BYTES are
+# sent inline as a data: URL; larger ones are uploaded once per content hash and
+# the upload is reused for MISTRAL_UPLOAD_TTL_SECONDS (0 deletes it right after OCR).
+MISTRAL_INLINE_MAX_BYTES = int(os.getenv("MISTRAL_INLINE_MAX_BYTES", str(4 * 1024 * 1024)))
+MISTRAL_UPLOAD_TTL_SECONDS = float(os.getenv("MISTRAL_UPLOAD_TTL_SECONDS", "3600"))
+MISTRAL_UPLOAD_CACHE_SIZE = int(os.getenv("MISTRAL_UPLOAD_CACHE_SIZE", "256"))
+
+
+def _read_pdf_bytes(pdf_path: str) -> bytes:
+    with open(pdf_path, "rb") as pdf_file:
+        return pdf_file.read()
+
+
+def _ocr_pages(ocr_response) -> List[str]:
+    """Returns the markdown of every OCR page."""
+    if not ocr_response.pages:
+        raise ValueError("OCR extraction failed or returned no data.")
+
+    pages = [page.markdown for page in ocr_response.pages]
+    print("[INFO] OCR extraction completed successfully.")
+    return pages
+
+
+def _parse_response(chat_response):
+    """Parses the JSON payload out of a chat completion."""
+    record_token_usage(chat_response.usage)
+    response_text = chat_response.choices[0].message.content
+    print("[INFO] Received response from Mistral.")
+
+    try:
+        with stage(JSON_PARSE):
+            structured_data = json.loads(response_text.strip("```json\n").rstrip("\n```"))
+        print("[INFO] Successfully parsed structured resume data.")
+    except json.JSONDecodeError:
+        raise ValueError("Failed to parse Mistral response. Ensure the output is in JSON format.")
+    return structured_data
+
+
+def _complete(prompt: str):
+    """Sends one structuring prompt to Mistral chat and parses the JSON reply."""
     try:
+        with stage(LLM):
+            chat_response = mistral_calls.call(
+                lambda: get_mistral_client().chat.complete(
+                    model='mistral-large-latest',
+                    messages=[{"role": "user", "content": prompt}]
+                ),
+                tokens=estimate_tokens(prompt),
+            )
+    except Exception as e:
+        raise RuntimeError(f"Error calling Mistral API for resume structuring: {str(e)}")
+
+    return _parse_response(chat_response)
+
+
+async def _complete_async(prompt: str):
+    """Async variant of _complete."""
+    try:
+        with stage(LLM):
+            chat_response = await mistral_calls.call_async(
+                lambda: get_mistral_client().chat.complete_async(
+                    model='mistral-large-latest',
+                    messages=[{"role": "user", "content": prompt}]
+                ),
+                tokens=estimate_tokens(prompt),
+            )
+    except Exception as e:
+        raise RuntimeError(f"Error calling Mistral API for resume structuring: {str(e)}")
+
+    return _parse_response(chat_response)
+
+
+class UploadRegistry:
+    """
+    Remembers which Mistral file holds each uploaded PDF, keyed by content hash,
+    so OCR retries and other model types reuse the upload instead of sending
+    the bytes again. Entries expire after `ttl_seconds` and the oldest are
+    evicted past `max_entries`; callers delete the returned file IDs.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.reused = 0
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, now: float) -> List[str]:
+        expired = [key for key, (_, uploaded_at) in self._entries.items() if now - uploaded_at >= self.ttl_seconds]
+        return [self._entries.pop(key)[0] for key in expired]
+
+    def get(self, content_hash: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is None or time.time() - entry[1] >= self.ttl_seconds:
+                return None
+            self.reused += 1
+            return entry[0]
+
+    def put(self, content_hash: str, file_id: str) -> List[str]:
+        """Registers a new upload. Returns the file IDs that are no longer referenced."""
+        if self.ttl_seconds <= 0:
+            return [file_id]
+        with self._lock:
+            stale = self._expired(time.time())
+            previous = self._entries.pop(content_hash, None)
+            if previous is not None and previous[0] != file_id:
+                stale.append(previous[0])
+            self._entries[content_hash] = (file_id, time.time())
+            while len(self._entries) > self.max_entries:
+                stale.append(self._entries.popitem(last=False)[1][0])
+            return stale
+
+    def discard(self, content_hash: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.pop(content_hash, None)
+            return entry[0] if entry else None
+
+    def drain(self) -> List[str]:
+        with self._lock:
+            file_ids = [file_id for file_id, _ in self._entries.values()]
+            self._entries.clear()
+            return file_ids
+
 
-        # Step 1: Upload PDF to Mistral
-        print(f"[INFO] Uploading PDF: {pdf_path}")
+uploads = UploadRegistry(MISTRAL_UPLOAD_TTL_SECONDS, MISTRAL_UPLOAD_CACHE_SIZE)
+
+# Deletes never hold up extraction: the sync path hands them to one worker
+# thread and the async path to background tasks (referenced until done).
+_cleanup_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mistral-cleanup")
+_cleanup_tasks: Set[asyncio.Task] = set()
+
+
+def _delete_files(file_ids: List[str]) -> None:
+    for file_id in file_ids:
         try:
-            with open(pdf_path, "rb") as pdf_file:
-                uploaded_pdf = client.files.upload(
-                    file={"file_name": os.path.basename(pdf_path), "content": pdf_file},
-                    purpose="ocr"
-                )
+            mistral_calls.call(lambda: get_mistral_client().files.delete(file_id=file_id))
+            print(f"[INFO] Deleted uploaded file {file_id} from Mistral.")
         except Exception as e:
-            raise RuntimeError(f"Error uploading PDF to Mistral: {str(e)}")
+            print(f"[⚠️] Failed to delete uploaded file {file_id} from Mistral: {e}")
 
-        print(f"[INFO] PDF uploaded successfully. File ID: {uploaded_pdf.id}")
 
-        # Step 2: Get Signed URL
+async def _delete_files_async(file_ids: List[str]) -> None:
+    for file_id in file_ids:
         try:
-            signed_url = client.files.get_signed_url(file_id=uploaded_pdf.id)
+            await mistral_calls.call_async(lambda: get_mistral_client().files.delete_async(file_id=file_id))
+            print(f"[INFO] Deleted uploaded file {file_id} from Mistral.")
         except Exception as e:
-            raise RuntimeError(f"Error fetching signed URL from Mistral: {str(e)}")
+            print(f"[⚠️] Failed to delete uploaded file {file_id} from Mistral: {e}")
 
-        print("[INFO] Successfully retrieved signed URL for OCR.")
 
-        # Step 3: Perform OCR on PDF
-        print("[INFO] Performing OCR on the uploaded PDF...")
-        try:
-            ocr_response = client.ocr.process(
-                model="mistral-ocr-latest",
-                document={"type": "document_url", "document_url": signed_url.url}
+def _schedule_cleanup(file_ids: List[str]) -> None:
+    if file_ids:
+        _cleanup_pool.submit(_delete_files, file_ids)
+
+
+def _schedule_cleanup_async(file_ids: List[str]) -> None:
+    if file_ids:
+        task = asyncio.get_running_loop().create_task(_delete_files_async(file_ids))
+        _cleanup_tasks.add(task)
+        task.add_done_callback(_cleanup_tasks.discard)
+
+
+async def delete_uploaded_files_async() -> None:
+    """Waits for pending deletes and deletes every upload still kept for reuse. Called on shutdown."""
+    if _cleanup_tasks:
+        await asyncio.gather(*list(_cleanup_tasks), return_exceptions=True)
+    await _delete_files_async(uploads.drain())
+
+
+def _inline_document(pdf_bytes: bytes) -> Dict[str, str]:
+    encoded = base64.b64encode(pdf_bytes).decode("ascii")
+    return {"type": "document_url", "document_url": f"data:application/pdf;base64,{encoded}"}
+
+
+def _file_document(file_id: str) -> Dict[str, str]:
+    # OCR reads uploaded files by ID, so no signed URL round trip is needed
+    return {"type": "file", "file_id": file_id}
+
+
+def _hash_bytes(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def _upload_pdf(pdf_path: str, pdf_bytes: bytes) -> str:
+    print(f"[INFO] Uploading PDF: {pdf_path}")
+    try:
+        with stage(OCR_UPLOAD):
+            uploaded_pdf = mistral_calls.call(lambda: get_mistral_client().files.upload(
+                file={"file_name": os.path.basename(pdf_path), "content": pdf_bytes},
+                purpose="ocr"
+            ))
+    except Exception as e:
+        raise RuntimeError(f"Error uploading PDF to Mistral: {str(e)}")
+
+    print(f"[INFO] PDF uploaded successfully. File ID: {uploaded_pdf.id}")
+    return uploaded_pdf.id
+
+
+async def _upload_pdf_async(pdf_path: str, pdf_bytes: bytes) -> str:
+    print(f"[INFO] Uploading PDF: {pdf_path}")
+    try:
+        with stage(OCR_UPLOAD):
+            uploaded_pdf = await mistral_calls.call_async(lambda: get_mistral_client().files.upload_async(
+                file={"file_name": os.path.basename(pdf_path), "content": pdf_bytes},
+                purpose="ocr"
+            ))
+    except Exception as e:
+        raise RuntimeError(f"Error uploading PDF to Mistral: {str(e)}")
+
+    print(f"[INFO] PDF uploaded successfully. File ID: {uploaded_pdf.id}")
+    return uploaded_pdf.id
+
+
+def _run_ocr(document: Dict[str, str]):
+    print("[INFO] Performing OCR on the PDF...")
+    try:
+        with stage(OCR):
+            return mistral_calls.call(
+                lambda: get_mistral_client().ocr.process(model="mistral-ocr-latest", document=document)
             )
-        except Exception as e:
-            raise RuntimeError(f"Error performing OCR: {str(e)}")
-
-        if not ocr_response.pages:
-            raise ValueError("OCR extraction failed or returned no data.")
-
-        extracted_text = "\n".join([page.markdown for page in ocr_response.pages])
-        print("[INFO] OCR extraction completed successfully.")
-
-        # Step 4: Prepare Prompt for Mistral Chat
-        prompt = f"""
-        Extract the following details from this resume and return JSON format:
-        - Name
-        - Email
-        - Phone Number
-        - Skills
-        - Work Experience (Company, Role, Duration)
-        - Education (Degree, Institution, Year)
-        - Certifications
-        - Projects
-        - Gpa
-
-        Resume Text:
-        {extracted_text}
-        """
+    except Exception as e:
+        raise RuntimeError(f"Error performing OCR: {str(e)}")
 
-        print("[INFO] Sending extracted text to Mistral for structured data processing...")
 
-        # Step 5: Query Mistral Chat Model
-        try:
-            chat_response = client.chat.complete(
-                model='mistral-large-latest',
-                messages=[{"role": "user", "content": prompt}]
+async def _run_ocr_async(document: Dict[str, str]):
+    print("[INFO] Performing OCR on the PDF...")
+    try:
+        with stage(OCR):
+            return await mistral_calls.call_async(
+                lambda: get_mistral_client().ocr.process_async(model="mistral-ocr-latest", document=document)
             )
-        except Exception as e:
-            raise RuntimeError(f"Error calling Mistral API for resume structuring: {str(e)}")
+    except Exception as e:
+        raise RuntimeError(f"Error performing OCR: {str(e)}")
+
 
-        response_text = chat_response.choices[0].message.content
-        print("[INFO] Received response from Mistral.")
+def _ocr_pdf(pdf_path: str) -> List[str]:
+    """
+    OCRs a PDF with Mistral and returns the markdown of each page.
 
-        # Step 6: Parse JSON Response
+    Small PDFs go inline in the OCR request (one round trip). Larger ones are
+    uploaded, or an earlier upload of the same bytes is reused, and OCR'd by
+    file ID. Uploads no longer needed are deleted in the background.
+    """
+    pdf_bytes = _read_pdf_bytes(pdf_path)
+    if len(pdf_bytes) <= MISTRAL_INLINE_MAX_BYTES:
+        print(f"[INFO] Sending PDF inline for OCR: {pdf_path}")
+        return _ocr_pages(_run_ocr(_inline_document(pdf_bytes)))
+
+    content_hash = _hash_bytes(pdf_bytes)
+    file_id = uploads.get(content_hash)
+    if file_id is not None:
+        print(f"[INFO] Reusing uploaded file {file_id} for OCR")
         try:
-            structured_data = json.loads(response_text.strip("```json\n").rstrip("\n```"))
-            print("[INFO] Successfully parsed structured resume data.")
-        except json.JSONDecodeError:
-            raise ValueError("Failed to parse Mistral response. Ensure the output is in JSON format.")
+            return _ocr_pages(_run_ocr(_file_document(file_id)))
+        except RuntimeError as e:
+            # The file may have been deleted on the Mistral side; upload it again once
+            print(f"[⚠️] OCR of the reused upload failed, uploading again: {e}")
+            uploads.discard(content_hash)
+
+    file_id = _upload_pdf(pdf_path, pdf_bytes)
+    try:
+        ocr_response = _run_ocr(_file_document(file_id))
+    finally:
+        _schedule_cleanup(uploads.put(content_hash, file_id))
+    return _ocr_pages(ocr_response)
+
+
+async def _ocr_document_async(pdf_path: str) -> List[str]:
+    """Async variant of _ocr_pdf."""
+    pdf_bytes = await run_blocking(_read_pdf_bytes, pdf_path)
+    if len(pdf_bytes) <= MISTRAL_INLINE_MAX_BYTES:
+        print(f"[INFO] Sending PDF inline for OCR: {pdf_path}")
+        return _ocr_pages(await _run_ocr_async(_inline_document(pdf_bytes)))
+
+    content_hash = await run_blocking(_hash_bytes, pdf_bytes)
+    file_id = uploads.get(content_hash)
+    if file_id is not None:
+        print(f"[INFO] Reusing uploaded file {file_id} for OCR")
+        try:
+            return _ocr_pages(await _run_ocr_async(_file_document(file_id)))
+        except RuntimeError as e:
+            print(f"[⚠️] OCR of the reused upload failed, uploading again: {e}")
+            uploads.discard(content_hash)
+
+    file_id = await _upload_pdf_async(pdf_path, pdf_bytes)
+    try:
+        ocr_response = await _run_ocr_async(_file_document(file_id))
+    finally:
+        _schedule_cleanup_async(uploads.put(content_hash, file_id))
+    return _ocr_pages(ocr_response)
+
+
+# OCR started ahead of time by prefetch_ocr, keyed by PDF path
+_ocr_prefetch: Dict[str, asyncio.Task] = {}
+
+
+async def _prefetched_ocr(pdf_path: str) -> Tuple[Optional[List[str]], StageTimings, Optional[Exception]]:
+    # Stages are collected here and handed to the document's own collector when it is consumed
+    with collect_stages() as timings:
+        try:
+            return await _ocr_document_async(pdf_path), timings, None
+        except Exception as e:
+            return None, timings, e
+
+
+def prefetch_ocr(pdf_path: str) -> None:
+    """
+    Starts OCR of a PDF in the background so it overlaps with chat structuring
+    of documents ahead of it. The result is picked up by the next extraction of
+    the same path; call discard_prefetched_ocr when it will not be needed.
+    """
+    if pdf_path not in _ocr_prefetch:
+        _ocr_prefetch[pdf_path] = asyncio.get_running_loop().create_task(_prefetched_ocr(pdf_path))
+
+
+def discard_prefetched_ocr(pdf_path: str) -> None:
+    task = _ocr_prefetch.pop(pdf_path, None)
+    if task is not None and not task.done():
+        task.cancel()
+
+
+async def _ocr_pdf_async(pdf_path: str) -> List[str]:
+    """OCRs a PDF, using the prefetched result when prefetch_ocr already started it."""
+    task = _ocr_prefetch.pop(pdf_path, None)
+    if task is None:
+        return await _ocr_document_async(pdf_path)
+
+    pages, timings, error = await task
+    merge_stages(timings)
+    if error is not None:
+        raise error
+    return pages
+
+
+def extract_and_structure_resume(pdf_path: str):
+    """Extracts text from a PDF resume using Mistral OCR and processes it to return structured JSON."""
+    
+    try:
+
+        # Step 1: OCR the PDF (inline, or via a reused/new upload)
+        pages = _ocr_pdf(pdf_path)
 
-        return structured_data
+        # Step 2: Compact the OCR text and split long documents into token-budgeted chunks
+        chunks = prepare_resume_chunks(pages)
+
+        print("[INFO] Sending extracted text to Mistral for structured data processing...")
+
+        # Step 3: Query Mistral Chat once per chunk and merge the parsed JSON
+        return extract_chunks(_complete, chunks)
+
+    except Exception as e:
+        print(f"[ERROR] {str(e)}")
+        return {"error": str(e)}
+
+
+async def extract_and_structure_resume_async(pdf_path: str):
+    """Async variant of extract_and_structure_resume built on the Mistral SDK's async methods."""
+    
+    try:
+
+        # Step 1: OCR the PDF (inline, or via a reused/new upload)
+        pages = await _ocr_pdf_async(pdf_path)
+
+        # Step 2: Compact the OCR text and split long documents into token-budgeted chunks (off the event loop)
+        chunks = await run_blocking(prepare_resume_chunks, pages)
+
+        print("[INFO] Sending extracted text to Mistral for structured data processing...")
+
+        # Step 3: Query Mistral Chat once per chunk and merge the parsed JSON
+        return await extract_chunks_async(_complete_async, chunks)
+
+    except Exception as e:
+        print(f"[ERROR] {str(e)}")
+        return {"error": str(e)}
+
+
+def extract_and_structure_resume_hybrid(pdf_path: str):
+    """OCRs the PDF, parses contact fields and simple sections locally and sends only the rest to Mistral chat."""
+    
+    try:
+        pages = _ocr_pdf(pdf_path)
+        return extract_hybrid(pages, _complete)
+
+    except Exception as e:
+        print(f"[ERROR] {str(e)}")
+        return {"error": str(e)}
+
+
+async def extract_and_structure_resume_hybrid_async(pdf_path: str):
+    """Async variant of extract_and_structure_resume_hybrid."""
+    
+    try:
+        pages = await _ocr_pdf_async(pdf_path)
+        return await extract_hybrid_async(pages, _complete_async)
 
     except Exception as e:
         print(f"[ERROR] {str(e)}")
@@ -0,0 +1,241 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+import fitz  # PyMuPDF for PDF text extraction
+
+# Process pool configuration from environment variables
+PDF_POOL_SIZE = int(os.getenv("PDF_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+PDF_EXTRACTION_TIMEOUT = float(os.getenv("PDF_EXTRACTION_TIMEOUT", "30"))
+PDF_PROBE_PAGES = int(os.getenv("PDF_PROBE_PAGES", "5"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+T = TypeVar("T")
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> Tuple[int, List[str]]:
+    """
+    Worker function: extracts the text of pages [start, stop) of a PDF.
+
+    The document is opened and closed inside the worker so no handle outlives
+    the task.
+
+    Returns:
+        Tuple[int, List[str]]: Total page count and the text of each requested page.
+    """
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+        return page_count, [doc[i].get_text("text") for i in range(start, min(stop, page_count))]
+
+
+def _probe_pages(pdf_path: str, max_pages: int) -> Tuple[int, List[Tuple[int, float]]]:
+    """
+    Worker function: measures the text layer of the first `max_pages` pages.
+
+    Returns:
+        Tuple[int, List[Tuple[int, float]]]: Total page count and, per probed
+        page, its non-whitespace character count and the fraction of the page
+        covered by images.
+    """
+    with fitz.open(pdf_path) as doc:
+        samples = []
+        for page in doc.pages(0, min(max_pages, doc.page_count)):
+            chars = len("".join(page.get_text("text").split()))
+            page_area = abs(page.rect) or 1.0
+            image_area = sum(abs(fitz.Rect(image["bbox"]) & page.rect) for image in page.get_image_info())
+            samples.append((chars, min(image_area / page_area, 1.0)))
+        return doc.page_count, samples
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Returns the shared process pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned workers don't inherit the server's threads or open sockets
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_POOL_SIZE,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool(pool: Optional[ProcessPoolExecutor] = None, terminate: bool = False) -> None:
+    """
+    Discards a broken or stuck pool so the next call starts fresh workers.
+
+    Args:
+        pool (ProcessPoolExecutor, optional): Only reset if this is still the
+            shared pool, so callers that saw an old pool break don't discard
+            the one that replaced it.
+        terminate (bool): Kill the workers instead of letting running tasks finish.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or (pool is not None and _pool is not pool):
+            return
+        old, _pool = _pool, None
+    if terminate:
+        # shutdown() lets running tasks finish, which a hung PyMuPDF call never does
+        for process in list((old._processes or {}).values()):
+            process.terminate()
+    old.shutdown(wait=False, cancel_futures=True)
+
+
+def _abandon(pool: ProcessPoolExecutor, futures: List[Future], pdf_path: str) -> None:
+    """Frees the pool capacity held by a timed-out document."""
+    running = [future for future in futures if not future.cancel() and not future.done()]
+    if running:
+        print(f"[⚠️] PDF extraction timed out for {pdf_path}, restarting the PDF worker pool")
+        _reset_pool(pool, terminate=True)
+
+
+def _remaining(deadline: float) -> float:
+    return max(0.0, deadline - time.monotonic())
+
+
+def _run_in_pool(work: Callable[[ProcessPoolExecutor, List[Future]], T], pdf_path: str) -> T:
+    """
+    Runs `work` against the shared pool, recording every future it submits.
+
+    On a timeout the document's outstanding futures are cancelled, and the
+    pool is restarted if one of them is still running. When the pool breaks
+    because another document's timeout or crash replaced it, the work is
+    retried once on the new pool.
+    """
+    retried = False
+    while True:
+        pool = _get_pool()
+        futures: List[Future] = []
+        try:
+            return work(pool, futures)
+        except TimeoutError:
+            _abandon(pool, futures, pdf_path)
+            raise
+        except BrokenProcessPool:
+            replaced = _pool is not pool
+            _reset_pool(pool)
+            if retried or not replaced:
+                raise
+            retried = True
+
+
+async def _run_in_pool_async(work: Callable[[ProcessPoolExecutor, List[Future]], Awaitable[T]],
+                             pdf_path: str, timeout: float) -> T:
+    """Async variant of _run_in_pool; `timeout` bounds the whole call, retry included."""
+    deadline = time.monotonic() + timeout
+    retried = False
+    while True:
+        pool = _get_pool()
+        futures: List[Future] = []
+        try:
+            return await asyncio.wait_for(work(pool, futures), _remaining(deadline))
+        except asyncio.TimeoutError:
+            _abandon(pool, futures, pdf_path)
+            raise
+        except BrokenProcessPool:
+            replaced = _pool is not pool
+            _reset_pool(pool)
+            if retried or not replaced:
+                raise
+            retried = True
+
+
+def _submit(pool: ProcessPoolExecutor, futures: List[Future], fn, *args) -> Future:
+    future = pool.submit(fn, *args)
+    futures.append(future)
+    return future
+
+
+def extract_pdf_pages(pdf_path: str, timeout: float = PDF_EXTRACTION_TIMEOUT) -> List[str]:
+    """
+    Extracts the text of every page of a PDF in the process pool.
+
+    Documents longer than PDF_PAGES_PER_TASK pages are split across workers.
+
+    Args:
+        pdf_path (str): Path to the PDF.
+        timeout (float): Seconds allowed for the whole document. When it runs
+            out, the remaining page ranges are cancelled and a hung worker is
+            killed so it doesn't keep a pool slot.
+
+    Returns:
+        List[str]: Text of each page, in order.
+    """
+    deadline = time.monotonic() + timeout
+
+    def extract(pool: ProcessPoolExecutor, futures: List[Future]) -> List[str]:
+        first = _submit(pool, futures, _extract_page_range, pdf_path, 0, PDF_PAGES_PER_TASK)
+        page_count, pages = first.result(timeout=_remaining(deadline))
+        rest = [
+            _submit(pool, futures, _extract_page_range, pdf_path, start, start + PDF_PAGES_PER_TASK)
+            for start in range(PDF_PAGES_PER_TASK, page_count, PDF_PAGES_PER_TASK)
+        ]
+        for future in rest:
+            pages.extend(future.result(timeout=_remaining(deadline))[1])
+        return pages
+
+    return _run_in_pool(extract, pdf_path)
+
+
+async def extract_pdf_pages_async(pdf_path: str, timeout: float = PDF_EXTRACTION_TIMEOUT) -> List[str]:
+    """
+    Async variant of extract_pdf_pages; the event loop only waits on the pool.
+
+    On timeout the caller gets asyncio.TimeoutError right away, and the
+    document's page ranges are cancelled or their worker killed.
+    """
+    async def extract(pool: ProcessPoolExecutor, futures: List[Future]) -> List[str]:
+        first = _submit(pool, futures, _extract_page_range, pdf_path, 0, PDF_PAGES_PER_TASK)
+        page_count, pages = await asyncio.wrap_future(first)
+        rest = await asyncio.gather(*(
+            asyncio.wrap_future(_submit(pool, futures, _extract_page_range, pdf_path, start, start + PDF_PAGES_PER_TASK))
+            for start in range(PDF_PAGES_PER_TASK, page_count, PDF_PAGES_PER_TASK)
+        ))
+        for _, range_pages in rest:
+            pages.extend(range_pages)
+        return pages
+
+    return await _run_in_pool_async(extract, pdf_path, timeout)
+
+
+def probe_text_layer(pdf_path: str, max_pages: int = PDF_PROBE_PAGES,
+                     timeout: float = PDF_EXTRACTION_TIMEOUT) -> Tuple[int, List[Tuple[int, float]]]:
+    """
+    Measures how much usable text the first pages of a PDF carry, in the process pool.
+
+    Returns:
+        Tuple[int, List[Tuple[int, float]]]: See _probe_pages.
+    """
+    deadline = time.monotonic() + timeout
+
+    def probe(pool: ProcessPoolExecutor, futures: List[Future]):
+        return _submit(pool, futures, _probe_pages, pdf_path, max_pages).result(timeout=_remaining(deadline))
+
+    return _run_in_pool(probe, pdf_path)
+
+
+async def probe_text_layer_async(pdf_path: str, max_pages: int = PDF_PROBE_PAGES,
+                                 timeout: float = PDF_EXTRACTION_TIMEOUT) -> Tuple[int, List[Tuple[int, float]]]:
+    """Async variant of probe_text_layer."""
+    async def probe(pool: ProcessPoolExecutor, futures: List[Future]):
+        return await asyncio.wrap_future(_submit(pool, futures, _probe_pages, pdf_path, max_pages))
+
+    return await _run_in_pool_async(probe, pdf_path, timeout)
+
+
+def shutdown_pdf_pool() -> None:
+    """Stops the PDF worker processes."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+from sqlalchemy import exc
+
+# Number of recent checkouts kept for latency percentiles
+POOL_METRICS_WINDOW = 1000
+
+
+class PoolMetrics:
+    """
+    Counters and recent checkout latencies for a SQLAlchemy connection pool.
+
+    Latency is the time a caller waited for a connection, so it stays near zero
+    until the pool saturates and requests start queueing for connections.
+    """
+
+    def __init__(self, window: int = POOL_METRICS_WINDOW):
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.max_latency = 0.0
+
+    def record_checkout(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self._latencies.append(seconds)
+            self.max_latency = max(self.max_latency, seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    @staticmethod
+    def _percentile(ordered: list, fraction: float) -> float:
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def stats(self, pool) -> Dict[str, Any]:
+        """
+        Returns counters, checkout latency percentiles (ms) and current saturation.
+
+        Args:
+            pool: The QueuePool whose live occupancy should be reported.
+        """
+        with self._lock:
+            ordered = sorted(self._latencies)
+            counters = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+            }
+            max_latency = self.max_latency
+
+        size = pool.size()
+        max_overflow = getattr(pool, "_max_overflow", 0)
+        checked_out = pool.checkedout()
+        capacity = size + max(max_overflow, 0)
+        return {
+            **counters,
+            "pool_size": size,
+            "max_overflow": max_overflow,
+            "checked_out": checked_out,
+            "idle": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "saturation": round(checked_out / capacity, 4) if capacity > 0 else None,
+            "checkout_ms": {
+                "p50": round(self._percentile(ordered, 0.50) * 1000, 3),
+                "p95": round(self._percentile(ordered, 0.95) * 1000, 3),
+                "p99": round(self._percentile(ordered, 0.99) * 1000, 3),
+                "max": round(max_latency * 1000, 3),
+            },
+        }
+
+
+def instrumented_pool_class(base, metrics: PoolMetrics):
+    """
+    Subclasses a QueuePool implementation so every checkout wait is timed.
+
+    Args:
+        base: Pool class to extend, e.g. QueuePool or AsyncAdaptedQueuePool.
+        metrics (PoolMetrics): Receives the measurements.
+
+    Returns:
+        type: Pool class to pass as `poolclass` to create_engine.
+    """
+
+    class InstrumentedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                metrics.record_timeout()
+                raise
+            metrics.record_checkout(time.perf_counter() - start)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
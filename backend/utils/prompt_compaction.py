@@ -0,0 +1,384 @@
+import asyncio
+import contextvars
+import json
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from utils.stage_timing import stage, PROMPT_COMPACTION
+
+# Token budget for the resume text sent in one structuring call, and chunking limits
+EXTRACTION_TOKEN_BUDGET = int(os.getenv("EXTRACTION_TOKEN_BUDGET", "6000"))
+EXTRACTION_MAX_CHUNKS = int(os.getenv("EXTRACTION_MAX_CHUNKS", "6"))
+EXTRACTION_CHUNK_CONCURRENCY = int(os.getenv("EXTRACTION_CHUNK_CONCURRENCY", "4"))
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+
+# Lines at the top and bottom of each page checked for running headers/footers
+HEADER_FOOTER_LINES = 3
+
+# Output keys of the structuring prompt, with the sub-fields the model is asked for
+FIELD_DESCRIPTIONS = {
+    "Name": "Name",
+    "Email": "Email",
+    "Phone Number": "Phone Number",
+    "Skills": "Skills",
+    "Work Experience": "Work Experience (Company, Role, Duration)",
+    "Education": "Education (Degree, Institution, Year)",
+    "Certifications": "Certifications",
+    "Projects": "Projects",
+    "Gpa": "Gpa",
+}
+EXTRACTION_FIELDS = "\n".join(f"- {description}" for description in FIELD_DESCRIPTIONS.values())
+
+SECTION_HEADINGS = {
+    "summary", "profile", "objective", "about", "experience", "work experience", "professional experience",
+    "employment", "employment history", "work history", "education", "academic background", "skills",
+    "technical skills", "core competencies", "projects", "certifications", "certificates", "licenses",
+    "awards", "honors", "achievements", "publications", "presentations", "talks", "conferences",
+    "research", "research experience", "teaching", "teaching experience", "volunteering",
+    "volunteer experience", "languages", "interests", "references", "grants", "patents",
+    "activities", "leadership", "courses", "coursework", "service",
+}
+# Sections dropped first when a document would need more than EXTRACTION_MAX_CHUNKS chunks
+LOW_PRIORITY_SECTIONS = {
+    "publications", "presentations", "talks", "conferences", "references", "interests", "grants",
+    "activities", "courses", "coursework", "service",
+}
+
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$|^[-–]\s*\d{1,3}\s*[-–]$", re.IGNORECASE)
+_BOILERPLATE = re.compile(
+    r"^(references (are )?available (up)?on request\.?|curriculum vitae|r[ée]sum[ée]|cv)$", re.IGNORECASE
+)
+_MARKDOWN_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_INVISIBLE = re.compile(r"[\u200b\u200c\u200d\ufeff\x0c]")
+_INLINE_SPACE = re.compile(r"[ \t\u00a0]+")
+_HEADING_MARKUP = re.compile(r"^[#*_\s]+|[*_:\s]+$")
+_HEADING_SEPARATORS = re.compile(r"\s*(?:&|\band\b|/|,)\s*")
+
+_encoder = None
+_encoder_loaded = False
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    """Returns the tiktoken encoder, or None when tiktoken (an optional dependency) is unavailable."""
+    global _encoder, _encoder_loaded
+    with _encoder_lock:
+        if not _encoder_loaded:
+            _encoder_loaded = True
+            try:
+                import tiktoken
+                _encoder = tiktoken.get_encoding(TOKENIZER_ENCODING)
+            except Exception as e:
+                print(f"[⚠️] tiktoken unavailable ({e}), estimating tokens as characters / 4")
+        return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Counts tokens with tiktoken when installed, otherwise estimates them as len / 4."""
+    encoder = _get_encoder()
+    if encoder is None:
+        return (len(text) + 3) // 4
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def _normalize_line(line: str) -> str:
+    line = _INVISIBLE.sub("", _MARKDOWN_IMAGE.sub("", line))
+    return _INLINE_SPACE.sub(" ", line).strip()
+
+
+def _edge_key(line: str) -> str:
+    # Digits are masked so "Page 2" and "Page 3" count as the same running footer
+    return re.sub(r"\d+", "#", line.lower())
+
+
+def _edge_indices(lines: List[str]) -> Set[int]:
+    filled = [index for index, line in enumerate(lines) if line]
+    return set(filled[:HEADER_FOOTER_LINES] + filled[-HEADER_FOOTER_LINES:])
+
+
+def _repeated_edge_keys(pages: List[List[str]]) -> Set[str]:
+    """Keys of lines found at the top or bottom of at least half the pages (and at least two)."""
+    if len(pages) < 2:
+        return set()
+    counts = Counter()
+    for lines in pages:
+        counts.update({_edge_key(lines[index]) for index in _edge_indices(lines)})
+    threshold = max(2, (len(pages) + 1) // 2)
+    return {key for key, count in counts.items() if count >= threshold}
+
+
+def compact_pages(pages: List[str]) -> str:
+    """
+    Normalizes the text of each page and strips content that only costs tokens.
+
+    Collapses runs of spaces and blank lines, removes invisible characters,
+    markdown image references, page numbers and boilerplate lines, and keeps
+    only the first occurrence of running headers/footers repeated across pages.
+
+    Args:
+        pages (List[str]): Text (or OCR markdown) of each page, in order.
+
+    Returns:
+        str: The compacted resume text.
+    """
+    page_lines = [[_normalize_line(line) for line in page.splitlines()] for page in pages]
+    repeated = _repeated_edge_keys(page_lines)
+    seen_repeated = set()
+
+    output: List[str] = []
+    for lines in page_lines:
+        edges = _edge_indices(lines)
+        for index, line in enumerate(lines):
+            if not line:
+                if output and output[-1]:
+                    output.append("")
+                continue
+            if _PAGE_NUMBER.match(line) or _BOILERPLATE.match(line):
+                continue
+            if index in edges and _edge_key(line) in repeated:
+                if _edge_key(line) in seen_repeated:
+                    continue
+                seen_repeated.add(_edge_key(line))
+            output.append(line)
+        if output and output[-1]:
+            output.append("")
+    return "\n".join(output).strip()
+
+
+def _section_name(line: str) -> Optional[str]:
+    """Returns the canonical section name when a line is a section heading."""
+    text = _HEADING_MARKUP.sub("", line).lower()
+    if not text or len(text) > 50:
+        return None
+    parts = [part for part in _HEADING_SEPARATORS.split(text) if part]
+    if parts and all(part in SECTION_HEADINGS for part in parts):
+        return parts[0]
+    return None
+
+
+def split_sections(text: str) -> List[Tuple[Optional[str], Optional[str], str]]:
+    """
+    Splits resume text at section headings.
+
+    Returns:
+        List[Tuple]: (section name, heading line, section text) in document order.
+        The contact block before the first heading has name and heading None.
+    """
+    sections: List[Tuple[Optional[str], Optional[str], List[str]]] = [(None, None, [])]
+    for line in text.splitlines():
+        name = _section_name(line) if line else None
+        if name:
+            sections.append((name, line, [line]))
+        else:
+            sections[-1][2].append(line)
+    return [(name, heading, "\n".join(lines).strip()) for name, heading, lines in sections if "".join(lines).strip()]
+
+
+def _split_to_budget(body: str, heading: Optional[str], budget: int) -> List[str]:
+    """Splits one section into pieces under `budget`, at paragraph then line boundaries."""
+    if count_tokens(body) <= budget:
+        return [body]
+
+    units: List[str] = []
+    for paragraph in body.split("\n\n"):
+        if count_tokens(paragraph) <= budget:
+            units.append(paragraph)
+            continue
+        for line in paragraph.splitlines():
+            # A single line over budget is cut by characters at the estimate's ratio
+            step = budget * 4
+            units.extend(line[start:start + step] for start in range(0, len(line), step))
+
+    pieces, current, current_tokens = [], [], 0
+    for unit in units:
+        tokens = count_tokens(unit)
+        if current and current_tokens + tokens > budget:
+            pieces.append("\n\n".join(current))
+            # Later pieces repeat the heading so the model knows which section it is reading
+            current = [f"{heading} (continued)"] if heading else []
+            current_tokens = count_tokens(current[0]) if current else 0
+        current.append(unit)
+        current_tokens += tokens
+    if current:
+        pieces.append("\n\n".join(current))
+    return pieces
+
+
+def chunk_text(text: str, budget: int = EXTRACTION_TOKEN_BUDGET,
+               max_chunks: int = EXTRACTION_MAX_CHUNKS) -> List[str]:
+    """
+    Packs compacted resume text into at most `max_chunks` chunks of at most `budget` tokens.
+
+    Chunks follow section boundaries. When the document would need more than
+    `max_chunks` chunks, low-priority sections (publications, talks, ...) are
+    dropped first and anything still over the limit is truncated, which bounds
+    the number and size of LLM calls per resume.
+    """
+    if count_tokens(text) <= budget:
+        return [text]
+
+    pieces = []
+    for name, heading, body in split_sections(text):
+        for piece in _split_to_budget(body, heading, budget):
+            pieces.append((name, piece, count_tokens(piece)))
+
+    capacity = budget * max_chunks
+    total = sum(tokens for _, _, tokens in pieces)
+    for position in range(len(pieces) - 1, -1, -1):
+        if total <= capacity:
+            break
+        name, _, tokens = pieces[position]
+        if name in LOW_PRIORITY_SECTIONS:
+            print(f"[⚠️] Dropping part of the '{name}' section to stay within the token budget")
+            total -= tokens
+            pieces.pop(position)
+
+    chunks, current, current_tokens = [], [], 0
+    for _, piece, tokens in pieces:
+        if current and current_tokens + tokens > budget:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+
+    if len(chunks) > max_chunks:
+        print(f"[⚠️] Resume needs {len(chunks)} chunks, truncating to {max_chunks}")
+        chunks = chunks[:max_chunks]
+    return chunks
+
+
+def prepare_resume_chunks(pages: List[str], budget: int = EXTRACTION_TOKEN_BUDGET,
+                          max_chunks: int = EXTRACTION_MAX_CHUNKS) -> List[str]:
+    """
+    Compacts extracted pages and splits them into token-budgeted chunks.
+
+    Returns:
+        List[str]: One chunk for typical resumes, several for long documents.
+    """
+    with stage(PROMPT_COMPACTION):
+        raw_tokens = count_tokens("\n".join(pages))
+        text = compact_pages(pages)
+        chunks = chunk_text(text, budget, max_chunks)
+    print(f"[INFO] Compacted resume text from {raw_tokens} to {count_tokens(text)} tokens in {len(chunks)} chunk(s)")
+    return chunks
+
+
+def build_extraction_prompt(resume_text: str, part: int = 1, parts: int = 1,
+                            fields: Optional[List[str]] = None) -> str:
+    """
+    Builds the structuring prompt for a resume, or for one part of a chunked resume.
+
+    `fields` restricts the prompt to some of the FIELD_DESCRIPTIONS keys, e.g.
+    the ones the local parser could not resolve; all fields by default.
+    """
+    field_list = EXTRACTION_FIELDS if fields is None else "\n".join(f"- {FIELD_DESCRIPTIONS[field]}" for field in fields)
+    if parts > 1:
+        instruction = (
+            f"This is part {part} of {parts} of a resume. Extract the following details that appear "
+            f"in this part and return JSON, omitting details that are not present:"
+        )
+    else:
+        instruction = "Extract the following details from this resume and return JSON:"
+    return f"{instruction}\n{field_list}\n\nResume Text:\n{resume_text}"
+
+
+_EMPTY_STRINGS = {"", "n/a", "na", "none", "null", "not provided", "not mentioned", "not available"}
+
+
+def _is_empty(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip().lower() in _EMPTY_STRINGS
+    if isinstance(value, (list, dict)):
+        return not value
+    return False
+
+
+def _dedupe(items: List[Any]) -> List[Any]:
+    seen, unique = set(), []
+    for item in items:
+        key = json.dumps(item, sort_keys=True, default=str).lower() if not isinstance(item, str) else item.strip().lower()
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+def _merge_values(first: Any, second: Any) -> Any:
+    if _is_empty(first):
+        return second
+    if _is_empty(second):
+        return first
+    if isinstance(first, list) and isinstance(second, list):
+        return _dedupe(first + second)
+    if isinstance(first, dict) and isinstance(second, dict):
+        merged = dict(first)
+        for key, value in second.items():
+            merged[key] = _merge_values(merged.get(key), value)
+        return merged
+    # Categorized and flat skill lists from different chunks
+    if isinstance(first, dict) and isinstance(second, list):
+        return _merge_values(first, {"Other": second})
+    if isinstance(first, list) and isinstance(second, dict):
+        return _merge_values({"Other": first}, second)
+    # Scalars: the first chunk holds the contact block, so earlier values win
+    return first
+
+
+def merge_extractions(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merges the JSON extracted from each chunk into one resume in the same schema.
+
+    Lists are concatenated without duplicates, objects are merged key by key
+    and for single values the first non-empty one is kept.
+    """
+    merged: Dict[str, Any] = {}
+    for result in results:
+        for key, value in result.items():
+            merged[key] = _merge_values(merged.get(key), value)
+    return merged
+
+
+def extract_chunks(complete: Callable[[str], Dict[str, Any]], chunks: List[str],
+                   fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Structures a resume from its chunks with `complete` (prompt -> parsed JSON).
+
+    A single chunk is one call. Several chunks are extracted in parallel on a
+    small thread pool and merged.
+    """
+    if len(chunks) == 1:
+        return complete(build_extraction_prompt(chunks[0], fields=fields))
+
+    prompts = [
+        build_extraction_prompt(chunk, part, len(chunks), fields) for part, chunk in enumerate(chunks, start=1)
+    ]
+    print(f"[INFO] Extracting {len(prompts)} chunks in parallel")
+    with ThreadPoolExecutor(max_workers=min(EXTRACTION_CHUNK_CONCURRENCY, len(prompts))) as pool:
+        # Each task runs in its own copy of the caller's context so stage timings are kept
+        futures = [pool.submit(contextvars.copy_context().run, complete, prompt) for prompt in prompts]
+        return merge_extractions([future.result() for future in futures])
+
+
+async def extract_chunks_async(complete: Callable[[str], Awaitable[Dict[str, Any]]],
+                               chunks: List[str], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Async variant of extract_chunks; chunk calls run concurrently on the event loop."""
+    if len(chunks) == 1:
+        return await complete(build_extraction_prompt(chunks[0], fields=fields))
+
+    semaphore = asyncio.Semaphore(EXTRACTION_CHUNK_CONCURRENCY)
+
+    async def complete_part(part: int, chunk: str):
+        async with semaphore:
+            return await complete(build_extraction_prompt(chunk, part, len(chunks), fields))
+
+    print(f"[INFO] Extracting {len(chunks)} chunks in parallel")
+    results = await asyncio.gather(*(complete_part(part, chunk) for part, chunk in enumerate(chunks, start=1)))
+    return merge_extractions(list(results))
@@ -0,0 +1,105 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.search_index import iter_strings
+
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+# Extracted fields stored in String columns
+TEXT_FIELDS = ("Name", "Email", "Phone Number", "Gpa", "model_type")
+
+
+def text_fields(extracted_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns a copy of the extracted data with the TEXT_FIELDS values as strings.
+
+    LLMs often return "Gpa" as a number (3.8) and "Phone Number" as an int.
+    asyncpg, unlike psycopg2, rejects those for String columns, so they are
+    converted before building the Resume row. Missing values stay None.
+    """
+    data = dict(extracted_data)
+    for field in TEXT_FIELDS:
+        value = data.get(field)
+        if value is not None and not isinstance(value, str):
+            data[field] = str(value)
+    return data
+
+
+def parse_gpa(value: Any) -> Optional[float]:
+    """
+    Converts an extracted GPA string into a number on the 4.0 scale.
+
+    Explicit scales ("3.6/4", "8.2/10", "85%") are converted. For bare numbers
+    the scale is inferred: up to 4 is taken as-is, up to 10 as a 10-point CGPA
+    and up to 100 as a percentage. "0", empty and unparseable values are None.
+
+    Args:
+        value (Any): GPA as returned by the extractors (usually a string).
+
+    Returns:
+        Optional[float]: GPA on a 4.0 scale, rounded to two decimals.
+    """
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    numbers = [float(number) for number in _NUMBER_PATTERN.findall(text)]
+    if not numbers or numbers[0] <= 0:
+        return None
+
+    gpa = numbers[0]
+    if len(numbers) > 1 and ("/" in text or "out of" in text) and numbers[1] > 0:
+        scale = numbers[1]
+    elif "%" in text:
+        scale = 100.0
+    elif gpa <= 4:
+        scale = 4.0
+    elif gpa <= 10:
+        scale = 10.0
+    elif gpa <= 100:
+        scale = 100.0
+    else:
+        return None
+
+    if gpa > scale:
+        return None
+    return round(gpa / scale * 4, 2)
+
+
+DEFAULT_SKILL_CATEGORY = "general"
+
+
+def normalize_skill(skill: str) -> str:
+    """Lowercases a skill name and collapses its whitespace."""
+    return " ".join(skill.lower().split())
+
+
+def skill_rows(skills: Any) -> List[Tuple[str, str]]:
+    """
+    Flattens the extracted skills JSON into unique (skill_norm, category) pairs.
+
+    Top-level keys become categories, so {"Cloud": ["Kubernetes"], "Rust": "Expert"}
+    gives [("kubernetes", "cloud"), ("expert", "rust")]. Flat lists fall into
+    the "general" category.
+    """
+    if isinstance(skills, dict):
+        grouped = [(normalize_skill(str(key)) or DEFAULT_SKILL_CATEGORY, value) for key, value in skills.items()]
+    else:
+        grouped = [(DEFAULT_SKILL_CATEGORY, skills)]
+
+    rows = set()
+    for category, values in grouped:
+        for skill in iter_strings(values):
+            skill = normalize_skill(skill)
+            if skill:
+                rows.add((skill, category))
+    return sorted(rows)
+
+
+def skill_tags(skills: Any) -> List[str]:
+    """
+    Flattens the extracted skills JSON into sorted, lowercased skill names.
+
+    Category keys are dropped, so {"Cloud": ["Kubernetes", "AWS"]} becomes
+    ["aws", "kubernetes"].
+    """
+    return sorted({skill for skill, _ in skill_rows(skills)})
@@ -0,0 +1,225 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# BM25 parameters from environment variables
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+# Resume fields that feed the keyword index and how much a hit in each counts
+FIELD_WEIGHTS = {
+    "skills": 2.0,
+    "work_experience": 1.0,
+    "education": 1.0,
+    "certifications": 1.5,
+    "projects": 1.0,
+}
+
+# Keeps tech tokens such as "c++", "c#", "node.js" and ".net" intact
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*|\.[a-z][a-z0-9]*")
+
+_STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "of", "on", "or", "the", "to", "with", "who", "that", "this", "looking", "candidate", "someone",
+    "experience", "years", "year", "skills", "knowledge", "strong", "good",
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercases and splits text into normalized search terms."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOP_WORDS]
+
+
+def iter_strings(value: Any) -> Iterator[str]:
+    """Yields every string (keys included) nested in an extracted resume field."""
+    if value is None:
+        return
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield str(key)
+            yield from iter_strings(item)
+    elif isinstance(value, (list, tuple, set)):
+        for item in value:
+            yield from iter_strings(item)
+    else:
+        yield str(value)
+
+
+def field_text(value: Any) -> str:
+    """Flattens a JSON resume field into a single searchable string."""
+    return " ".join(iter_strings(value))
+
+
+class ResumeSearchIndex:
+    """
+    In-memory inverted index over the structured resume fields, scored with BM25.
+
+    Each field contributes its tokens with the weight in FIELD_WEIGHTS, so a
+    skill match counts more than a word in a project description. Queries only
+    touch the postings of their own terms, which keeps rescoring in the
+    millisecond range for pools of tens of thousands of resumes.
+
+    The index lives in one process and only sees the resumes that process
+    ingests or deletes. With several workers, each one calls `rebuild`
+    periodically (SEARCH_INDEX_REFRESH_SECONDS) to pick up the others' changes.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._doc_terms: Dict[int, Dict[str, float]] = {}
+        self._doc_lengths: Dict[int, float] = {}
+        self._total_length = 0.0
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self.built = False
+        self.built_at: Optional[float] = None
+        # Changes made while a rebuild is reading the database, replayed onto the new index
+        self._journal: Optional[List[tuple]] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def _document_terms(self, fields: Dict[str, Any]) -> Dict[str, float]:
+        terms: Counter = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(field_text(fields.get(field))):
+                terms[token] += weight
+        return dict(terms)
+
+    def _remove_locked(self, resume_id: int) -> None:
+        terms = self._doc_terms.pop(resume_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(resume_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(resume_id)
+
+    def add(self, resume_id: int, fields: Dict[str, Any]) -> None:
+        """
+        Indexes (or re-indexes) one resume.
+
+        Args:
+            resume_id (int): Resume primary key.
+            fields (dict): Mapping of field name (e.g. "skills") to its JSON value.
+        """
+        terms = self._document_terms(fields)
+        length = sum(terms.values())
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((resume_id, fields))
+            self._remove_locked(resume_id)
+            self._doc_terms[resume_id] = terms
+            self._doc_lengths[resume_id] = length
+            self._total_length += length
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[resume_id] = frequency
+
+    def remove(self, resume_id: int) -> None:
+        """Drops a resume from the index. Unknown IDs are ignored."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((resume_id, None))
+            self._remove_locked(resume_id)
+
+    def rebuild(self, documents: Iterable[tuple]) -> int:
+        """
+        Replaces the index contents with the given (resume_id, fields) pairs.
+
+        Queries keep using the current contents until the new index is ready.
+        Resumes added or removed meanwhile are applied on top of it, since the
+        documents may have been read before those changes.
+
+        Returns:
+            int: Number of indexed resumes.
+        """
+        with self._rebuild_lock:
+            with self._lock:
+                self._journal = []
+            fresh = ResumeSearchIndex(self.k1, self.b)
+            try:
+                for resume_id, fields in documents:
+                    fresh.add(resume_id, fields)
+            except BaseException:
+                with self._lock:
+                    self._journal = None
+                raise
+            with self._lock:
+                for resume_id, fields in self._journal:
+                    if fields is None:
+                        fresh.remove(resume_id)
+                    else:
+                        fresh.add(resume_id, fields)
+                self._journal = None
+                self._postings = fresh._postings
+                self._doc_terms = fresh._doc_terms
+                self._doc_lengths = fresh._doc_lengths
+                self._total_length = fresh._total_length
+                self.built = True
+                self.built_at = time.time()
+                return len(self._doc_lengths)
+
+    def score(self, query: str, candidate_ids: Optional[Iterable[int]] = None,
+              top_k: Optional[int] = None) -> Dict[int, float]:
+        """
+        Computes BM25 scores of the indexed resumes for a query.
+
+        Args:
+            query (str): Free text; tokenized the same way as the resumes.
+            candidate_ids (Iterable[int], optional): Restrict scoring to these resumes.
+            top_k (int, optional): Keep only the best `top_k` scores.
+
+        Returns:
+            Dict[int, float]: Resume ID to score, for resumes matching at least one term.
+        """
+        query_terms = set(tokenize(query))
+        candidates = set(candidate_ids) if candidate_ids is not None else None
+        scores: Dict[int, float] = {}
+
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if not query_terms or doc_count == 0:
+                return {}
+            average_length = self._total_length / doc_count or 1.0
+
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for resume_id, frequency in postings.items():
+                    if candidates is not None and resume_id not in candidates:
+                        continue
+                    length_norm = 1 - self.b + self.b * self._doc_lengths[resume_id] / average_length
+                    scores[resume_id] = scores.get(resume_id, 0.0) + idf * (
+                        frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+                    )
+
+        if top_k is not None and len(scores) > top_k:
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+            scores = dict(best)
+        return scores
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "built": self.built,
+                "age_seconds": round(time.time() - self.built_at, 1) if self.built_at else None,
+                "documents": len(self._doc_lengths),
+                "terms": len(self._postings),
+                "average_length": round(self._total_length / len(self._doc_lengths), 2) if self._doc_lengths else 0.0,
+            }
+
+
+search_index = ResumeSearchIndex()
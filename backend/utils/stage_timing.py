@@ -0,0 +1,177 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Stage names recorded by the extraction pipeline
+ROUTING_PROBE = "routing_probe"
+PDF_PARSE = "pdf_parse"
+OCR_UPLOAD = "ocr_upload"
+OCR = "ocr"
+PROMPT_COMPACTION = "prompt_compaction"
+LOCAL_PARSE = "local_parse"
+LLM = "llm"
+RATE_LIMIT_WAIT = "rate_limit_wait"  # Part of llm/prompt_llm/embedding spent waiting for the provider budget
+JSON_PARSE = "json_parse"
+DB_UPSERT = "db_upsert"
+EMBEDDING = "embedding"
+VECTOR_UPSERT = "vector_upsert"
+
+# Stage names recorded while serving requests
+UPLOAD_SAVE = "upload_save"
+PROMPT_LLM = "prompt_llm"
+VECTOR_QUERY = "vector_query"
+RESCORE = "rescore"
+DB_FETCH = "db_fetch"
+
+# Counters recorded alongside the stages
+PROMPT_TOKENS = "prompt_tokens"
+COMPLETION_TOKENS = "completion_tokens"
+RETRIES = "retries"
+
+
+class StageTimings:
+    """
+    Accumulated wall-clock seconds and call counts per pipeline stage, plus
+    named counters and details (small JSON values such as a routing decision).
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.details: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, other: "StageTimings") -> None:
+        """Adds another collector's stages, counters and details, e.g. from work done ahead in a separate task."""
+        with other._lock:
+            seconds, counts, counters = dict(other.seconds), dict(other.counts), dict(other.counters)
+            details = dict(other.details)
+        with self._lock:
+            for name, value in seconds.items():
+                self.seconds[name] = self.seconds.get(name, 0.0) + value
+                self.counts[name] = self.counts.get(name, 0) + counts.get(name, 0)
+            for name, value in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            self.details.update(details)
+
+    def counter(self, name: str) -> int:
+        with self._lock:
+            return self.counters.get(name, 0)
+
+    def set_detail(self, name: str, value: Any) -> None:
+        with self._lock:
+            self.details[name] = value
+
+    def detail(self, name: str) -> Any:
+        with self._lock:
+            return self.details.get(name)
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self.seconds)
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """
+        Formats the stages as a Server-Timing header value, e.g.
+        `vector_query;dur=12.5, rescore;dur=0.8, total;dur=240.1` (milliseconds).
+        """
+        with self._lock:
+            entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.seconds.items()]
+        if total is not None:
+            entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current_timings: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+_listeners: List[Callable[[str, float, bool], None]] = []
+
+
+def add_stage_listener(listener: Callable[[str, float, bool], None]) -> None:
+    """Registers a callback invoked with (stage, seconds, failed) for every timed stage."""
+    _listeners.append(listener)
+
+
+def record_stage(name: str, seconds: float, failed: bool = False) -> None:
+    """Adds a stage duration to the active collector and notifies listeners."""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+    for listener in _listeners:
+        listener(name, seconds, failed)
+
+
+def merge_stages(timings: StageTimings) -> None:
+    """
+    Adds stages collected elsewhere to the active collector. Listeners are not
+    notified again, since they already saw the stages when they were timed.
+    """
+    current = _current_timings.get()
+    if current is not None and current is not timings:
+        current.merge(timings)
+
+
+def record_count(name: str, amount: int = 1) -> None:
+    """Adds to a named counter (tokens, retries) of the active collector, if any."""
+    timings = _current_timings.get()
+    if timings is not None and amount:
+        timings.increment(name, amount)
+
+
+def record_detail(name: str, value: Any) -> None:
+    """Attaches a detail (e.g. the extractor routing decision) to the active collector, if any."""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.set_detail(name, value)
+
+
+def record_token_usage(usage) -> None:
+    """Records the prompt/completion token counts of an OpenAI or Mistral response `usage`."""
+    if usage is None:
+        return
+    record_count(PROMPT_TOKENS, getattr(usage, "prompt_tokens", 0) or 0)
+    record_count(COMPLETION_TOKENS, getattr(usage, "completion_tokens", 0) or 0)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times the enclosed block as pipeline stage `name`.
+
+    Works around `await` expressions too, and the duration is recorded
+    whether the block succeeds or raises.
+    """
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except Exception:
+        failed = True
+        raise
+    finally:
+        record_stage(name, time.perf_counter() - start, failed)
+
+
+@contextmanager
+def collect_stages() -> Iterator[StageTimings]:
+    """
+    Collects every stage timed in the current context (including work handed
+    to `run_blocking`, which copies the context) into a fresh StageTimings.
+    """
+    timings = StageTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
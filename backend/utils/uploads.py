@@ -0,0 +1,122 @@
+import hashlib
+import os
+import uuid
+from typing import BinaryIO, List, NamedTuple
+
+from fastapi import UploadFile
+
+from utils.concurrency import run_blocking
+
+# Upload limits from environment variables
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds UPLOAD_MAX_BYTES."""
+
+
+class StoredUpload(NamedTuple):
+    path: str
+    content_hash: str
+    size: int
+    duplicate: bool  # True if identical bytes were already stored
+
+
+def _temp_path(upload_dir: str) -> str:
+    return os.path.join(upload_dir, f".{uuid.uuid4().hex}.part")
+
+
+def _finalize(temp_path: str, upload_dir: str, content_hash: str, size: int) -> StoredUpload:
+    """Moves a fully written temp file to its content-addressed name."""
+    path = os.path.join(upload_dir, f"{content_hash}.pdf")
+    if os.path.exists(path):
+        os.remove(temp_path)
+        return StoredUpload(path, content_hash, size, True)
+
+    os.replace(temp_path, path)
+    return StoredUpload(path, content_hash, size, False)
+
+
+def _discard(temp_path: str) -> None:
+    try:
+        os.remove(temp_path)
+    except OSError:
+        pass
+
+
+def remove_uploads(uploads: List[StoredUpload]) -> None:
+    """Deletes files stored by a request that was aborted; files that already existed are kept."""
+    for upload in uploads:
+        if not upload.duplicate:
+            _discard(upload.path)
+
+
+def _too_large(max_bytes: int) -> UploadTooLargeError:
+    return UploadTooLargeError(f"File exceeds the {max_bytes} byte limit")
+
+
+def store_stream(source: BinaryIO, upload_dir: str, max_bytes: int = UPLOAD_MAX_BYTES) -> StoredUpload:
+    """
+    Streams a file object to a content-addressed file, hashing as it writes.
+
+    Args:
+        source (BinaryIO): File object to read from.
+        upload_dir (str): Directory to store the file in.
+        max_bytes (int): Maximum accepted size.
+
+    Returns:
+        StoredUpload: Where the bytes were stored and their SHA-256.
+
+    Raises:
+        UploadTooLargeError: As soon as more than `max_bytes` have been read.
+    """
+    temp_path = _temp_path(upload_dir)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, "wb") as target:
+            for chunk in iter(lambda: source.read(UPLOAD_CHUNK_SIZE), b""):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                digest.update(chunk)
+                target.write(chunk)
+    except BaseException:
+        _discard(temp_path)
+        raise
+
+    return _finalize(temp_path, upload_dir, digest.hexdigest(), size)
+
+
+async def save_upload(file: UploadFile, upload_dir: str, max_bytes: int = UPLOAD_MAX_BYTES) -> StoredUpload:
+    """
+    Async variant of store_stream for FastAPI uploads.
+
+    Chunks are read with the UploadFile's async API and written on the
+    blocking pool, so the event loop never waits on disk I/O.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    temp_path = _temp_path(upload_dir)
+    digest = hashlib.sha256()
+    size = 0
+    target = await run_blocking(open, temp_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            digest.update(chunk)
+            await run_blocking(target.write, chunk)
+        await run_blocking(target.close)
+    except BaseException:
+        await run_blocking(target.close)
+        await run_blocking(_discard, temp_path)
+        raise
+
+    return await run_blocking(_finalize, temp_path, upload_dir, digest.hexdigest(), size)
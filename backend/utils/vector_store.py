@@ -0,0 +1,315 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Pinecone configuration from environment variables
+PINECONE_API_KEY = os.getenv("PINECONE_KEY")
+PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT")
+INDEX_NAME = os.getenv("INDEX_NAME")
+
+# (vector id, values, metadata)
+Vector = Tuple[str, List[float], Dict[str, Any]]
+
+
+class VectorStore(ABC):
+    """
+    Minimal interface the embedding helpers need from a vector database.
+
+    Query results are dictionaries with "id", "score" and "metadata" keys,
+    ordered by descending cosine similarity.
+    """
+
+    @abstractmethod
+    def upsert(self, vectors: List[Vector]) -> None:
+        """Inserts or overwrites vectors by ID."""
+
+    @abstractmethod
+    def query(self, vector: List[float], top_k: int) -> List[Dict[str, Any]]:
+        """Returns the `top_k` most similar vectors."""
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """Removes vectors by ID. Unknown IDs are ignored."""
+
+
+def init_pinecone():
+    """Initialize Pinecone connection and return index."""
+    try:
+        from pinecone import Pinecone
+
+        # Initialize Pinecone client
+        pc = Pinecone(api_key=PINECONE_API_KEY)
+
+        # List existing indexes
+        existing_indexes = pc.list_indexes().names()
+
+        # Ensure the index exists before connecting
+        if INDEX_NAME not in existing_indexes:
+            print(f"[⚠️] Index '{INDEX_NAME}' does not exist")
+            return
+
+        # Connect to the index
+        index = pc.Index(INDEX_NAME)
+        print(f"[✅] Connected to Pinecone index: {INDEX_NAME}")
+        return index
+
+    except Exception as e:
+        print(f"[❌] Error initializing Pinecone: {e}")
+        return None
+
+
+class PineconeVectorStore(VectorStore):
+    """Vector store backed by a Pinecone index."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def upsert(self, vectors: List[Vector]) -> None:
+        self.index.upsert(vectors=vectors)
+
+    def query(self, vector: List[float], top_k: int) -> List[Dict[str, Any]]:
+        results = self.index.query(vector=vector, top_k=top_k, include_metadata=True)
+        if not results or not results["matches"]:
+            return []
+        return [
+            {"id": match["id"], "score": match["score"], "metadata": match["metadata"] or {}}
+            for match in results["matches"]
+        ]
+
+    def delete(self, ids: List[str]) -> None:
+        self.index.delete(ids=ids)
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store for offline use and small to medium resume pools.
+
+    Normalized float32 vectors live in a memory-mapped matrix so cosine
+    similarity is a single matrix-vector product followed by `argpartition`.
+    Changes are persisted incrementally: rows are flushed in place and every
+    upsert/delete is appended to a JSON lines log, which is compacted once it
+    grows well past the number of live vectors.
+
+    Files in `path`:
+        vectors.f32   (capacity, dim) float32 matrix
+        header.json   {"dim": ..., "capacity": ...}
+        log.jsonl     {"op": "put", "id", "row", "metadata"} / {"op": "del", "id"}
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        self._matrix: Optional[np.memmap] = None
+        self._row_ids: List[Optional[str]] = []
+        self._row_metadata: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._free_rows: List[int] = []
+        self._live = np.zeros(0, dtype=bool)
+        self._log_entries = 0
+        self._next_row = 0
+        self._lock = threading.RLock()
+
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _header_path(self) -> str:
+        return os.path.join(self.path, "header.json")
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.path, "log.jsonl")
+
+    def _load(self) -> None:
+        """Maps the matrix from disk and replays the operation log."""
+        if not os.path.exists(self._header_path):
+            return
+
+        with open(self._header_path, "r", encoding="utf-8") as f:
+            header = json.load(f)
+        self.dim = header["dim"]
+        self.capacity = header["capacity"]
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+        self._row_ids = [None] * self.capacity
+        self._row_metadata = [{} for _ in range(self.capacity)]
+        self._live = np.zeros(self.capacity, dtype=bool)
+
+        if os.path.exists(self._log_path):
+            with open(self._log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Ignore a torn final line
+                    self._log_entries += 1
+                    if entry["op"] == "put":
+                        self._assign(entry["id"], entry["row"], entry.get("metadata") or {})
+                    elif entry["op"] == "del":
+                        self._release(entry["id"])
+
+        used = set(self._rows.values())
+        high_water = max(used) + 1 if used else 0
+        self._free_rows = [row for row in range(high_water) if row not in used]
+        self._next_row = high_water
+        print(f"[✅] Loaded local vector store with {len(self._rows)} vectors from {self.path}")
+
+    def _assign(self, vector_id: str, row: int, metadata: Dict[str, Any]) -> None:
+        previous = self._rows.get(vector_id)
+        if previous is not None and previous != row:
+            self._live[previous] = False
+            self._row_ids[previous] = None
+        self._rows[vector_id] = row
+        self._row_ids[row] = vector_id
+        self._row_metadata[row] = metadata
+        self._live[row] = True
+
+    def _release(self, vector_id: str) -> Optional[int]:
+        row = self._rows.pop(vector_id, None)
+        if row is not None:
+            self._live[row] = False
+            self._row_ids[row] = None
+            self._row_metadata[row] = {}
+        return row
+
+    def _write_header(self) -> None:
+        tmp_path = f"{self._header_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "capacity": self.capacity}, f)
+        os.replace(tmp_path, self._header_path)
+
+    def _ensure_capacity(self, needed: int) -> None:
+        """Grows the memory-mapped matrix geometrically to hold `needed` rows."""
+        if needed <= self.capacity:
+            return
+
+        new_capacity = max(needed, self.capacity * 2, self.INITIAL_CAPACITY)
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        with open(self._matrix_path, "ab") as f:
+            f.truncate(new_capacity * self.dim * np.dtype(np.float32).itemsize)
+
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(new_capacity, self.dim))
+        self._row_ids.extend([None] * (new_capacity - self.capacity))
+        self._row_metadata.extend({} for _ in range(new_capacity - self.capacity))
+        self._live = np.concatenate([self._live, np.zeros(new_capacity - self.capacity, dtype=bool)])
+        self.capacity = new_capacity
+        self._write_header()
+
+    def _append_log(self, entries: List[Dict[str, Any]]) -> None:
+        with open(self._log_path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        self._log_entries += len(entries)
+
+        # Rewrite the log as a snapshot once it is mostly superseded entries
+        if self._log_entries > 4 * max(len(self._rows), 256):
+            self._compact_log()
+
+    def _compact_log(self) -> None:
+        tmp_path = f"{self._log_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for vector_id, row in self._rows.items():
+                f.write(json.dumps({"op": "put", "id": vector_id, "row": row, "metadata": self._row_metadata[row]}) + "\n")
+        os.replace(tmp_path, self._log_path)
+        self._log_entries = len(self._rows)
+
+    def upsert(self, vectors: List[Vector]) -> None:
+        if not vectors:
+            return
+
+        values = np.asarray([vector[1] for vector in vectors], dtype=np.float32)
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values /= np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = values.shape[1]
+            elif values.shape[1] != self.dim:
+                raise ValueError(f"Vector dimension {values.shape[1]} does not match store dimension {self.dim}")
+
+            new_rows = sum(1 for vector_id, _, _ in vectors if vector_id not in self._rows)
+            self._ensure_capacity(self._next_row + max(0, new_rows - len(self._free_rows)))
+
+            log_entries = []
+            for (vector_id, _, metadata), value in zip(vectors, values):
+                row = self._rows.get(vector_id)
+                if row is None:
+                    if self._free_rows:
+                        row = self._free_rows.pop()
+                    else:
+                        row = self._next_row
+                        self._next_row += 1
+                self._matrix[row] = value
+                self._assign(vector_id, row, metadata or {})
+                log_entries.append({"op": "put", "id": vector_id, "row": row, "metadata": metadata or {}})
+
+            self._matrix.flush()
+            self._append_log(log_entries)
+
+    def query(self, vector: List[float], top_k: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            live_count = len(self._rows)
+            if live_count == 0 or top_k <= 0:
+                return []
+
+            query = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if norm == 0:
+                return []
+
+            scores = self._matrix[:self._next_row] @ (query / norm)
+            scores[~self._live[:self._next_row]] = -np.inf
+
+            k = min(top_k, live_count)
+            top_rows = np.argpartition(-scores, k - 1)[:k]
+            top_rows = top_rows[np.argsort(-scores[top_rows])]
+
+            return [
+                {"id": self._row_ids[row], "score": float(scores[row]), "metadata": self._row_metadata[row]}
+                for row in top_rows
+            ]
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            log_entries = []
+            for vector_id in ids:
+                row = self._release(vector_id)
+                if row is not None:
+                    self._matrix[row] = 0
+                    self._free_rows.append(row)
+                    log_entries.append({"op": "del", "id": vector_id})
+            if log_entries:
+                self._matrix.flush()
+                self._append_log(log_entries)
+
+
+def create_vector_store(backend: str, local_path: str) -> Optional[VectorStore]:
+    """
+    Builds the configured vector store backend.
+
+    Args:
+        backend (str): 'pinecone' or 'local'.
+        local_path (str): Directory used by the local backend.
+
+    Returns:
+        Optional[VectorStore]: The vector store, or None if it could not be initialized.
+    """
+    if backend == "local":
+        return LocalVectorStore(local_path)
+    elif backend == "pinecone":
+        index = init_pinecone()
+        return PineconeVectorStore(index) if index is not None else None
+    else:
+        raise ValueError(f"Invalid vector store backend: {backend}. Choose 'pinecone' or 'local'.")
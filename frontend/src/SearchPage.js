@@ -2,26 +2,89 @@ import { useState } from "react";
 import { useNavigate } from "react-router-dom";
 import "./index.css";
 
+const SEARCH_URL = "http://localhost:8000/api/v1/search-resume/";
+const PAGE_SIZE = 10;
+
+// Calls onLine with every parsed NDJSON line as it arrives
+async function readNdjson(response, onLine) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    buffer = lines.pop();
+    lines.filter((line) => line.trim()).forEach((line) => onLine(JSON.parse(line)));
+  }
+  if (buffer.trim()) onLine(JSON.parse(buffer));
+}
+
+function formatScore(score) {
+  return score === null || score === undefined ? "–" : score.toFixed(3);
+}
+
 function SearchPage() {
   const [userPrompt, setUserPrompt] = useState("");
+  const [minScore, setMinScore] = useState(0);
   const [loading, setLoading] = useState(false);
+  const [results, setResults] = useState([]);
+  const [total, setTotal] = useState(null);
+  const [nextOffset, setNextOffset] = useState(null);
+  const [phase, setPhase] = useState(null);
+  const [error, setError] = useState("");
   const navigate = useNavigate();
 
-  const handleSearch = async () => {
+  const runSearch = async (offset) => {
+    // Results already shown for earlier pages stay in place
+    const kept = offset === 0 ? [] : results;
+
     setLoading(true);
+    setError("");
+    if (offset === 0) {
+      setResults([]);
+      setTotal(null);
+    }
+
     try {
-      const response = await fetch("http://localhost:8000/api/v1/search-resume/", {
+      const response = await fetch(SEARCH_URL, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ user_prompt: userPrompt }),
+        body: JSON.stringify({
+          user_prompt: userPrompt,
+          top_k: PAGE_SIZE,
+          offset,
+          min_score: Number(minScore) || 0,
+          stream: true,
+        }),
+      });
+      if (!response.ok) throw new Error(`Search failed with status ${response.status}`);
+
+      await readNdjson(response, (line) => {
+        if (line.type === "page") {
+          // A new phase replaces the hits of the previous (preliminary) phase
+          setPhase(line.phase);
+          setTotal(line.total);
+          setNextOffset(line.next_offset);
+          setResults(kept);
+        } else if (line.type === "result") {
+          setResults((current) => [...current, line]);
+        } else if (line.type === "error") {
+          setError(line.detail);
+        }
       });
-      const data = await response.json();
-      navigate("/search-result", { state: { resume: data } });
-    } catch (error) {
-      console.error("Error searching resume:", error);
+    } catch (err) {
+      console.error("Error searching resume:", err);
+      setError("Search failed. Try again.");
+    } finally {
+      setLoading(false);
     }
   };
 
+  const handleSearch = () => runSearch(0);
+
   return (
     <div className="search-container">
       <h2>Search Resume</h2>
@@ -32,11 +95,54 @@ function SearchPage() {
         onChange={(e) => setUserPrompt(e.target.value)}
         className="search-input"
       />
-      <button onClick={handleSearch} className="search-button" disabled={loading}>
+      <label className="search-option">
+        Minimum score
+        <input
+          type="number"
+          min="0"
+          max="1"
+          step="0.05"
+          value={minScore}
+          onChange={(e) => setMinScore(e.target.value)}
+        />
+      </label>
+      <button onClick={handleSearch} className="search-button" disabled={loading || !userPrompt.trim()}>
         {loading ? "We are processing. Plz wait" : "Search"}
       </button>
+
+      {error && <p className="search-error">{error}</p>}
+
+      {total !== null && (
+        <p className="search-summary">
+          {total} matching resumes{phase === "preliminary" ? " (refining ranking...)" : ""}
+        </p>
+      )}
+
+      <ul className="search-results">
+        {results.map((result) => (
+          <li
+            key={result.resume.id}
+            className="search-result-item"
+            onClick={() => navigate("/search-result", { state: { resume: result.resume } })}
+          >
+            <p>
+              <strong>#{result.rank} {result.resume.name}</strong> — {result.resume.email}
+            </p>
+            <p className="search-scores">
+              Score {formatScore(result.score)} · Vector {formatScore(result.vector_score)} · Keyword{" "}
+              {formatScore(result.keyword_score)}
+            </p>
+          </li>
+        ))}
+      </ul>
+
+      {nextOffset !== null && !loading && (
+        <button onClick={() => runSearch(nextOffset)} className="search-button">
+          Load more
+        </button>
+      )}
     </div>
   );
 }
 
-export default SearchPage;
\ No newline at end of file
+export default SearchPage;
@@ -55,6 +55,33 @@ function UploadForm() {
           />
           Mistral
         </label>
+        <label>
+          <input
+            type="radio"
+            value="Auto"
+            checked={modelType === "auto"}
+            onChange={() => setModelType("auto")}
+          />
+          Auto
+        </label>
+        <label>
+          <input
+            type="radio"
+            value="Hybrid"
+            checked={modelType === "gpt_fitz_hybrid"}
+            onChange={() => setModelType("gpt_fitz_hybrid")}
+          />
+          Hybrid
+        </label>
+        <label>
+          <input
+            type="radio"
+            value="Local"
+            checked={modelType === "local"}
+            onChange={() => setModelType("local")}
+          />
+          Local (no LLM)
+        </label>
         <button type="submit" disabled={loading}>
           {loading ? "Uploading..." : "Submit"}
         </button>